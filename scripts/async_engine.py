@@ -0,0 +1,151 @@
+import time
+import random
+import asyncio
+import httpx
+from urllib.parse import urlparse
+from colorama import Fore
+from http_fetch import USER_AGENT, extrair_de_json
+from stage_metrics import medir
+
+STATUS_REPETIR = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Per-host politeness budget: `rate` requests/s with bursts of up to `capacidade`."""
+
+    def __init__(self, rate, capacidade):
+        self.rate = rate
+        self.capacidade = capacidade
+        self.tokens = float(capacidade)
+        self.ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) * self.rate)
+                self.ultimo = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncCrawler:
+    """Drives detail-page fetches from one event loop.
+
+    `max_em_voo` bounds concurrent requests across all hosts, while each host
+    gets its own TokenBucket so raising concurrency never raises the request
+    rate seen by a single site. Pages without embedded JSON are handed to
+    `fallback` (the Selenium path) in a worker thread; an HTTP error status
+    (e.g. 404/410 for a removed listing) gives None and is never sent there.
+    With `extrair=None` the raw HTML (None if the fetch failed) is passed on
+    instead, for the Pipeline parse stage, which sends pages lacking JSON to
+    the browser.
+    `ao_falhar(url, erro)` is told about every page the HTTP path gave up on.
+    With `metricas`, rate-limit waits, requests and retry waits are timed.
+    """
+
+    def __init__(self, max_em_voo=100, taxa_por_host=4.0, rajada=8, timeout=20.0,
+                 tentativas=3, fallback=None, extrair=extrair_de_json, ao_repetir=None, ao_falhar=None,
+                 metricas=None):
+        self.max_em_voo = max_em_voo
+        self.taxa_por_host = taxa_por_host
+        self.rajada = rajada
+        self.timeout = timeout
+        self.tentativas = tentativas
+        self.fallback = fallback
+        self.extrair = extrair
+        self.ao_repetir = ao_repetir
+        self.ao_falhar = ao_falhar
+        self.metricas = metricas
+        self._buckets = {}
+
+    def _bucket(self, url):
+        host = urlparse(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.taxa_por_host, self.rajada)
+        return self._buckets[host]
+
+    async def _baixar(self, cliente, url):
+        for tentativa in range(1, self.tentativas + 1):
+            with medir(self.metricas, 'espera_taxa'):
+                await self._bucket(url).acquire()
+            try:
+                with medir(self.metricas, 'http_get'):
+                    resposta = await asyncio.wait_for(cliente.get(url), self.timeout)
+            except (httpx.TransportError, asyncio.TimeoutError):
+                if tentativa == self.tentativas:
+                    raise
+            else:
+                if resposta.status_code not in STATUS_REPETIR or tentativa == self.tentativas:
+                    resposta.raise_for_status()
+                    return resposta.text
+            if self.ao_repetir:
+                self.ao_repetir()
+            # Back off without holding a worker thread
+            with medir(self.metricas, 'backoff_http'):
+                await asyncio.sleep(2 ** tentativa + random.uniform(0, 1))
+
+    async def _processar(self, cliente, url):
+        try:
+            html = await self._baixar(cliente, url)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(Fore.YELLOW + f"\nFalha no modo HTTP para {url}: {e}")
+            if self.ao_falhar:
+                self.ao_falhar(url, e)
+            if isinstance(e, httpx.HTTPStatusError):
+                # The site did answer; a browser would only render that answer as an all-zero record
+                return None
+            html = None
+        resultado = html
+        if html is not None and self.extrair is not None:
+            resultado = self.extrair(html, url)
+        if resultado is None and self.fallback is not None:
+            resultado = await asyncio.get_running_loop().run_in_executor(None, self.fallback, url)
+        return resultado
+
+    async def _worker(self, cliente, fila, ao_concluir):
+        loop = asyncio.get_running_loop()
+        while True:
+            url = await fila.get()
+            try:
+                resultado = await self._processar(cliente, url)
+                # Off the loop, so a full downstream queue holds this worker only, not every request in flight
+                await loop.run_in_executor(None, ao_concluir, url, resultado)
+            except Exception as e:
+                print(Fore.RED + f"\nErro ao processar {url}: {e}")
+            finally:
+                fila.task_done()
+
+    async def crawl(self, urls, ao_concluir):
+        """Fetch every url, calling `ao_concluir(url, resultado)` as each one finishes.
+
+        `ao_concluir` runs in a worker thread. A blocking call there (such
+        as a put on a full Pipeline queue) keeps that fetch worker from
+        taking the next url, which is the intended backpressure, while the
+        requests already in flight and their timeouts carry on.
+        """
+        fila = asyncio.Queue()
+        for url in urls:
+            fila.put_nowait(url)
+        limites = httpx.Limits(max_connections=self.max_em_voo, max_keepalive_connections=self.max_em_voo)
+        async with httpx.AsyncClient(headers={'User-Agent': USER_AGENT, 'Accept-Language': 'pt-BR,pt;q=0.9'},
+                                     limits=limites, timeout=httpx.Timeout(self.timeout),
+                                     follow_redirects=True) as cliente:
+            workers = [asyncio.create_task(self._worker(cliente, fila, ao_concluir))
+                       for _ in range(min(self.max_em_voo, max(len(urls), 1)))]
+            try:
+                await fila.join()
+            finally:
+                for w in workers:
+                    w.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+
+def rodar_crawl(urls, ao_concluir, **kwargs):
+    """Synchronous entry point used by the scraping scripts."""
+    asyncio.run(AsyncCrawler(**kwargs).crawl(urls, ao_concluir))
@@ -0,0 +1,74 @@
+import os
+import time
+import argparse
+from tqdm import tqdm
+from colorama import init, Fore, Style
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+# ====== CONFIGURAÇÃO ======
+init(autoreset=True)
+load_dotenv()
+
+LOTE_PADRAO = 5000
+
+
+def converter(supabase, lote=LOTE_PADRAO, depois=None, pausa=0.0, barra=None):
+    """Fill the typed companion columns batch by batch, in id order; returns the rows read.
+
+    Every call to `backfill_typed_columns` is a separate short transaction,
+    so the scrapers keep writing meanwhile. `pausa` spaces the batches out
+    to go easier on a busy database; `depois` resumes after a given id.
+    """
+    total = 0
+    while True:
+        resultado = supabase.rpc('backfill_typed_columns', {'p_depois': depois, 'p_lote': lote}).execute().data
+        if not resultado or not resultado['linhas']:
+            return total
+        depois = resultado['ultimo']
+        total += resultado['linhas']
+        if barra:
+            barra.update(resultado['linhas'])
+            barra.set_postfix_str(f"último id {depois}")
+        if pausa:
+            time.sleep(pausa)
+
+
+def finalizar(supabase):
+    """Swap the typed columns in and build the range indexes; returns the columns swapped."""
+    trocadas = supabase.rpc('finalize_typed_columns', {}).execute().data or []
+    supabase.rpc('criar_indices_faixas', {}).execute()
+    return trocadas
+
+
+# ====== MAIN ======
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte as colunas numéricas de properties de texto para os tipos numéricos, em lotes.")
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO, help="Linhas convertidas por transação")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Segundos de espera entre lotes")
+    parser.add_argument("--depois", help="Retoma a partir deste id (o último mostrado numa execução interrompida)")
+    parser.add_argument("--sem-finalizar", action="store_true", help="Só preenche as colunas novas, sem trocar as antigas")
+    args = parser.parse_args()
+
+    SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
+    # The backfill functions only accept the service_role key
+    SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print(Fore.RED + "ERRO: defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY para a conversão.")
+        exit(1)
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    print(Fore.GREEN + Style.BRIGHT + "=== CONVERSÃO DAS COLUNAS NUMÉRICAS ===\n")
+    inicio = time.perf_counter()
+    with tqdm(desc=f"{Fore.CYAN}Convertendo linhas", unit="linha") as barra:
+        linhas = converter(supabase, args.lote, args.depois, args.pausa, barra)
+    print(Fore.WHITE + f"{linhas} linhas lidas em {time.perf_counter() - inicio:.1f} s.")
+
+    if args.sem_finalizar:
+        print(Fore.YELLOW + "Colunas antigas mantidas (--sem-finalizar).")
+        exit(0)
+    trocadas = finalizar(supabase)
+    if trocadas:
+        print(Fore.GREEN + Style.BRIGHT + f"\n✓ Colunas convertidas: {', '.join(trocadas)}")
+    else:
+        print(Fore.GREEN + Style.BRIGHT + "\n✓ As colunas já estavam tipadas; índices conferidos.")
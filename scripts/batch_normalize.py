@@ -0,0 +1,114 @@
+import json
+import hashlib
+import pandas as pd
+from scraping_utils import montar_registro, normalizar_valor, CAMPOS_REGISTRO
+
+# Below about this many rows the pandas overhead outweighs the gain (see benchmark_normalize.py)
+LOTE_MINIMO = 1000
+
+PREFIXOS_TIPO = [
+    'consultorio', 'galpao-deposito-armazem', 'imovel-comercial',
+    'ponto-comercial', 'sala-comercial', 'predio-comercial',
+    'edificio-residencial', 'casa-de-condominio', 'fazenda---sitio',
+    'lote-terreno', 'apartamento', 'cobertura', 'sobrado',
+    'kitnet', 'flat', 'casa',
+]
+# The path of the first "/imovel/" segment, same as extrair_tipo_imovel; alternatives are tried in order
+TIPO_RE = r"^(?:[A-Za-z][A-Za-z0-9+.-]*:)?(?://[^/?#]*)?[^?#]*?/imovel/(" + "|".join(PREFIXOS_TIPO) + ")?"
+ENDERECO_RE = r"^(.*?)\s*-\s*(.*?),\s*(.*?)\s*-\s*(.{2})$"
+CAMPOS_FLOAT = ['valor', 'area_privativa']
+CAMPOS_INT = ['dormitorio', 'banheiro', 'vaga', 'suite']
+CAMPOS_BOOL = ['piscina', 'varanda', 'elevador']
+_JSON = json.JSONEncoder(ensure_ascii=False)
+
+
+def numero_br(serie):
+    """Vectorized float conversion accepting numbers as well as Brazilian strings like "1.500,50".
+
+    Strings follow `to_float`: everything but digits and "," is dropped and
+    the comma becomes the decimal point. Unparseable values become NaN.
+    """
+    e_texto = serie.map(type) == str
+    texto = serie.where(e_texto).astype('string')
+    convertidos = pd.to_numeric(
+        texto.str.replace(r'[^\d,]', '', regex=True).str.replace(',', '.', regex=False), errors='coerce')
+    convertidos = convertidos.astype('float64')
+    if e_texto.all():
+        return convertidos
+    return pd.to_numeric(serie.where(~e_texto), errors='coerce').astype('float64').fillna(convertidos)
+
+
+def inteiro_br(serie):
+    """Vectorized `to_int`: the digits of each string, 0 when there are none."""
+    digitos = serie.astype('string').str.replace(r'\D', '', regex=True)
+    return pd.to_numeric(digitos, errors='coerce').fillna(0).astype('int64')
+
+
+def tipos_imovel(urls):
+    """Vectorized `extrair_tipo_imovel`."""
+    prefixo = urls.astype('string').str.extract(TIPO_RE, expand=False)
+    return prefixo.str.replace('-', ' ', regex=False).replace('casa', 'casa isolada').fillna('nao informado')
+
+
+def dividir_enderecos(enderecos):
+    """Vectorized `dividir_endereco`: a DataFrame with rua, bairro, cidade and uf."""
+    texto = enderecos.astype('string')
+    partes = texto.str.extract(ENDERECO_RE).apply(lambda coluna: coluna.str.strip())
+    partes.columns = ['rua', 'bairro', 'cidade', 'uf']
+    sem_formato = partes['rua'].isna()
+    partes.loc[sem_formato, 'rua'] = texto[sem_formato]
+    partes[['bairro', 'cidade', 'uf']] = partes[['bairro', 'cidade', 'uf']].fillna('0')
+    vazio = texto.isna() | texto.isin(['', '0'])
+    partes.loc[vazio, ['rua', 'bairro', 'cidade', 'uf']] = '0'
+    return partes
+
+
+def hashes_lote(colunas):
+    """`hash_registro` for every row of `colunas`, normalizing column by column instead of value by value."""
+    normalizadas = []
+    for campo in CAMPOS_REGISTRO:
+        valores = colunas[campo]
+        if campo in CAMPOS_FLOAT:
+            normalizadas.append([round(v, 2) for v in valores])
+        elif campo in CAMPOS_INT:
+            normalizadas.append([float(v) for v in valores])
+        elif campo in CAMPOS_BOOL:
+            normalizadas.append(valores)
+        else:
+            normalizadas.append([v.strip() if type(v) is str else normalizar_valor(v) for v in valores])
+    return [hashlib.sha1(_JSON.encode(list(linha)).encode('utf-8')).hexdigest() for linha in zip(*normalizadas)]
+
+
+def normalizar_lote(brutos):
+    """Vectorized `montar_registro` for a batch of (url, dados_brutos, endereco).
+
+    Returns the records in input order, equal to what `montar_registro`
+    builds one by one (same Python types and content_hash). Small batches
+    go through `montar_registro` directly.
+    """
+    if len(brutos) < LOTE_MINIMO:
+        return [montar_registro(url, dados, endereco) for url, dados, endereco in brutos]
+
+    urls = pd.Series([url for url, _, _ in brutos], dtype=object)
+    enderecos = pd.Series([endereco for _, _, endereco in brutos], dtype=object)
+
+    def coluna(campo):
+        return pd.Series([dados.get(campo) for _, dados, _ in brutos], dtype=object)
+
+    colunas = {}
+    for campo in CAMPOS_FLOAT:
+        colunas[campo] = numero_br(coluna(campo)).fillna(0.0).astype(float).tolist()
+    for campo in CAMPOS_INT:
+        colunas[campo] = inteiro_br(coluna(campo)).tolist()
+    colunas['andar'] = [dados.get('andar', '0') for _, dados, _ in brutos]
+    for campo in CAMPOS_BOOL:
+        colunas[campo] = coluna(campo).eq("1").tolist()
+    colunas['tipo'] = tipos_imovel(urls).tolist()
+    colunas['endereco_completo'] = enderecos.tolist()
+    partes = dividir_enderecos(enderecos)
+    for campo in ('rua', 'bairro', 'cidade', 'uf'):
+        colunas[campo] = partes[campo].astype(object).tolist()
+
+    colunas['content_hash'] = hashes_lote(colunas)
+    campos = CAMPOS_REGISTRO + ['content_hash']
+    return [dict(zip(campos, valores)) for valores in zip(*(colunas[c] for c in campos))]
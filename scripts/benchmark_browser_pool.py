@@ -0,0 +1,69 @@
+import time
+import argparse
+import concurrent.futures
+from colorama import init, Fore, Style
+from browser_pool import BrowserPool, criar_driver, chromedriver_path
+
+init(autoreset=True)
+
+
+def ler_urls(caminho, limite):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip().startswith('http')]
+    return urls[:limite]
+
+
+def carregar_por_url(url, _pool):
+    # Previous behaviour: one fresh Chrome per listing
+    driver = criar_driver()
+    try:
+        driver.get(url)
+        return len(driver.page_source)
+    finally:
+        driver.quit()
+
+
+def carregar_com_pool(url, pool):
+    with pool.session() as driver:
+        driver.get(url)
+        return len(driver.page_source)
+
+
+def medir(nome, fn, urls, workers, pool=None):
+    inicio = time.perf_counter()
+    ok = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in concurrent.futures.as_completed([executor.submit(fn, url, pool) for url in urls]):
+            try:
+                future.result()
+                ok += 1
+            except Exception as e:
+                print(Fore.RED + f"Falha: {e}")
+    duracao = time.perf_counter() - inicio
+    paginas_min = ok / duracao * 60 if duracao else 0.0
+    print(f"{Fore.CYAN}{nome:<12}{Fore.WHITE} {ok} páginas em {duracao:.1f}s -> {paginas_min:.1f} páginas/min")
+    return paginas_min
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara páginas/min: Chrome por URL vs BrowserPool.")
+    parser.add_argument("arquivo", help="Arquivo .txt com um link de imóvel por linha")
+    parser.add_argument("--limite", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--max-pages", type=int, default=50)
+    args = parser.parse_args()
+
+    urls = ler_urls(args.arquivo, args.limite)
+    if not urls:
+        print(Fore.RED + "Nenhum link válido encontrado no arquivo.")
+        exit(1)
+    chromedriver_path()
+
+    print(Fore.GREEN + Style.BRIGHT + f"=== BENCHMARK BROWSER POOL ({len(urls)} links, {args.workers} workers) ===\n")
+    base = medir("por URL", carregar_por_url, urls, args.workers)
+    with BrowserPool(size=args.workers, max_pages=args.max_pages) as pool:
+        pool.warm()
+        novo = medir("pool", carregar_com_pool, urls, args.workers, pool)
+        print(f"{Fore.WHITE}Sessões criadas: {pool.sessions_created}, recicladas: {pool.sessions_recycled}")
+    if base:
+        print(Fore.GREEN + Style.BRIGHT + f"\nGanho: {novo / base:.2f}x")
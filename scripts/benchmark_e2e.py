@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import time
+import types
+import runpy
+import importlib
+import argparse
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+from colorama import init, Fore, Style
+from fixture_server import CORPUS_PADRAO, servir_vivareal
+
+init(autoreset=True)
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PADRAO = os.path.join(DIRETORIO, "benchmark_e2e_baseline.json")
+# Metric, direction that counts as better, label
+METRICAS = (
+    ("anuncios_s", "maior", "anúncios/s"),
+    ("cpu_ms_por_anuncio", "menor", "CPU ms/anúncio"),
+    ("rss_mb", "menor", "pico RSS MB (principal)"),
+    ("rss_workers_mb", "menor", "pico RSS MB (maior worker)"),
+)
+
+
+# ====== PROCESSO FILHO ======
+def executar_filho(url, saida, latencia):
+    """Run webscrapping.py's whole flow in this process against the stand-ins and write the numbers to `saida`."""
+    sys.path.insert(0, DIRETORIO)
+    from fake_supabase import SupabaseEmMemoria
+
+    banco = SupabaseEmMemoria(latencia)
+    modulo = types.ModuleType("supabase")
+    modulo.create_client = lambda *args, **kwargs: banco
+    modulo.Client = SupabaseEmMemoria
+    sys.modules["supabase"] = modulo
+
+    # Every page of the corpus is served, so Chrome is never needed; no driver download either
+    import browser_pool
+    browser_pool.chromedriver_path = lambda: "chromedriver"
+    # Imported up front so the timing covers the scraping, not the imports
+    for nome in ("pipeline", "async_engine", "listing_discovery", "upsert_writer", "progress_reporter",
+                 "html_cache", "frontier", "excel_export", "dedup", "work_queue"):
+        importlib.import_module(nome)
+    import scraping_utils
+    scraping_utils.limpar_console = lambda: None
+
+    sys.argv = ["webscrapping.py", "--url", url, "--taxa", "1000"]
+    antes = resource.getrusage(resource.RUSAGE_SELF)
+    antes_filhos = resource.getrusage(resource.RUSAGE_CHILDREN)
+    inicio = time.perf_counter()
+    codigo = 0
+    try:
+        runpy.run_path(os.path.join(DIRETORIO, "webscrapping.py"), run_name="__main__")
+    except SystemExit as e:
+        codigo = e.code or 0
+    segundos = time.perf_counter() - inicio
+    depois = resource.getrusage(resource.RUSAGE_SELF)
+    depois_filhos = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    cpu = (depois.ru_utime - antes.ru_utime + depois.ru_stime - antes.ru_stime
+           + depois_filhos.ru_utime - antes_filhos.ru_utime + depois_filhos.ru_stime - antes_filhos.ru_stime)
+    jobs = banco.linhas("scraping_jobs")
+    resultado = {
+        "codigo": codigo,
+        "gravados": len(banco.linhas("properties")),
+        "segundos": segundos,
+        "cpu_s": cpu,
+        # ru_maxrss is in KiB on Linux; for children it is the largest single process
+        "rss_mb": depois.ru_maxrss / 1024,
+        "rss_workers_mb": depois_filhos.ru_maxrss / 1024,
+        "requisicoes_db": banco.requisicoes,
+        "estagios": (jobs[0].get("metrics") if jobs else None) or {},
+    }
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f)
+
+
+# ====== PROCESSO PRINCIPAL ======
+def rodada(url, anuncios, latencia, log):
+    """One full scrape in a fresh process and an empty working directory (no frontier, cache or rows left over)."""
+    with tempfile.TemporaryDirectory(prefix="bench_e2e_") as tmp:
+        saida = os.path.join(tmp, "resultado.json")
+        env = dict(os.environ, VITE_SUPABASE_URL="http://supabase.invalid", SUPABASE_SERVICE_ROLE_KEY="offline",
+                   METRICS_TEXTFILE_DIR=tmp)
+        with open(log, "a", encoding="utf-8") as f:
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--filho", url, "--saida", saida,
+                            "--latencia", str(latencia)], cwd=tmp, env=env, stdout=f, stderr=subprocess.STDOUT)
+        if not os.path.exists(saida):
+            return None
+        with open(saida, encoding="utf-8") as f:
+            resultado = json.load(f)
+    resultado["anuncios_s"] = resultado["gravados"] / resultado["segundos"]
+    resultado["cpu_ms_por_anuncio"] = resultado["cpu_s"] * 1000 / max(resultado["gravados"], 1)
+    resultado["completo"] = resultado["codigo"] == 0 and resultado["gravados"] == anuncios
+    return resultado
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIRETORIO, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def comparar(atual, baseline, tolerancia):
+    """Print current vs baseline; returns the metrics that got worse by more than `tolerancia`."""
+    piores = []
+    print(Fore.CYAN + f"\n{'métrica':<28} {'baseline':>10} {'atual':>10} {'variação':>9}")
+    for chave, melhor, rotulo in METRICAS:
+        antes, agora = baseline["medianas"].get(chave), atual["medianas"][chave]
+        if not antes:
+            continue
+        variacao = agora / antes - 1
+        piorou = variacao < -tolerancia if melhor == "maior" else variacao > tolerancia
+        cor = Fore.RED if piorou else Fore.WHITE
+        print(cor + f"{rotulo:<28} {antes:>10.2f} {agora:>10.2f} {variacao:>+9.1%}")
+        if piorou:
+            piores.append(rotulo)
+    return piores
+
+
+# ====== MAIN ======
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta do webscrapping.py, offline, "
+                                                 "contra um VivaReal local e um Supabase em memória.")
+    parser.add_argument("corpus", nargs="?", default=CORPUS_PADRAO,
+                        help="Diretório com páginas de detalhe salvas (.html); padrão: benchmark_corpus/")
+    parser.add_argument("--copias", type=int, default=10,
+                        help="Quantas vezes cada página do corpus aparece na busca, como anúncios distintos")
+    parser.add_argument("--rodadas", type=int, default=3)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos de espera por requisição ao banco falso")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help="Arquivo JSON com os números de referência")
+    parser.add_argument("--salvar", action="store_true", help="Grava o resultado desta execução como a nova baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Piora relativa aceita antes de acusar regressão")
+    parser.add_argument("--log", default="benchmark_e2e.log", help="Saída do webscrapping.py em cada rodada")
+    parser.add_argument("--filho", metavar="URL", help=argparse.SUPPRESS)
+    parser.add_argument("--saida", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        executar_filho(args.filho, args.saida, args.latencia)
+        exit(0)
+
+    # The server runs here, so its CPU does not count against the scraper
+    server, url, anuncios = servir_vivareal(args.corpus, args.copias)
+    if not anuncios:
+        print(Fore.RED + "Nenhuma página .html encontrada no corpus.")
+        exit(1)
+    paginas = anuncios // args.copias
+    print(Fore.GREEN + Style.BRIGHT + f"=== BENCHMARK DE PONTA A PONTA ({anuncios} anúncios: {paginas} páginas "
+          f"x {args.copias} cópias, {os.cpu_count()} CPUs) ===\n")
+    open(args.log, "w").close()
+
+    rodadas = []
+    for i in range(args.rodadas):
+        resultado = rodada(url, anuncios, args.latencia, args.log)
+        if resultado is None or not resultado["completo"]:
+            gravados = resultado["gravados"] if resultado else 0
+            print(Fore.RED + f"Rodada {i + 1} incompleta: {gravados} de {anuncios} anúncios gravados (veja {args.log}).")
+            server.shutdown()
+            exit(1)
+        rodadas.append(resultado)
+        print(f"{Fore.CYAN}Rodada {i + 1}: {Fore.WHITE}{resultado['anuncios_s']:.1f} anúncios/s, "
+              f"{resultado['segundos']:.2f} s, CPU {resultado['cpu_s']:.2f} s, "
+              f"RSS {resultado['rss_mb']:.0f} MB (workers {resultado['rss_workers_mb']:.0f} MB)")
+    server.shutdown()
+
+    atual = {
+        "commit": commit_atual(),
+        "data": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "paginas": paginas,
+        "copias": args.copias,
+        "anuncios": anuncios,
+        "latencia": args.latencia,
+        "rodadas": len(rodadas),
+        "medianas": {chave: statistics.median(r[chave] for r in rodadas) for chave, _, _ in METRICAS},
+        # Stage breakdown of the median run, to see where a regression went
+        "estagios": sorted(rodadas, key=lambda r: r["anuncios_s"])[len(rodadas) // 2]["estagios"],
+    }
+    print(Fore.WHITE + "\nEstágios (rodada mediana):")
+    for estagio, numeros in atual["estagios"].items():
+        print(f"  {estagio:<20} n={numeros['n']:<6} total {numeros['total_s']:>8.3f} s  p95 {numeros['p95_ms']:>9.3f} ms")
+
+    if args.salvar:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(atual, f, indent=2, ensure_ascii=False)
+        print(Fore.GREEN + Style.BRIGHT + f"\n✓ Baseline salva em {args.baseline}")
+        exit(0)
+    if not os.path.exists(args.baseline):
+        print(Fore.YELLOW + f"\nSem baseline em {args.baseline}; rode com --salvar para criar uma.")
+        exit(0)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if (baseline.get("anuncios"), baseline.get("latencia"), baseline.get("cpus")) != (anuncios, args.latencia, os.cpu_count()):
+        print(Fore.YELLOW + f"\nAviso: a baseline ({baseline.get('anuncios')} anúncios, latência {baseline.get('latencia')}, "
+              f"{baseline.get('cpus')} CPUs, commit {baseline.get('commit')}) não foi medida nas mesmas condições.")
+    piores = comparar(atual, baseline, args.tolerancia)
+    if piores:
+        print(Fore.RED + Style.BRIGHT + f"\n✗ Regressão acima de {args.tolerancia:.0%}: {', '.join(piores)}")
+        exit(1)
+    print(Fore.GREEN + Style.BRIGHT + f"\n✓ Dentro de {args.tolerancia:.0%} da baseline (commit {baseline.get('commit')}).")
@@ -0,0 +1,86 @@
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import resource
+import multiprocessing
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.styles import Font, PatternFill, Alignment
+from colorama import init, Fore, Style
+from excel_export import COLUNAS_EXCEL, exportar_parcial
+
+init(autoreset=True)
+
+
+def gerar_parcial(caminho, linhas):
+    """Synthetic partial JSONL file shaped like the scrapers' output."""
+    rng = random.Random(42)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for i in range(linhas):
+            registro = {
+                'tipo': rng.choice(['Apartamento', 'Casa', 'Cobertura']),
+                'valor': rng.randint(150, 5000) * 1000.0,
+                'area_privativa': float(rng.randint(30, 400)),
+                'dormitorio': rng.randint(1, 5), 'banheiro': rng.randint(1, 4), 'vaga': rng.randint(0, 3),
+                'suite': rng.randint(0, 3), 'andar': rng.randint(0, 30),
+                'piscina': rng.random() < 0.2, 'varanda': rng.random() < 0.5, 'elevador': rng.random() < 0.6,
+                'rua': f"Rua Exemplo {rng.randint(1, 999)}", 'bairro': f"Bairro {rng.randint(1, 80)}",
+                'cidade': 'Santos', 'uf': 'SP', 'endereco_completo': f"Rua Exemplo {i}, Santos - SP",
+                'link': f"https://www.vivareal.com.br/imovel/{i}/", 'job_id': 'bench',
+            }
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+
+def exportar_antigo(caminho, nome_arquivo):
+    """The previous path: whole file into a DataFrame, to_excel, then an openpyxl round trip to style it."""
+    df = pd.read_json(caminho, lines=True)
+    df = df.drop_duplicates(subset='link', keep='last').reindex(columns=COLUNAS_EXCEL, fill_value=0)
+    # openpyxl was the engine in use before xlsxwriter joined the requirements
+    df.to_excel(nome_arquivo, index=False, engine='openpyxl')
+    wb = load_workbook(nome_arquivo)
+    ws = wb.active
+    for cell in ws[1]:
+        cell.fill = PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid")
+        cell.font = Font(color="FFFFFF", bold=True)
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+    for col in ws.columns:
+        ws.column_dimensions[col[0].column_letter].width = max(len(str(cell.value)) for cell in col if cell.value) + 2
+    ws.freeze_panes = "A2"
+    wb.save(nome_arquivo)
+
+
+def _rodar(funcao, args, fila):
+    inicio = time.perf_counter()
+    funcao(*args)
+    fila.put((time.perf_counter() - inicio, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def medir(funcao, *args):
+    """Run `funcao` in a fresh process so each path gets its own peak RSS."""
+    fila = multiprocessing.Queue()
+    processo = multiprocessing.Process(target=_rodar, args=(funcao, args, fila))
+    processo.start()
+    resultado = fila.get()
+    processo.join()
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara a exportação antiga (pandas + openpyxl) com a exportação em streaming.")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(Fore.GREEN + Style.BRIGHT + f"=== BENCHMARK EXPORTAÇÃO EXCEL ({args.linhas} linhas) ===\n")
+    with tempfile.TemporaryDirectory() as pasta:
+        parcial = os.path.join(pasta, 'parcial.jsonl')
+        gerar_parcial(parcial, args.linhas)
+        antigo = medir(exportar_antigo, parcial, os.path.join(pasta, 'antigo.xlsx'))
+        novo = medir(exportar_parcial, parcial, os.path.join(pasta, 'novo.xlsx'), False, False)
+        tamanhos = [os.path.getsize(os.path.join(pasta, nome)) / 2 ** 20 for nome in ('antigo.xlsx', 'novo.xlsx')]
+
+    for nome, (segundos, pico), tamanho in zip(("pandas + openpyxl", "streaming"), (antigo, novo), tamanhos):
+        print(f"{Fore.CYAN}{nome:<18} {Fore.WHITE}{segundos:7.1f} s   pico RSS {pico:7.1f} MB   arquivo {tamanho:5.1f} MB")
+    print(Fore.WHITE + f"\n{antigo[0] / novo[0]:.1f}x mais rápido, {antigo[1] / novo[1]:.1f}x menos memória")
@@ -0,0 +1,89 @@
+import os
+import re
+import json
+import time
+import argparse
+from colorama import init, Fore, Style
+from parsers import DocumentoBS
+from fixture_server import CORPUS_PADRAO
+from scraping_utils import extrair_valores, texto_do_anuncio, VALORES_PADRAO
+
+init(autoreset=True)
+
+
+def extrair_valores_legado(texto):
+    # Previous implementation: ten separate searches over the whole page text
+    dados = {}
+    preco_match = re.search(r"R\$\s*([\d\.\,]+)", texto)
+    dados['valor'] = preco_match.group(1).strip() if preco_match else "0"
+    metragem_match = re.search(r"([\d\.,]+)\s*m²", texto, re.IGNORECASE)
+    dados['area_privativa'] = metragem_match.group(1) if metragem_match else "0"
+    quartos_match = re.search(r"(\d+)\s*quartos?", texto, re.IGNORECASE)
+    dados['dormitorio'] = quartos_match.group(1) if quartos_match else "0"
+    banheiros_match = re.search(r"(\d+)\s*banheiros?", texto, re.IGNORECASE)
+    dados['banheiro'] = banheiros_match.group(1) if banheiros_match else "0"
+    vagas_match = re.search(r"(\d+)\s*vagas?", texto, re.IGNORECASE)
+    dados['vaga'] = vagas_match.group(1) if vagas_match else "0"
+    suites_match = re.search(r"(\d+)\s*suítes?", texto, re.IGNORECASE)
+    dados['suite'] = suites_match.group(1) if suites_match else "0"
+    andar_match = re.search(r"(\d+)(?:º)?\s*andar", texto, re.IGNORECASE)
+    dados['andar'] = andar_match.group(1) if andar_match else "0"
+    dados['piscina'] = "1" if re.search(r"piscinas?", texto, re.IGNORECASE) else "0"
+    dados['varanda'] = "1" if re.search(r"varandas?", texto, re.IGNORECASE) else "0"
+    dados['elevador'] = "1" if re.search(r"elevador", texto, re.IGNORECASE) else "0"
+    return dados
+
+
+def legado(doc):
+    return extrair_valores_legado(doc.texto())
+
+
+def novo(doc):
+    return extrair_valores(texto_do_anuncio(doc))
+
+
+def medir(fn, docs, rodadas):
+    inicio = time.perf_counter()
+    for _ in range(rodadas):
+        resultados = [fn(doc) for doc in docs]
+    return (time.perf_counter() - inicio) / (rodadas * len(docs)) * 1000, resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara extrair_valores atual com a versão anterior.")
+    parser.add_argument("corpus", nargs="?", default=CORPUS_PADRAO,
+                        help="Diretório com páginas de detalhe salvas (.html); padrão: benchmark_corpus/")
+    parser.add_argument("--gabarito", help="JSON {arquivo.html: {campo: valor}} com os valores corretos")
+    parser.add_argument("--rodadas", type=int, default=5)
+    args = parser.parse_args()
+
+    arquivos = sorted(nome for nome in os.listdir(args.corpus) if nome.endswith(".html"))
+    if not arquivos:
+        print(Fore.RED + "Nenhuma página .html encontrada no corpus.")
+        exit(1)
+    docs = []
+    for nome in arquivos:
+        with open(os.path.join(args.corpus, nome), 'r', encoding='utf-8') as f:
+            docs.append(DocumentoBS(f.read()))
+
+    ms_legado, res_legado = medir(legado, docs, args.rodadas)
+    ms_novo, res_novo = medir(novo, docs, args.rodadas)
+    print(Fore.GREEN + Style.BRIGHT + f"=== BENCHMARK EXTRATOR ({len(arquivos)} páginas) ===\n")
+    print(f"{Fore.CYAN}legado {Fore.WHITE}{ms_legado:.3f} ms/página")
+    print(f"{Fore.CYAN}novo   {Fore.WHITE}{ms_novo:.3f} ms/página  ({ms_legado / ms_novo:.1f}x)\n")
+
+    gabarito = None
+    if args.gabarito:
+        with open(args.gabarito, 'r', encoding='utf-8') as f:
+            gabarito = json.load(f)
+
+    print(f"{'campo':<16}{'legado':>10}{'novo':>10}" if gabarito else f"{'campo':<16}{'concordância':>14}")
+    for campo in VALORES_PADRAO:
+        if gabarito:
+            esperados = [str(gabarito.get(nome, {}).get(campo, "0")) for nome in arquivos]
+            acc_l = sum(r[campo] == e for r, e in zip(res_legado, esperados)) / len(arquivos)
+            acc_n = sum(r[campo] == e for r, e in zip(res_novo, esperados)) / len(arquivos)
+            print(f"{campo:<16}{acc_l:>10.1%}{acc_n:>10.1%}")
+        else:
+            iguais = sum(l[campo] == n[campo] for l, n in zip(res_legado, res_novo)) / len(arquivos)
+            print(f"{campo:<16}{iguais:>14.1%}")
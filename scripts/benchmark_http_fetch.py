@@ -0,0 +1,55 @@
+import time
+import argparse
+from colorama import init, Fore, Style
+from fixture_server import CORPUS_PADRAO, servir_corpus, urls_do_corpus
+from http_fetch import criar_cliente_http, extrair_informacoes_http
+from browser_pool import BrowserPool
+from parsers import parse_html
+from scraping_utils import extrair_valores, texto_do_anuncio, get_address_from_soup, montar_registro
+
+init(autoreset=True)
+
+
+def via_navegador(url, pool):
+    with pool.session() as driver:
+        driver.get(url)
+        html = driver.page_source
+    doc = parse_html(html)
+    return montar_registro(url, extrair_valores(texto_do_anuncio(doc)), get_address_from_soup(doc))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara o modo HTTP+JSON com o Selenium sobre páginas salvas.")
+    parser.add_argument("corpus", nargs="?", default=CORPUS_PADRAO,
+                        help="Diretório com páginas de detalhe salvas (.html); padrão: benchmark_corpus/")
+    parser.add_argument("--rodadas", type=int, default=3)
+    parser.add_argument("--sem-navegador", action="store_true", help="Mede apenas o modo HTTP")
+    args = parser.parse_args()
+
+    server, base_url = servir_corpus(args.corpus)
+    urls = urls_do_corpus(args.corpus, base_url)
+    if not urls:
+        print(Fore.RED + "Nenhuma página .html encontrada no corpus.")
+        exit(1)
+    print(Fore.GREEN + Style.BRIGHT + f"=== BENCHMARK HTTP vs NAVEGADOR ({len(urls)} páginas, 1 worker) ===\n")
+
+    cliente = criar_cliente_http()
+    sem_json = 0
+    inicio = time.perf_counter()
+    for _ in range(args.rodadas):
+        for url in urls:
+            if extrair_informacoes_http(url, cliente) is None:
+                sem_json += 1
+    http_ps = len(urls) * args.rodadas / (time.perf_counter() - inicio)
+    print(f"{Fore.CYAN}HTTP+JSON  {Fore.WHITE}{http_ps:.1f} páginas/s ({sem_json} sem JSON, cairiam no navegador)")
+
+    if not args.sem_navegador:
+        with BrowserPool(size=1, max_pages=10**6) as pool:
+            pool.warm()
+            inicio = time.perf_counter()
+            for url in urls:
+                via_navegador(url, pool)
+            nav_ps = len(urls) / (time.perf_counter() - inicio)
+        print(f"{Fore.CYAN}Navegador  {Fore.WHITE}{nav_ps:.1f} páginas/s")
+        print(Fore.GREEN + Style.BRIGHT + f"\nGanho por núcleo: {http_ps / nav_ps:.1f}x")
+    server.shutdown()
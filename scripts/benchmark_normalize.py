@@ -0,0 +1,72 @@
+import gc
+import time
+import random
+import argparse
+from colorama import init, Fore, Style
+from scraping_utils import montar_registro
+from batch_normalize import normalizar_lote
+
+init(autoreset=True)
+
+TIPOS = ['apartamento', 'casa', 'casa-de-condominio', 'cobertura', 'sala-comercial', 'lote-terreno', 'sobrado']
+BAIRROS = ['Gonzaga', 'Boqueirão', 'Embaré', 'Ponta da Praia', 'Aparecida', 'Centro']
+
+
+def gerar_brutos(linhas):
+    """Raw strings shaped like extrair_valores/dados_do_next_data output, Brazilian number formats included."""
+    rng = random.Random(42)
+    brutos = []
+    for i in range(linhas):
+        valor = rng.randint(150, 5000) * 1000
+        dados = {
+            'valor': f"{valor:,}".replace(',', '.') + rng.choice(['', ',00', ',50']),
+            'area_privativa': f"{rng.randint(30, 400)}" + rng.choice(['', ',5']),
+            'dormitorio': str(rng.randint(0, 5)), 'banheiro': str(rng.randint(1, 4)),
+            'vaga': str(rng.randint(0, 3)), 'suite': str(rng.randint(0, 3)), 'andar': str(rng.randint(0, 30)),
+            'piscina': rng.choice("01"), 'varanda': rng.choice("01"), 'elevador': rng.choice("01"),
+        }
+        endereco = rng.choice([f"Rua Exemplo, {i} - {rng.choice(BAIRROS)}, Santos - SP", "0", "Rua Sem Bairro"])
+        url = f"https://www.vivareal.com.br/imovel/{rng.choice(TIPOS)}-2-quartos-santos-id-{i}/"
+        brutos.append((url, dados, endereco))
+    return brutos
+
+
+def cronometrar(funcao, rodadas):
+    """Best of `rodadas` runs; earlier results are frozen so the GC does not rescan them."""
+    melhor = None
+    for _ in range(rodadas):
+        gc.collect()
+        gc.freeze()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, resultado
+
+
+def em_lotes(brutos, lote):
+    registros = []
+    for i in range(0, len(brutos), lote):
+        registros.extend(normalizar_lote(brutos[i:i + lote]))
+    return registros
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara montar_registro registro a registro com a normalização em lote.")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--lote", type=int, default=5000, help="Tamanho de cada lote da normalização vetorizada")
+    parser.add_argument("--rodadas", type=int, default=3, help="Vale o melhor tempo de cada modo")
+    args = parser.parse_args()
+
+    brutos = gerar_brutos(args.linhas)
+    print(Fore.GREEN + Style.BRIGHT + f"=== BENCHMARK NORMALIZAÇÃO ({args.linhas} registros) ===\n")
+
+    t_registro, por_registro = cronometrar(
+        lambda: [montar_registro(url, dados, endereco) for url, dados, endereco in brutos], args.rodadas)
+    t_lote, em_lote = cronometrar(lambda: em_lotes(brutos, args.lote), args.rodadas)
+
+    iguais = sum(a == b for a, b in zip(por_registro, em_lote))
+    print(f"{Fore.CYAN}por registro  {Fore.WHITE}{t_registro:6.2f} s  {args.linhas / t_registro:9.0f} registros/s")
+    print(f"{Fore.CYAN}em lote       {Fore.WHITE}{t_lote:6.2f} s  {args.linhas / t_lote:9.0f} registros/s (lotes de {args.lote})")
+    cor = Fore.GREEN if iguais == args.linhas else Fore.RED
+    print(cor + f"\n{t_registro / t_lote:.1f}x mais rápido; {iguais}/{args.linhas} registros idênticos")
@@ -0,0 +1,46 @@
+import os
+import time
+import argparse
+from colorama import init, Fore, Style
+from parsers import BACKENDS, parse_html
+from fixture_server import CORPUS_PADRAO
+from scraping_utils import extrair_valores, texto_do_anuncio, get_address_from_soup
+
+init(autoreset=True)
+
+
+def processar(html, backend):
+    doc = parse_html(html, backend)
+    dados = extrair_valores(texto_do_anuncio(doc))
+    dados['endereco_completo'] = get_address_from_soup(doc)
+    return dados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vazão e paridade de cada parser HTML sobre páginas salvas.")
+    parser.add_argument("corpus", nargs="?", default=CORPUS_PADRAO,
+                        help="Diretório com páginas de detalhe salvas (.html); padrão: benchmark_corpus/")
+    parser.add_argument("--rodadas", type=int, default=3)
+    args = parser.parse_args()
+
+    paginas = []
+    for nome in sorted(os.listdir(args.corpus)):
+        if nome.endswith(".html"):
+            with open(os.path.join(args.corpus, nome), 'r', encoding='utf-8') as f:
+                paginas.append(f.read())
+    if not paginas:
+        print(Fore.RED + "Nenhuma página .html encontrada no corpus.")
+        exit(1)
+
+    print(Fore.GREEN + Style.BRIGHT + f"=== BENCHMARK PARSERS ({len(paginas)} páginas) ===\n")
+    referencia = [processar(html, 'bs4') for html in paginas]
+    base = None
+    for backend in BACKENDS:
+        inicio = time.perf_counter()
+        for _ in range(args.rodadas):
+            resultados = [processar(html, backend) for html in paginas]
+        paginas_s = len(paginas) * args.rodadas / (time.perf_counter() - inicio)
+        base = base or paginas_s
+        iguais = sum(r == ref for r, ref in zip(resultados, referencia))
+        print(f"{Fore.CYAN}{backend:<11}{Fore.WHITE}{paginas_s:>9.1f} páginas/s  {paginas_s / base:>5.1f}x  "
+              f"paridade com bs4: {iguais}/{len(paginas)}")
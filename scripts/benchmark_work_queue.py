@@ -0,0 +1,77 @@
+import time
+import argparse
+import multiprocessing
+from colorama import init, Fore, Style
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+init(autoreset=True)
+
+
+def no(dsn, job_id, indice, lote, latencia, contador):
+    """One simulated node: claim a batch, 'fetch' it in `latencia` s per URL batch, finish it."""
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    cur = conn.cursor()
+    worker = f"bench-{indice}"
+    while True:
+        cur.execute("SELECT url FROM claim_crawl_urls(%s, %s, %s, 60, 3)", (job_id, worker, lote))
+        urls = [linha[0] for linha in cur.fetchall()]
+        if not urls:
+            break
+        time.sleep(latencia)
+        cur.execute("SELECT finish_crawl_urls(%s, %s, %s, true)", (job_id, worker, urls))
+        with contador.get_lock():
+            contador.value += len(urls)
+    conn.close()
+
+
+def rodada(dsn, nos, total, lote, latencia):
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute("INSERT INTO scraping_jobs (status) VALUES ('running') RETURNING id")
+    job_id = cur.fetchone()[0]
+    cur.execute("INSERT INTO crawl_queue (job_id, url) SELECT %s, 'https://exemplo/imovel/' || g FROM generate_series(1, %s) g",
+                (job_id, total))
+    contador = multiprocessing.Value('i', 0)
+    processos = [multiprocessing.Process(target=no, args=(dsn, job_id, i, lote, latencia, contador)) for i in range(nos)]
+    inicio = time.perf_counter()
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join()
+    decorrido = time.perf_counter() - inicio
+    cur.execute("SELECT count(*) FILTER (WHERE state = 'done'), count(*) FROM crawl_queue WHERE job_id = %s", (job_id,))
+    concluidas, linhas = cur.fetchone()
+    cur.execute("DELETE FROM scraping_jobs WHERE id = %s", (job_id,))
+    conn.close()
+    return decorrido, contador.value, concluidas, linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede a vazão da fila distribuída (crawl_queue) com N nós simulados.")
+    parser.add_argument("dsn", help="Postgres local com as migrações aplicadas, ex.: postgresql://postgres@localhost/postgres")
+    parser.add_argument("--urls", type=int, default=5000)
+    parser.add_argument("--nos", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--lote", type=int, default=50)
+    parser.add_argument("--latencia", type=float, default=0.2, help="Segundos simulados para baixar um lote")
+    args = parser.parse_args()
+
+    if psycopg2 is None:
+        print(Fore.RED + "Instale psycopg2-binary para rodar este benchmark.")
+        exit(1)
+
+    print(Fore.GREEN + Style.BRIGHT + f"=== BENCHMARK FILA DISTRIBUÍDA ({args.urls} URLs, lotes de {args.lote}) ===\n")
+    base = None
+    for nos in args.nos:
+        decorrido, processadas, concluidas, linhas = rodada(args.dsn, nos, args.urls, args.lote, args.latencia)
+        vazao = processadas / decorrido
+        base = base or vazao / nos
+        duplicadas = processadas - concluidas
+        print(f"{Fore.CYAN}{nos:>2} nós {Fore.WHITE}{vazao:8.0f} URLs/s  "
+              f"({vazao / base:.1f}x de 1 nó, eficiência {vazao / (base * nos):.0%})  "
+              f"concluídas {concluidas}/{linhas}, duplicadas {duplicadas}")
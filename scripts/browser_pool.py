@@ -0,0 +1,148 @@
+import time
+import queue
+import threading
+import functools
+from contextlib import contextmanager
+from colorama import Fore
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+from stage_metrics import medir
+
+
+@functools.lru_cache(maxsize=None)
+def chromedriver_path() -> str:
+    """Resolve the ChromeDriver binary once per process."""
+    return ChromeDriverManager().install()
+
+
+def criar_driver(headless=False):
+    options = webdriver.ChromeOptions()
+    options.add_experimental_option('excludeSwitches', ['enable-logging'])
+    if headless:
+        options.add_argument("--headless=new")
+    driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
+    driver.maximize_window()
+    return driver
+
+
+class BrowserPool:
+    """Keeps up to `size` warm Chrome sessions and lends them to worker threads.
+
+    Each session is recycled after `max_pages` page loads or as soon as it
+    raises a WebDriverException, so a crashed or leaky browser never serves
+    another URL. With `metricas`, every Chrome startup is timed.
+    """
+
+    def __init__(self, size=5, max_pages=50, headless=False, metricas=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.headless = headless
+        self.metricas = metricas
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.sessions_created = 0
+        self.sessions_recycled = 0
+        chromedriver_path()
+
+    def warm(self):
+        """Start every session up front instead of on first use."""
+        drivers = [self._acquire() for _ in range(self.size)]
+        for driver in drivers:
+            self._release(driver, usado=False)
+
+    def _new_driver(self):
+        with medir(self.metricas, 'chrome_inicio'):
+            driver = criar_driver(self.headless)
+        with self._lock:
+            self._pages[id(driver)] = 0
+            self.sessions_created += 1
+        return driver
+
+    def _acquire(self):
+        if self._closed:
+            raise RuntimeError("BrowserPool já foi encerrado.")
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._new_driver()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, driver, usado=True):
+        with self._lock:
+            if usado:
+                self._pages[id(driver)] += 1
+            esgotado = self._pages[id(driver)] >= self.max_pages
+        if esgotado or self._closed:
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+        self._slots.release()
+
+    def _discard(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            self.sessions_recycled += 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        self._slots.release()
+
+    @contextmanager
+    def session(self):
+        """Borrow a driver for one page; it goes back to the pool afterwards."""
+        driver = self._acquire()
+        try:
+            yield driver
+        except WebDriverException:
+            self._discard(driver)
+            raise
+        except BaseException:
+            self._release(driver)
+            raise
+        else:
+            self._release(driver)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                driver.quit()
+            except Exception as e:
+                print(Fore.RED + f"Erro ao encerrar navegador: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def baixar_pagina(url, pool):
+    """Returns the rendered HTML; parsing happens in the Pipeline's process pool."""
+    metricas = pool.metricas
+    with pool.session() as driver:
+        with medir(metricas, 'driver_get'):
+            driver.get(url)
+        with medir(metricas, 'espera_fixa'):
+            time.sleep(2)
+        with medir(metricas, 'scroll'):
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        with medir(metricas, 'espera_fixa'):
+            time.sleep(1)
+        with medir(metricas, 'page_source'):
+            return driver.page_source
@@ -0,0 +1,61 @@
+from colorama import Fore
+
+
+def _chunks(itens, tamanho):
+    for i in range(0, len(itens), tamanho):
+        yield itens[i:i + tamanho]
+
+
+def _desconhecidos_rpc(supabase, chunk):
+    resposta = supabase.rpc('links_desconhecidos', {'links': chunk}).execute()
+    return {item['link'] for item in resposta.data or []}
+
+
+def _conhecidos_in(supabase, chunk, pagina=1000):
+    # Keyset pagination keeps every request under PostgREST's row cap
+    conhecidos = set()
+    ultimo = None
+    while True:
+        query = supabase.table('properties').select('link').in_('link', chunk).order('link').limit(pagina)
+        if ultimo is not None:
+            query = query.gt('link', ultimo)
+        dados = query.execute().data or []
+        conhecidos.update(item['link'] for item in dados)
+        if len(dados) < pagina:
+            return conhecidos
+        ultimo = dados[-1]['link']
+
+
+def filtrar_links_novos(supabase, links, tamanho_rpc=1000, tamanho_in=50):
+    """Return the links from `links` that are not stored in `properties` yet.
+
+    The scraped set is sent to the database in chunks and only the unknown
+    links come back, so the cost follows the size of the crawl rather than
+    the size of the table. Uses the `links_desconhecidos` anti-join RPC and
+    falls back to chunked `in` queries (kept short to fit in a GET URL) when
+    the function is not installed.
+    """
+    links = sorted(set(links))
+    novos = set()
+    usar_rpc = True
+    for chunk in _chunks(links, tamanho_rpc):
+        if usar_rpc:
+            try:
+                novos |= _desconhecidos_rpc(supabase, chunk)
+                continue
+            except Exception as e:
+                print(Fore.YELLOW + f"RPC links_desconhecidos indisponível, usando consultas 'in': {e}")
+                usar_rpc = False
+        for sub in _chunks(chunk, tamanho_in):
+            novos |= set(sub) - _conhecidos_in(supabase, sub)
+    return novos
+
+
+def hashes_armazenados(supabase, links, tamanho=1000):
+    """Stored `content_hash` for each of `links` that exists in `properties` (NULL for rows never hashed)."""
+    links = sorted(set(links))
+    hashes = {}
+    for chunk in _chunks(links, tamanho):
+        resposta = supabase.rpc('property_hashes', {'links': chunk}).execute()
+        hashes.update((item['link'], item['content_hash']) for item in resposta.data or [])
+    return hashes
@@ -0,0 +1,123 @@
+import os
+import json
+import threading
+import xlsxwriter
+from colorama import Fore
+
+COLUNAS_EXCEL = ['tipo', 'valor', 'area_privativa', 'dormitorio', 'banheiro', 'vaga', 'suite',
+                 'andar', 'piscina', 'varanda', 'elevador',
+                 'rua', 'bairro', 'cidade', 'uf', 'endereco_completo', 'link']
+LARGURA_MAXIMA = 60
+
+
+class ExportadorExcel:
+    """Writes records to a styled .xlsx in a single streaming pass.
+
+    xlsxwriter's constant_memory mode flushes each row to disk as soon as
+    the next one starts, so memory stays flat however many rows are
+    written. Column widths come from the first `amostra` rows, which are
+    held back until the sample is complete.
+    """
+
+    def __init__(self, nome_arquivo, colunas=COLUNAS_EXCEL, amostra=1000):
+        self.nome_arquivo = nome_arquivo
+        self.colunas = colunas
+        self.amostra = amostra
+        self.linhas = 0
+        self._pendentes = []
+        self._wb = xlsxwriter.Workbook(nome_arquivo, {'constant_memory': True, 'nan_inf_to_errors': True,
+                                                      'strings_to_urls': False})
+        self._ws = self._wb.add_worksheet()
+        self._cabecalho = self._wb.add_format({'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#1F4E78',
+                                               'align': 'center', 'valign': 'vcenter'})
+
+    def _valores(self, registro):
+        valores = []
+        for coluna in self.colunas:
+            valor = registro.get(coluna, 0)
+            valores.append("" if valor is None else valor)
+        return valores
+
+    def _iniciar(self):
+        amostra = [self._valores(r) for r in self._pendentes]
+        for i, coluna in enumerate(self.colunas):
+            largura = max([len(coluna)] + [len(str(linha[i])) for linha in amostra])
+            self._ws.set_column(i, i, min(largura + 2, LARGURA_MAXIMA))
+        self._ws.freeze_panes(1, 0)
+        self._ws.write_row(0, 0, self.colunas, self._cabecalho)
+        self._pendentes = None
+        for valores in amostra:
+            self._escrever(valores)
+
+    def _escrever(self, valores):
+        self.linhas += 1
+        self._ws.write_row(self.linhas, 0, valores)
+
+    def adicionar(self, registro):
+        if self._pendentes is None:
+            self._escrever(self._valores(registro))
+            return
+        self._pendentes.append(registro)
+        if len(self._pendentes) >= self.amostra:
+            self._iniciar()
+
+    def fechar(self):
+        if self._pendentes is not None:
+            self._iniciar()
+        self._wb.close()
+        return self.linhas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def ler_parcial(arquivo_jsonl):
+    """Yield the records of a partial JSONL file, keeping only the last line for each link.
+
+    Two passes over the file, so only the links are held in memory.
+    """
+    ultima = {}
+    with open(arquivo_jsonl, 'r', encoding='utf-8') as f:
+        for numero, linha in enumerate(f):
+            if linha.strip():
+                ultima[json.loads(linha).get('link')] = numero
+    with open(arquivo_jsonl, 'r', encoding='utf-8') as f:
+        for numero, linha in enumerate(f):
+            if linha.strip():
+                registro = json.loads(linha)
+                if ultima.get(registro.get('link')) == numero:
+                    yield registro
+
+
+def exportar_parcial(arquivo_jsonl, nome_arquivo=None, por_job=False, remover=True):
+    """Turn a partial JSONL file into `nome_arquivo`, or one resultados_<job_id>.xlsx per job."""
+    exportadores = {}
+    try:
+        for registro in ler_parcial(arquivo_jsonl):
+            chave = registro.get('job_id') if por_job else None
+            if chave not in exportadores:
+                exportadores[chave] = ExportadorExcel(f"resultados_{chave}.xlsx" if por_job else nome_arquivo)
+            exportadores[chave].adicionar(registro)
+    finally:
+        total = sum(exportador.fechar() for exportador in exportadores.values())
+    if remover:
+        os.remove(arquivo_jsonl)
+    return [exportador.nome_arquivo for exportador in exportadores.values()], total
+
+
+def exportar_em_segundo_plano(arquivo_jsonl, nome_arquivo=None, por_job=False):
+    """Run `exportar_parcial` in a thread so the job can be finalized while the workbook is written."""
+    def tarefa():
+        try:
+            arquivos, total = exportar_parcial(arquivo_jsonl, nome_arquivo, por_job)
+            if arquivos:
+                print(Fore.GREEN + f"\nBackup de {total} imóveis salvo em {', '.join(arquivos)}")
+        except Exception as e:
+            print(Fore.RED + f"Erro ao gerar Excel: {e}")
+
+    thread = threading.Thread(target=tarefa, name="exportacao-excel")
+    thread.start()
+    return thread
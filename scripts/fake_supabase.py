@@ -0,0 +1,214 @@
+import time
+import uuid
+import threading
+
+
+class Resposta:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class Consulta:
+    """The subset of the supabase-py query builder the scrapers use, run against in-memory tables."""
+
+    def __init__(self, banco, tabela):
+        self.banco = banco
+        self.tabela = tabela
+        self.operacao = 'select'
+        self.colunas = None
+        self.valores = None
+        self.on_conflict = None
+        self.contar = False
+        self.filtros = []
+        self.ordem = None
+        self.limite = None
+
+    def select(self, colunas='*', count=None):
+        self.colunas = None if colunas.strip() == '*' else [c.strip() for c in colunas.split(',')]
+        self.contar = count is not None
+        return self
+
+    def insert(self, linhas):
+        self.operacao, self.valores = 'insert', linhas
+        return self
+
+    def upsert(self, linhas, on_conflict=None):
+        self.operacao, self.valores, self.on_conflict = 'upsert', linhas, on_conflict
+        return self
+
+    def update(self, valores):
+        self.operacao, self.valores = 'update', valores
+        return self
+
+    def delete(self):
+        self.operacao = 'delete'
+        return self
+
+    def _filtro(self, coluna, teste):
+        self.filtros.append((coluna, teste))
+        return self
+
+    def eq(self, coluna, valor):
+        return self._filtro(coluna, lambda v: v == valor)
+
+    def neq(self, coluna, valor):
+        return self._filtro(coluna, lambda v: v != valor)
+
+    def in_(self, coluna, valores):
+        valores = set(valores)
+        return self._filtro(coluna, lambda v: v in valores)
+
+    def gt(self, coluna, valor):
+        return self._filtro(coluna, lambda v: v is not None and v > valor)
+
+    def gte(self, coluna, valor):
+        return self._filtro(coluna, lambda v: v is not None and v >= valor)
+
+    def lt(self, coluna, valor):
+        return self._filtro(coluna, lambda v: v is not None and v < valor)
+
+    def lte(self, coluna, valor):
+        return self._filtro(coluna, lambda v: v is not None and v <= valor)
+
+    def order(self, coluna, desc=False):
+        self.ordem = (coluna, desc)
+        return self
+
+    def limit(self, n):
+        self.limite = n
+        return self
+
+    def _casa(self, linha):
+        return all(teste(linha.get(coluna)) for coluna, teste in self.filtros)
+
+    def execute(self):
+        self.banco.requisicoes += 1
+        if self.banco.latencia:
+            time.sleep(self.banco.latencia)
+        with self.banco.lock:
+            return getattr(self, '_' + self.operacao)()
+
+    def _select(self):
+        linhas = [linha for linha in self.banco.tabelas.get(self.tabela, {}).values() if self._casa(linha)]
+        if self.ordem:
+            coluna, desc = self.ordem
+            linhas.sort(key=lambda linha: (linha.get(coluna) is None, linha.get(coluna)), reverse=desc)
+        total = len(linhas)
+        if self.limite is not None:
+            linhas = linhas[:self.limite]
+        if self.colunas:
+            linhas = [{c: linha.get(c) for c in self.colunas} for linha in linhas]
+        else:
+            linhas = [dict(linha) for linha in linhas]
+        return Resposta(linhas, total if self.contar else None)
+
+    def _insert(self):
+        linhas = self.valores if isinstance(self.valores, list) else [self.valores]
+        return Resposta([dict(self.banco.gravar(self.tabela, linha)) for linha in linhas])
+
+    def _upsert(self):
+        linhas = self.valores if isinstance(self.valores, list) else [self.valores]
+        return Resposta([dict(self.banco.gravar(self.tabela, linha, self.on_conflict or 'id')) for linha in linhas])
+
+    def _update(self):
+        alteradas = []
+        for linha in self.banco.tabelas.get(self.tabela, {}).values():
+            if self._casa(linha):
+                linha.update(self.valores)
+                alteradas.append(dict(linha))
+        self.banco.indices.pop(self.tabela, None)
+        return Resposta(alteradas)
+
+    def _delete(self):
+        tabela = self.banco.tabelas.get(self.tabela, {})
+        removidas = [chave for chave, linha in tabela.items() if self._casa(linha)]
+        linhas = [tabela.pop(chave) for chave in removidas]
+        self.banco.indices.pop(self.tabela, None)
+        return Resposta(linhas)
+
+
+class ChamadaRpc:
+    def __init__(self, banco, nome, parametros):
+        self.banco = banco
+        self.nome = nome
+        self.parametros = parametros or {}
+
+    def execute(self):
+        self.banco.requisicoes += 1
+        if self.banco.latencia:
+            time.sleep(self.banco.latencia)
+        funcao = self.banco.funcoes.get(self.nome)
+        if funcao is None:
+            # PostgREST answers 404 for a function that is not installed; callers fall back
+            raise Exception(f"Could not find the function public.{self.nome}")
+        with self.banco.lock:
+            return Resposta(funcao(self.banco, **self.parametros))
+
+
+def _links_desconhecidos(banco, links):
+    conhecidos = banco.indice('properties', 'link')
+    return [{'link': link} for link in links if link not in conhecidos]
+
+
+def _property_hashes(banco, links):
+    conhecidos = banco.indice('properties', 'link')
+    tabela = banco.tabelas.get('properties', {})
+    return [{'link': link, 'content_hash': tabela[conhecidos[link]].get('content_hash')}
+            for link in links if link in conhecidos]
+
+
+class SupabaseEmMemoria:
+    """In-memory stand-in for the Supabase client, for offline benchmarks.
+
+    Tables are dicts of rows keyed by `id` (a uuid is assigned when a row
+    comes without one); `upsert(..., on_conflict=col)` merges on `col`.
+    The `links_desconhecidos` and `property_hashes` RPCs are implemented;
+    any other function raises like a missing one, so callers take their
+    fallback path. `latencia` (seconds) is slept per request to imitate
+    the network round trip.
+    """
+
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self.tabelas = {}
+        self.indices = {}
+        self.requisicoes = 0
+        self.lock = threading.RLock()
+        self.funcoes = {'links_desconhecidos': _links_desconhecidos, 'property_hashes': _property_hashes}
+
+    def table(self, nome):
+        return Consulta(self, nome)
+
+    def rpc(self, nome, parametros=None):
+        return ChamadaRpc(self, nome, parametros)
+
+    def indice(self, tabela, coluna):
+        """{value of `coluna`: row id}, kept up to date by `gravar` once built."""
+        por_coluna = self.indices.setdefault(tabela, {})
+        if coluna not in por_coluna:
+            por_coluna[coluna] = {linha.get(coluna): chave for chave, linha in self.tabelas.get(tabela, {}).items()}
+        return por_coluna[coluna]
+
+    def gravar(self, tabela, linha, conflito=None):
+        linhas = self.tabelas.setdefault(tabela, {})
+        existente = None
+        if conflito is not None and linha.get(conflito) is not None:
+            chave = self.indice(tabela, conflito).get(linha[conflito])
+            existente = linhas.get(chave)
+        if existente is not None:
+            existente.update(linha)
+            return existente
+        nova = dict(linha)
+        nova.setdefault('id', str(uuid.uuid4()))
+        linhas[nova['id']] = nova
+        for coluna, indice in self.indices.get(tabela, {}).items():
+            indice[nova.get(coluna)] = nova['id']
+        return nova
+
+    def linhas(self, tabela):
+        return list(self.tabelas.get(tabela, {}).values())
+
+
+def create_client(url=None, chave=None, latencia=0.0):
+    return SupabaseEmMemoria(latencia)
@@ -0,0 +1,93 @@
+import os
+import re
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+POR_PAGINA = 36        # listings per search page, as on VivaReal
+# Committed detail pages the benchmarks use when no corpus is given
+CORPUS_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_corpus")
+SUFIXO_COPIA = re.compile(r"--\d+$")
+
+
+class CorpusHandler(BaseHTTPRequestHandler):
+    """Serves saved pages: `/imovel/<nome>/` returns `<corpus>/<nome>.html`."""
+
+    corpus_dir = "."
+
+    def do_GET(self):
+        nome = self.path.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+        arquivo = os.path.join(self.corpus_dir, nome + ".html")
+        if not os.path.isfile(arquivo):
+            self.send_error(404)
+            return
+        with open(arquivo, 'rb') as f:
+            self._responder(f.read())
+
+    def _responder(self, corpo):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class VivaRealHandler(CorpusHandler):
+    """Stand-in for a VivaReal search: result pages plus the `/imovel/` detail pages.
+
+    `/imovel/<id>/` is served from `<corpus>/<nome>.html`, where `<id>` is
+    `<nome>` or `<nome>--<n>` (the same saved page under another listing
+    id, to scale a small corpus up). Any other path is the search itself:
+    `?pagina=N` lists POR_PAGINA links, with the result count in the
+    heading and a "próxima página" link like the real site.
+    """
+
+    ids = []
+    por_pagina = POR_PAGINA
+
+    def do_GET(self):
+        caminho = urlparse(self.path)
+        if '/imovel/' not in caminho.path:
+            pagina = int(parse_qs(caminho.query).get('pagina', ['1'])[0])
+            self._responder(self._listagem(pagina).encode('utf-8'))
+            return
+        nome = SUFIXO_COPIA.sub('', caminho.path.rstrip('/').rsplit('/', 1)[-1])
+        arquivo = os.path.join(self.corpus_dir, nome + ".html")
+        if not os.path.isfile(arquivo):
+            self.send_error(404)
+            return
+        with open(arquivo, 'rb') as f:
+            self._responder(f.read())
+
+    def _listagem(self, pagina):
+        inicio = (pagina - 1) * self.por_pagina
+        itens = "".join(f'<li><a href="/imovel/{i}/">{i}</a></li>' for i in self.ids[inicio:inicio + self.por_pagina])
+        ultima = inicio + self.por_pagina >= len(self.ids)
+        return (f"<html><body><h1>{len(self.ids)} imóveis à venda</h1><ul>{itens}</ul>"
+                f'<a aria-label="próxima página" aria-disabled="{str(ultima).lower()}" '
+                f'href="?pagina={pagina + 1}">Próxima</a></body></html>')
+
+
+def servir_vivareal(corpus_dir, copias=1, por_pagina=POR_PAGINA, porta=0):
+    """Start the search stand-in in a daemon thread; returns (server, search_url, number of listings)."""
+    nomes = [nome[:-5] for nome in sorted(os.listdir(corpus_dir)) if nome.endswith(".html")]
+    ids = [nome if copia == 0 else f"{nome}--{copia}" for copia in range(copias) for nome in nomes]
+    handler = type("Handler", (VivaRealHandler,), {"corpus_dir": corpus_dir, "ids": ids, "por_pagina": por_pagina})
+    server = ThreadingHTTPServer(("127.0.0.1", porta), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/venda/sp/santos/apartamento_residencial/", len(ids)
+
+
+def servir_corpus(corpus_dir, porta=0):
+    """Start a local server for `corpus_dir` in a daemon thread; returns (server, base_url)."""
+    handler = type("Handler", (CorpusHandler,), {"corpus_dir": corpus_dir})
+    server = ThreadingHTTPServer(("127.0.0.1", porta), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def urls_do_corpus(corpus_dir, base_url):
+    return [f"{base_url}/imovel/{nome[:-5]}/" for nome in sorted(os.listdir(corpus_dir)) if nome.endswith(".html")]
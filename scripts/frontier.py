@@ -0,0 +1,74 @@
+import os
+import time
+import sqlite3
+import threading
+
+PENDENTE = 'pending'
+EM_ANDAMENTO = 'in_flight'
+CONCLUIDO = 'done'
+FALHOU = 'failed'
+
+
+class Frontier:
+    """Local SQLite checkpoint of every URL in a job.
+
+    A URL goes pending -> in_flight (page downloaded) -> done (upserted in
+    Supabase) or failed. `pendentes()` returns what a resumed run still has
+    to fetch: anything not done, plus failures under `max_tentativas`.
+    """
+
+    def __init__(self, job_id, diretorio='.'):
+        self.caminho = os.path.join(diretorio, f"frontier_{job_id}.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                estado TEXT NOT NULL DEFAULT 'pending',
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                erro TEXT,
+                atualizado_em REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_estado ON urls(estado)")
+        self._conn.commit()
+
+    @staticmethod
+    def existe(job_id, diretorio='.'):
+        return os.path.isfile(os.path.join(diretorio, f"frontier_{job_id}.sqlite"))
+
+    def adicionar(self, urls):
+        agora = time.time()
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO urls (url, atualizado_em) VALUES (?, ?)",
+                                   ((url, agora) for url in urls))
+            self._conn.commit()
+
+    def marcar(self, urls, estado, erro=None):
+        """Move `urls` to `estado`; moving to in_flight counts one more attempt."""
+        incremento = 1 if estado == EM_ANDAMENTO else 0
+        agora = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE urls SET estado = ?, tentativas = tentativas + ?, erro = ?, atualizado_em = ? WHERE url = ?",
+                ((estado, incremento, erro, agora, url) for url in urls))
+            self._conn.commit()
+
+    def pendentes(self, max_tentativas=3):
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT url FROM urls WHERE estado IN (?, ?) OR (estado = ? AND tentativas < ?)",
+                (PENDENTE, EM_ANDAMENTO, FALHOU, max_tentativas)).fetchall()
+        return [url for (url,) in linhas]
+
+    def contagem(self):
+        with self._lock:
+            linhas = self._conn.execute("SELECT estado, COUNT(*) FROM urls GROUP BY estado").fetchall()
+        contagem = {PENDENTE: 0, EM_ANDAMENTO: 0, CONCLUIDO: 0, FALHOU: 0}
+        contagem.update(dict(linhas))
+        return contagem
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,180 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import zstandard
+from scraping_utils import normalize_url
+
+TTL_PADRAO = float(os.getenv('CACHE_HTML_TTL', 24 * 3600))
+RETENCAO_PADRAO = float(os.getenv('CACHE_HTML_RETENCAO', 7 * 24 * 3600))
+LIMITE_PADRAO = int(os.getenv('CACHE_HTML_LIMITE_MB', 2048)) * 1024 * 1024
+
+
+class HtmlCache:
+    """On-disk cache of raw listing HTML, keyed by normalized URL.
+
+    Pages are stored once per content hash as zstd files under
+    `objetos/<hash[:2]>/<hash>.zst`; a SQLite index maps each URL to its
+    latest hash and fetch time. `obter()` ignores entries older than `ttl`,
+    so they are fetched again; `limpar()` evicts entries older than
+    `retencao` and then the oldest ones until the compressed files fit in
+    `limite_bytes`. It runs on open and close and, during a long crawl,
+    every time `limpar_a_cada` compressed bytes (5% of the limit by
+    default) have been written. Until evicted, pages stay readable through
+    `iterar()` so they can be reparsed offline.
+    """
+
+    def __init__(self, diretorio='cache_html', ttl=TTL_PADRAO, retencao=RETENCAO_PADRAO,
+                 limite_bytes=LIMITE_PADRAO, nivel=3, limpar_a_cada=None):
+        self.diretorio = diretorio
+        self.ttl = ttl
+        self.retencao = retencao
+        self.limite_bytes = limite_bytes
+        self.limpar_a_cada = limpar_a_cada or max(limite_bytes // 20, 1)
+        self._escritos = 0
+        self.acertos = 0
+        self.faltas = 0
+        os.makedirs(os.path.join(diretorio, 'objetos'), exist_ok=True)
+        self._compressor = zstandard.ZstdCompressor(level=nivel)
+        self._descompressor = zstandard.ZstdDecompressor()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(diretorio, 'indice.sqlite'), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS paginas (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                baixado_em REAL NOT NULL
+            )""")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS objetos (
+                hash TEXT PRIMARY KEY,
+                tamanho INTEGER NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_paginas_baixado ON paginas(baixado_em)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_paginas_hash ON paginas(hash)")
+        self._conn.commit()
+        self.limpar()
+
+    def _caminho(self, hash_):
+        return os.path.join(self.diretorio, 'objetos', hash_[:2], f"{hash_}.zst")
+
+    def _ler(self, hash_):
+        with open(self._caminho(hash_), 'rb') as f:
+            return self._descompressor.decompress(f.read()).decode('utf-8')
+
+    def obter(self, url):
+        """Cached HTML for `url`, or None when missing or older than the TTL."""
+        with self._lock:
+            linha = self._conn.execute("SELECT hash, baixado_em FROM paginas WHERE url = ?",
+                                       (normalize_url(url),)).fetchone()
+        if linha is None or time.time() - linha[1] > self.ttl:
+            self.faltas += 1
+            return None
+        try:
+            html = self._ler(linha[0])
+        except (OSError, zstandard.ZstdError):
+            self.faltas += 1
+            return None
+        self.acertos += 1
+        return html
+
+    def guardar(self, url, html, baixado_em=None):
+        if not html:
+            return
+        dados = html.encode('utf-8')
+        hash_ = hashlib.sha256(dados).hexdigest()
+        url = normalize_url(url)
+        limpar = False
+        with self._lock:
+            atual = self._conn.execute("SELECT hash FROM paginas WHERE url = ?", (url,)).fetchone()
+            if atual and atual[0] == hash_:
+                return
+            if not self._conn.execute("SELECT 1 FROM objetos WHERE hash = ?", (hash_,)).fetchone():
+                caminho = self._caminho(hash_)
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                comprimido = self._compressor.compress(dados)
+                # Written under a temporary name so a crash never leaves a truncated object
+                with open(caminho + '.tmp', 'wb') as f:
+                    f.write(comprimido)
+                os.replace(caminho + '.tmp', caminho)
+                self._conn.execute("INSERT INTO objetos (hash, tamanho) VALUES (?, ?)", (hash_, len(comprimido)))
+                self._escritos += len(comprimido)
+                if self._escritos >= self.limpar_a_cada:
+                    self._escritos, limpar = 0, True
+            self._conn.execute("INSERT OR REPLACE INTO paginas (url, hash, baixado_em) VALUES (?, ?, ?)",
+                               (url, hash_, baixado_em or time.time()))
+            self._conn.commit()
+        if limpar:
+            self.limpar()
+
+    def enviar_cacheados(self, urls, enviar):
+        """Send every cached page through `enviar(url, html)`; returns the URLs still to fetch."""
+        restantes = []
+        for url in urls:
+            html = self.obter(url)
+            if html is None:
+                restantes.append(url)
+            else:
+                enviar(url, html)
+        return restantes
+
+    def iterar(self):
+        """Yield (url, html, baixado_em) for every stored page, expired or not."""
+        with self._lock:
+            linhas = self._conn.execute("SELECT url, hash, baixado_em FROM paginas ORDER BY url").fetchall()
+        for url, hash_, baixado_em in linhas:
+            try:
+                yield url, self._ler(hash_), baixado_em
+            except (OSError, zstandard.ZstdError):
+                continue
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM paginas").fetchone()[0]
+
+    def tamanho(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM objetos").fetchone()[0]
+
+    def _remover_orfaos(self):
+        orfaos = self._conn.execute(
+            "SELECT hash FROM objetos WHERE hash NOT IN (SELECT hash FROM paginas)").fetchall()
+        for (hash_,) in orfaos:
+            try:
+                os.remove(self._caminho(hash_))
+            except FileNotFoundError:
+                pass
+        self._conn.executemany("DELETE FROM objetos WHERE hash = ?", orfaos)
+
+    def limpar(self):
+        """Evict pages older than `retencao`, then the oldest ones until under the size limit."""
+        limite_idade = time.time() - self.retencao
+        with self._lock:
+            self._conn.execute("DELETE FROM paginas WHERE baixado_em < ?", (limite_idade,))
+            self._remover_orfaos()
+            excesso = self._conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM objetos").fetchone()[0] - self.limite_bytes
+            if excesso > 0:
+                antigas = []
+                for url, tamanho in self._conn.execute(
+                        "SELECT p.url, o.tamanho FROM paginas p JOIN objetos o ON o.hash = p.hash ORDER BY p.baixado_em"):
+                    antigas.append((url,))
+                    excesso -= tamanho
+                    if excesso <= 0:
+                        break
+                self._conn.executemany("DELETE FROM paginas WHERE url = ?", antigas)
+                self._remover_orfaos()
+            self._conn.commit()
+
+    def fechar(self):
+        self.limpar()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
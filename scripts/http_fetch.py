@@ -0,0 +1,144 @@
+import re
+import json
+import httpx
+from scraping_utils import montar_registro
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+NEXT_DATA_RE = re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+LD_JSON_RE = re.compile(r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', re.DOTALL)
+
+# Amenity codes used by the listing JSON, mapped to our boolean columns
+AMENIDADES = {
+    'piscina': {'POOL', 'HEATED_POOL', 'PRIVATE_POOL', 'ADULT_POOL', 'KIDS_POOL'},
+    'varanda': {'BALCONY', 'GOURMET_BALCONY', 'TERRACE'},
+    'elevador': {'ELEVATOR', 'SERVICE_ELEVATOR'},
+}
+
+
+def criar_cliente_http(max_conexoes=20, timeout=15.0):
+    """Pooled, thread-safe HTTP client shared by every worker."""
+    limites = httpx.Limits(max_connections=max_conexoes, max_keepalive_connections=max_conexoes)
+    return httpx.Client(
+        headers={'User-Agent': USER_AGENT, 'Accept-Language': 'pt-BR,pt;q=0.9'},
+        limits=limites, timeout=timeout, follow_redirects=True,
+    )
+
+
+def _primeiro(valor):
+    if isinstance(valor, list):
+        return valor[0] if valor else None
+    return valor
+
+
+def _texto(valor):
+    valor = _primeiro(valor)
+    return "0" if valor in (None, "") else str(valor)
+
+
+def _numero(valor):
+    # JSON numbers use "." as the decimal mark; to_float expects the Brazilian ","
+    return _texto(valor).replace('.', ',')
+
+
+def _buscar_listing(no):
+    """Depth-first search for the listing object inside the Next.js payload."""
+    pilha = [no]
+    while pilha:
+        atual = pilha.pop()
+        if isinstance(atual, dict):
+            if 'pricingInfos' in atual and 'address' in atual:
+                return atual
+            pilha.extend(atual.values())
+        elif isinstance(atual, list):
+            pilha.extend(atual)
+    return None
+
+
+def montar_endereco(rua, numero, bairro, cidade, uf):
+    """Rebuild the "Rua, Número - Bairro, Cidade - UF" text shown on the page."""
+    if not rua and not cidade:
+        return "0"
+    logradouro = f"{rua}, {numero}" if rua and numero else (rua or "")
+    return f"{logradouro} - {bairro or ''}, {cidade or ''} - {uf or ''}".strip()
+
+
+def dados_do_next_data(listing):
+    preco = "0"
+    for info in listing.get('pricingInfos') or []:
+        if info.get('businessType', 'SALE') == 'SALE' and info.get('price'):
+            preco = _numero(info['price'])
+            break
+    amenidades = set(listing.get('amenities') or [])
+    dados = {
+        'valor': preco,
+        'area_privativa': _numero(listing.get('usableAreas') or listing.get('totalAreas')),
+        'dormitorio': _texto(listing.get('bedrooms')),
+        'banheiro': _texto(listing.get('bathrooms')),
+        'vaga': _texto(listing.get('parkingSpaces')),
+        'suite': _texto(listing.get('suites')),
+        'andar': _texto(listing.get('floors') or listing.get('unitFloor')),
+    }
+    for campo, codigos in AMENIDADES.items():
+        dados[campo] = "1" if amenidades & codigos else "0"
+    end = listing.get('address') or {}
+    endereco = montar_endereco(end.get('street'), end.get('streetNumber'), end.get('neighborhood'),
+                               end.get('city'), end.get('stateAcronym'))
+    return dados, endereco
+
+
+def dados_do_ld_json(bloco):
+    oferta = _primeiro(bloco.get('offers')) or {}
+    area = bloco.get('floorSize') or {}
+    dados = {
+        'valor': _numero(oferta.get('price')),
+        'area_privativa': _numero(area.get('value') if isinstance(area, dict) else area),
+        'dormitorio': _texto(bloco.get('numberOfBedrooms') or bloco.get('numberOfRooms')),
+        'banheiro': _texto(bloco.get('numberOfBathroomsTotal')),
+        'vaga': "0", 'suite': "0", 'andar': _texto(bloco.get('floorLevel')),
+    }
+    nomes = " ".join(str(a.get('name', '')) for a in bloco.get('amenityFeature') or [] if isinstance(a, dict)).lower()
+    dados['piscina'] = "1" if "piscina" in nomes else "0"
+    dados['varanda'] = "1" if "varanda" in nomes else "0"
+    dados['elevador'] = "1" if "elevador" in nomes else "0"
+    end = bloco.get('address') or {}
+    endereco = montar_endereco(end.get('streetAddress'), None, end.get('addressNeighborhood'),
+                               end.get('addressLocality'), end.get('addressRegion'))
+    return dados, endereco
+
+
+def extrair_bruto_de_json(html):
+    """Raw (dados, endereco) strings from the embedded page JSON, or None when it has no listing."""
+    m = NEXT_DATA_RE.search(html)
+    if m:
+        try:
+            listing = _buscar_listing(json.loads(m.group(1)))
+        except ValueError:
+            listing = None
+        if listing:
+            return dados_do_next_data(listing)
+    for bloco_bruto in LD_JSON_RE.findall(html):
+        try:
+            blocos = json.loads(bloco_bruto)
+        except ValueError:
+            continue
+        for bloco in blocos if isinstance(blocos, list) else [blocos]:
+            if isinstance(bloco, dict) and 'offers' in bloco and 'address' in bloco:
+                return dados_do_ld_json(bloco)
+    return None
+
+
+def extrair_de_json(html, url):
+    """Build the `extrair_informacoes` record from the embedded page JSON.
+
+    Returns None when the page carries no usable listing JSON, so the caller
+    can fall back to the Selenium path.
+    """
+    bruto = extrair_bruto_de_json(html)
+    return montar_registro(url, *bruto) if bruto else None
+
+
+def extrair_informacoes_http(url, cliente):
+    resposta = cliente.get(url)
+    resposta.raise_for_status()
+    return extrair_de_json(resposta.text, url)
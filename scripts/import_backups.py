@@ -0,0 +1,150 @@
+import os
+import re
+import glob
+import time
+import argparse
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from colorama import init, Fore, Style
+from dotenv import load_dotenv
+import parquet_store
+from batch_normalize import numero_br
+
+# ====== CONFIGURAÇÃO ======
+init(autoreset=True)
+load_dotenv()
+
+LOTE_PADRAO = 5000
+PADRAO_ARQUIVOS = "resultados_*.xlsx"
+
+# Column names of the spreadsheets written by teste.py, mapped onto the current ones
+COLUNAS_ANTIGAS = {
+    'preco': 'valor', 'metragem': 'area_privativa', 'quartos': 'dormitorio', 'banheiros': 'banheiro',
+    'vagas': 'vaga', 'suítes': 'suite', 'suites': 'suite', 'estado': 'uf',
+}
+NUMERICAS = ['valor', 'area_privativa']
+INTEIRAS = ['dormitorio', 'banheiro', 'vaga', 'suite']
+BOOLEANAS = ['piscina', 'varanda', 'elevador']
+TEXTOS = ['tipo', 'andar', 'rua', 'bairro', 'cidade', 'uf', 'endereco_completo', 'link']
+PADRAO_JOB = re.compile(r"resultados_(?:manual_)?([0-9a-fA-F-]{36})")
+
+
+def ler_backup(caminho):
+    """Read one spreadsheet and return it in the current schema (both column layouts are accepted)."""
+    df = pd.read_excel(caminho, dtype=object).rename(columns=COLUNAS_ANTIGAS)
+    df = df.reindex(columns=NUMERICAS + INTEIRAS + BOOLEANAS + TEXTOS)
+
+    for coluna in NUMERICAS:
+        df[coluna] = numero_br(df[coluna])
+    for coluna in INTEIRAS:
+        df[coluna] = numero_br(df[coluna]).round().astype('Int64')
+    for coluna in BOOLEANAS:
+        # True/False in the current files, "1"/"0" in the old ones
+        df[coluna] = df[coluna].astype(str).str.strip().str.lower().isin(['true', '1', 'sim']).astype(bool)
+    for coluna in TEXTOS:
+        texto = df[coluna].astype('string').str.strip()
+        # The scrapers write "0" where a field was not found
+        df[coluna] = texto.mask(texto.isin(['', '0', 'nan']))
+
+    # Canonical link, same as normalize_url: no query string or fragment
+    df['link'] = df['link'].str.replace(r'[?#].*$', '', regex=True)
+    df = df[df['link'].notna()]
+
+    job = PADRAO_JOB.search(os.path.basename(caminho))
+    df['job_id'] = job.group(1) if job else None
+    # The file time stands in for the job date, which the spreadsheets do not hold
+    df['data'] = pd.Timestamp(os.path.getmtime(caminho), unit='s', tz='UTC')
+    return df
+
+
+def ler_backups(arquivos, processos=None):
+    """Read every file in parallel; returns (DataFrame deduplicated by link, {file: error})."""
+    erros = {}
+    partes = []
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = {arquivo: executor.submit(ler_backup, arquivo) for arquivo in arquivos}
+        for arquivo, futuro in futuros.items():
+            try:
+                partes.append(futuro.result())
+            except Exception as e:
+                erros[arquivo] = e
+    if not partes:
+        return pd.DataFrame(columns=NUMERICAS + INTEIRAS + BOOLEANAS + TEXTOS + ['job_id', 'data']), erros
+    df = pd.concat(partes, ignore_index=True)
+    # The most recent file wins when a listing appears in several backups
+    df = df.sort_values('data', kind='stable').drop_duplicates('link', keep='last')
+    return df.reset_index(drop=True), erros
+
+
+def para_properties_old(df):
+    """Rows in the `properties_old` layout, ready to be sent as JSON."""
+    saida = pd.DataFrame({
+        'tipo': df['tipo'], 'endereco': df['endereco_completo'], 'bairro': df['bairro'],
+        'cidade': df['cidade'], 'uf': df['uf'], 'area_privativa': df['area_privativa'], 'valor': df['valor'],
+        'valor_unitario': (df['valor'] / df['area_privativa'].where(df['area_privativa'] > 0)).round(2),
+        'dormitorio': df['dormitorio'], 'suite': df['suite'], 'banheiro': df['banheiro'], 'vaga': df['vaga'],
+        'piscina': df['piscina'], 'varanda': df['varanda'], 'elevador': df['elevador'],
+        'link': df['link'], 'data': df['data'].dt.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    })
+    saida = saida.astype(object)
+    return saida.where(saida.notna(), None).to_dict('records')
+
+
+def carregar_no_banco(supabase, df, lote=LOTE_PADRAO):
+    """Send the rows to `import_properties_old` in batches; returns how many were new."""
+    registros = para_properties_old(df)
+    inseridos = 0
+    for i in range(0, len(registros), lote):
+        inseridos += supabase.rpc('import_properties_old', {'registros': registros[i:i + lote]}).execute().data or 0
+    return inseridos
+
+
+def carregar_no_parquet(df, diretorio=parquet_store.DIRETORIO_PADRAO, lote=LOTE_PADRAO * 10):
+    for i in range(0, len(df), lote):
+        parquet_store.anexar(parquet_store.de_dataframe(df.iloc[i:i + lote]), diretorio)
+    return len(df)
+
+
+# ====== MAIN ======
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa as planilhas resultados_*.xlsx antigas para properties_old ou para o dataset Parquet.")
+    parser.add_argument("arquivos", nargs="*", help=f"Planilhas a importar (padrão: {PADRAO_ARQUIVOS} no diretório atual)")
+    parser.add_argument("--destino", choices=["banco", "parquet"], default="parquet")
+    parser.add_argument("--processos", type=int, default=None, help="Processos de leitura (padrão: um por núcleo)")
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO, help="Linhas por chamada ao banco")
+    args = parser.parse_args()
+
+    arquivos = args.arquivos or sorted(glob.glob(PADRAO_ARQUIVOS))
+    if not arquivos:
+        print(Fore.YELLOW + "Nenhuma planilha encontrada.")
+        exit(0)
+    if args.destino == "parquet" and parquet_store.pa is None:
+        print(Fore.RED + "Instale o pacote pyarrow para importar para o dataset Parquet.")
+        exit(1)
+
+    supabase = None
+    if args.destino == "banco":
+        from supabase import create_client
+        SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
+        # import_properties_old only accepts the service_role key
+        SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            print(Fore.RED + "ERRO: defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY para importar no banco.")
+            exit(1)
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    print(Fore.GREEN + Style.BRIGHT + f"=== IMPORTAÇÃO DE PLANILHAS ({len(arquivos)} arquivos) ===\n")
+    inicio = time.perf_counter()
+    df, erros = ler_backups(arquivos, args.processos)
+    leitura = time.perf_counter() - inicio
+    for arquivo, erro in erros.items():
+        print(Fore.RED + f"Erro ao ler {arquivo}: {erro}")
+    print(Fore.WHITE + f"{len(df)} imóveis únicos lidos em {leitura:.1f} s.")
+
+    if args.destino == "banco":
+        gravados = carregar_no_banco(supabase, df, args.lote)
+        print(Fore.WHITE + f"{gravados} novos em properties_old ({len(df) - gravados} já existiam).")
+    else:
+        gravados = carregar_no_parquet(df)
+        print(Fore.WHITE + f"{gravados} linhas anexadas em {parquet_store.DIRETORIO_PADRAO}/.")
+    print(Fore.GREEN + Style.BRIGHT + f"\n✓ Importação concluída em {time.perf_counter() - inicio:.1f} s.")
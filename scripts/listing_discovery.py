@@ -0,0 +1,120 @@
+import re
+import json
+import math
+import asyncio
+from html import unescape
+from urllib.parse import urljoin, urlparse, parse_qsl, urlencode, urlunparse
+from colorama import Fore
+from async_engine import AsyncCrawler
+from http_fetch import NEXT_DATA_RE
+
+LINK_IMOVEL_RE = re.compile(r'href="([^"]*/imovel/[^"]*)"')
+TOTAL_TEXTO_RE = re.compile(r'([\d.]+)\s+(?:im[óo]veis|resultados)', re.IGNORECASE)
+CHAVES_TOTAL = ('totalCount', 'totalResults')
+MAX_PAGINAS = 100      # VivaReal stops paginating a search after about 100 pages
+
+
+def url_da_pagina(url_listagem, pagina):
+    """Search URL for result page `pagina`, keeping every other filter in the query string."""
+    partes = urlparse(url_listagem)
+    parametros = [(k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True) if k != 'pagina']
+    if pagina > 1:
+        parametros.append(('pagina', str(pagina)))
+    return urlunparse(partes._replace(query=urlencode(parametros)))
+
+
+def links_da_pagina(html, url_base):
+    return {urljoin(url_base, unescape(href)) for href in LINK_IMOVEL_RE.findall(html)}
+
+
+def total_de_resultados(html):
+    """Result count of the search, from the Next.js payload or the page heading; None if absent."""
+    m = NEXT_DATA_RE.search(html)
+    if m:
+        try:
+            pilha = [json.loads(m.group(1))]
+        except ValueError:
+            pilha = []
+        while pilha:
+            atual = pilha.pop()
+            if isinstance(atual, dict):
+                for chave in CHAVES_TOTAL:
+                    if isinstance(atual.get(chave), int):
+                        return atual[chave]
+                pilha.extend(atual.values())
+            elif isinstance(atual, list):
+                pilha.extend(atual)
+    m = TOTAL_TEXTO_RE.search(html)
+    return int(m.group(1).replace('.', '')) if m else None
+
+
+async def _descobrir(url_listagem, crawler, janela, max_paginas):
+    paginas = {}
+    await crawler.crawl([url_listagem], lambda url, html: paginas.__setitem__(url, html))
+    primeira = paginas.get(url_listagem)
+    if not primeira:
+        raise RuntimeError(f"Não foi possível baixar a primeira página da listagem: {url_listagem}")
+
+    links = links_da_pagina(primeira, url_listagem)
+    total = total_de_resultados(primeira)
+    if total is not None and links:
+        ultima = min(math.ceil(total / len(links)), max_paginas)
+        print(Fore.WHITE + f"Busca com {total} resultados: {ultima} páginas de {len(links)} anúncios.")
+    else:
+        ultima = max_paginas
+        print(Fore.YELLOW + "Total de resultados não encontrado; paginando até as páginas pararem de trazer links novos.")
+
+    # Pages are fetched in concurrent waves so discovery can stop as soon as a whole wave adds nothing
+    proxima = 2
+    while proxima <= ultima:
+        onda = [url_da_pagina(url_listagem, n) for n in range(proxima, min(proxima + janela, ultima + 1))]
+        proxima += len(onda)
+        resultados = {}
+        await crawler.crawl(onda, lambda url, html: resultados.__setitem__(url, html))
+        novos = set()
+        for url in onda:
+            if resultados.get(url):
+                novos |= links_da_pagina(resultados[url], url) - links
+        print(f"{Fore.CYAN}Páginas {proxima - len(onda)}-{proxima - 1}: {Fore.WHITE}{len(novos)} links novos.")
+        if not novos:
+            break
+        links |= novos
+    return links
+
+
+def descobrir_links(url_listagem, janela=10, max_paginas=MAX_PAGINAS, **kwargs):
+    """Collect every `/imovel/` link of a search over plain HTTP.
+
+    Page 1 gives the result count, from which the page-N URLs are built
+    and fetched `janela` at a time through the AsyncCrawler (`kwargs` go to
+    it, e.g. `taxa_por_host`). Raises RuntimeError if page 1 cannot be
+    fetched, so the caller can fall back to the browser.
+    """
+    kwargs.setdefault('max_em_voo', janela)
+    crawler = AsyncCrawler(extrair=None, **kwargs)
+    return list(asyncio.run(_descobrir(url_listagem, crawler, janela, max_paginas)))
+
+
+async def _descobrir_todas(urls, crawler, janela, max_paginas, simultaneas):
+    limite = asyncio.Semaphore(simultaneas)
+
+    async def uma(url):
+        async with limite:
+            try:
+                return await _descobrir(url, crawler, janela, max_paginas)
+            except Exception as e:
+                return e
+
+    return dict(zip(urls, await asyncio.gather(*(uma(url) for url in urls))))
+
+
+def descobrir_buscas(urls, janela=10, max_paginas=MAX_PAGINAS, max_em_voo=100, **kwargs):
+    """Run `descobrir_links` for several searches at once under one shared budget.
+
+    All searches go through the same AsyncCrawler, so they share its
+    per-host token buckets, and at most `max_em_voo` pages are in flight
+    in total. Returns {url: set of links, or the exception that search raised}.
+    """
+    crawler = AsyncCrawler(extrair=None, max_em_voo=janela, **kwargs)
+    simultaneas = max(1, max_em_voo // janela)
+    return asyncio.run(_descobrir_todas(list(urls), crawler, janela, max_paginas, simultaneas))
@@ -0,0 +1,75 @@
+import os
+import time
+import argparse
+from colorama import init, Fore, Style
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+# ====== CONFIGURAÇÃO ======
+init(autoreset=True)
+load_dotenv()
+
+LINHAS_PADRAO = 20
+
+
+def recalcular(supabase, lote=10000):
+    """Rebuild market_aggregates from scratch; returns how many active properties were aggregated."""
+    return supabase.rpc('rebuild_market_aggregates', {'p_lote': lote}).execute().data or 0
+
+
+def resumo(supabase, cidade=None, uf=None, limite=LINHAS_PADRAO):
+    """The largest groups of `market_summary`, optionally restricted to a city or state."""
+    query = supabase.table('market_summary').select('*')
+    if cidade:
+        query = query.eq('cidade', cidade)
+    if uf:
+        query = query.eq('uf', uf)
+    return query.order('total', desc=True).limit(limite).execute().data or []
+
+
+def _moeda(valor):
+    if valor is None:
+        return "-"
+    return "R$ " + f"{float(valor):,.0f}".replace(",", ".")
+
+
+def imprimir(linhas):
+    print(Fore.CYAN + f"{'cidade':<20} {'bairro':<24} {'tipo':<18} {'total':>6} "
+          f"{'mediana':>16} {'p25-p75 m²':>22}")
+    for linha in linhas:
+        faixa_m2 = f"{_moeda(linha['valor_m2_p25'])}-{_moeda(linha['valor_m2_p75'])}"
+        print(f"{(linha['cidade'] or '-')[:20]:<20} {(linha['bairro'] or '-')[:24]:<24} "
+              f"{(linha['tipo'] or '-')[:18]:<18} {linha['total']:>6} "
+              f"{_moeda(linha['valor_mediana']):>16} {faixa_m2:>22}")
+
+
+# ====== MAIN ======
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mostra (ou recalcula) os agregados de mercado por cidade/bairro/tipo.")
+    parser.add_argument("--recalcular", action="store_true", help="Recalcula tudo a partir de properties antes de mostrar")
+    parser.add_argument("--lote", type=int, default=10000, help="Imóveis lidos por lote no recálculo")
+    parser.add_argument("--cidade")
+    parser.add_argument("--uf")
+    parser.add_argument("--linhas", type=int, default=LINHAS_PADRAO)
+    args = parser.parse_args()
+
+    SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
+    # rebuild_market_aggregates only accepts the service_role key; reading works with the anon key
+    SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY' if args.recalcular else 'VITE_SUPABASE_ANON_KEY')
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        chave = 'SUPABASE_SERVICE_ROLE_KEY' if args.recalcular else 'VITE_SUPABASE_ANON_KEY'
+        print(Fore.RED + f"ERRO: defina VITE_SUPABASE_URL e {chave}.")
+        exit(1)
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    if args.recalcular:
+        inicio = time.perf_counter()
+        total = recalcular(supabase, args.lote)
+        print(Fore.GREEN + Style.BRIGHT + f"✓ Agregados recalculados: {total} imóveis ativos "
+              f"({time.perf_counter() - inicio:.1f} s)\n")
+
+    linhas = resumo(supabase, args.cidade, args.uf, args.linhas)
+    if not linhas:
+        print(Fore.YELLOW + "Nenhum agregado encontrado.")
+    else:
+        imprimir(linhas)
@@ -0,0 +1,219 @@
+import os
+import time
+import argparse
+import datetime
+import pandas as pd
+from decimal import Decimal
+from colorama import init, Fore, Style
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DIRETORIO_PADRAO = os.getenv('PARQUET_DIR', 'dados_parquet')
+LINHAS_POR_LOTE = 50_000
+PARTICOES = ['uf', 'cidade', 'data']
+
+# Same types as the `properties` columns; `data` is the date of the job that collected the row
+COLUNAS = [
+    ('job_id', 'texto'), ('link', 'texto'), ('tipo', 'texto'),
+    ('valor', 'decimal_12_2'), ('area_privativa', 'decimal_10_2'),
+    ('dormitorio', 'inteiro'), ('banheiro', 'inteiro'), ('vaga', 'inteiro'), ('suite', 'inteiro'),
+    ('andar', 'texto'), ('piscina', 'booleano'), ('varanda', 'booleano'), ('elevador', 'booleano'),
+    ('rua', 'texto'), ('bairro', 'texto'), ('cidade', 'texto'), ('uf', 'texto'),
+    ('endereco_completo', 'texto'), ('content_hash', 'texto'), ('data', 'data'),
+]
+
+
+def _tipo(nome):
+    return {
+        'texto': pa.string(), 'inteiro': pa.int32(), 'booleano': pa.bool_(), 'data': pa.date32(),
+        'decimal_12_2': pa.decimal128(12, 2), 'decimal_10_2': pa.decimal128(10, 2),
+    }[nome]
+
+
+def schema():
+    return pa.schema([(coluna, _tipo(tipo)) for coluna, tipo in COLUNAS])
+
+
+def _converter(valor, tipo):
+    if valor is None or valor == '':
+        return None
+    try:
+        if tipo.startswith('decimal'):
+            return Decimal(str(round(float(valor), 2)))
+        if tipo == 'inteiro':
+            return int(valor)
+        if tipo == 'booleano':
+            return bool(valor)
+        if tipo == 'data':
+            return valor if isinstance(valor, datetime.date) else datetime.date.fromisoformat(str(valor)[:10])
+    except (TypeError, ValueError, ArithmeticError):
+        return None
+    return str(valor)
+
+
+def para_tabela(registros, data=None):
+    """Build a typed Arrow table from scraper records; rows without `data` get `data` (default today)."""
+    data = data or datetime.date.today()
+    colunas = {coluna: [] for coluna, _ in COLUNAS}
+    for registro in registros:
+        for coluna, tipo in COLUNAS:
+            valor = registro.get(coluna)
+            if coluna == 'data' and valor is None:
+                valor = data
+            colunas[coluna].append(_converter(valor, tipo))
+    return pa.table(colunas, schema=schema())
+
+
+def de_dataframe(df):
+    """Typed Arrow table from a DataFrame already holding the dataset columns (missing ones become null).
+
+    The vectorized counterpart of `para_tabela`, for bulk loads.
+    """
+    colunas = {}
+    for coluna, tipo in COLUNAS:
+        serie = df[coluna] if coluna in df else pd.Series([None] * len(df), dtype=object)
+        if tipo.startswith('decimal'):
+            arr = pa.array(pd.to_numeric(serie, errors='coerce').round(2), type=pa.float64(), from_pandas=True)
+            arr = arr.cast(_tipo(tipo), safe=False)
+        elif tipo == 'data':
+            arr = pa.array(pd.to_datetime(serie, errors='coerce').dt.date, type=pa.date32(), from_pandas=True)
+        elif tipo == 'texto':
+            arr = pa.array(serie.astype(object).where(serie.notna(), None).map(lambda v: v if v is None else str(v)),
+                           type=pa.string())
+        else:
+            arr = pa.array(serie.astype(object).where(serie.notna(), None), type=_tipo(tipo), from_pandas=True)
+        colunas[coluna] = arr
+    return pa.table(colunas, schema=schema())
+
+
+def _particionamento():
+    return ds.partitioning(pa.schema([(coluna, schema().field(coluna).type) for coluna in PARTICOES]), flavor='hive')
+
+
+def anexar(tabela, diretorio=DIRETORIO_PADRAO):
+    """Append `tabela` to the dataset, one new file per uf/cidade/data partition it touches."""
+    # The timestamp keeps files from separate runs (or processes) from overwriting each other
+    prefixo = f"parte-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{time.monotonic_ns()}"
+    ds.write_dataset(tabela, diretorio, format='parquet', partitioning=_particionamento(),
+                     basename_template=prefixo + '-{i}.parquet', existing_data_behavior='overwrite_or_ignore',
+                     file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'))
+
+
+class EscritorParquet:
+    """Buffers records and appends them to the dataset every `lote` rows.
+
+    The scrapers feed it from `UpsertWriter(ao_concluir_lote=...)` with the
+    batches that reached the database, and close it when the job is
+    finalized. Each record is appended once, when it is stored, so a resumed
+    job or a failed Excel export never appends it again.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO, lote=LINHAS_POR_LOTE, data=None):
+        self.diretorio = diretorio
+        self.lote = lote
+        self.data = data
+        self.linhas = 0
+        self._pendentes = []
+
+    def adicionar(self, registro):
+        self._pendentes.append(registro)
+        if len(self._pendentes) >= self.lote:
+            self._descarregar()
+
+    def adicionar_lote(self, registros):
+        for registro in registros:
+            self.adicionar(registro)
+
+    def _descarregar(self):
+        if self._pendentes:
+            anexar(para_tabela(self._pendentes, self.data), self.diretorio)
+            self.linhas += len(self._pendentes)
+            self._pendentes = []
+
+    def fechar(self):
+        self._descarregar()
+        return self.linhas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def escritor_do_job(diretorio=DIRETORIO_PADRAO):
+    """EscritorParquet for one job, or None (with a warning) when pyarrow is not installed."""
+    if pa is None:
+        print(Fore.YELLOW + "pyarrow não instalado: dataset Parquet não será atualizado.")
+        return None
+    return EscritorParquet(diretorio)
+
+
+def finalizar_escritor(escritor):
+    """Flush a job's writer when the job ends; an error is reported without failing the job."""
+    if escritor is None:
+        return 0
+    try:
+        linhas = escritor.fechar()
+    except Exception as e:
+        print(Fore.RED + f"Erro ao gravar o dataset Parquet: {e}")
+        return 0
+    if linhas:
+        print(Fore.GREEN + f"{linhas} imóveis anexados ao dataset Parquet em {escritor.diretorio}/")
+    return linhas
+
+
+def abrir(diretorio=DIRETORIO_PADRAO):
+    """The whole dataset as a pyarrow Dataset, with uf/cidade/data read from the directory names."""
+    return ds.dataset(diretorio, format='parquet', partitioning=_particionamento())
+
+
+def compactar(diretorio=DIRETORIO_PADRAO, minimo=2):
+    """Merge the files of every partition holding at least `minimo` of them into a single file.
+
+    The merged file is written under a temporary name and renamed before the
+    originals are deleted, so an interrupted run leaves duplicate rows at
+    worst, never missing ones.
+    """
+    particoes = arquivos = 0
+    for pasta, _, nomes in os.walk(diretorio):
+        partes = sorted(os.path.join(pasta, nome) for nome in nomes if nome.endswith('.parquet'))
+        if len(partes) < minimo:
+            continue
+        # Partition values live in the path, so the files only hold the other columns
+        tabela = pa.concat_tables([pq.read_table(parte) for parte in partes], promote_options='default')
+        destino = os.path.join(pasta, f"compactado-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}.parquet")
+        pq.write_table(tabela, destino + '.tmp', compression='zstd')
+        os.replace(destino + '.tmp', destino)
+        for parte in partes:
+            os.remove(parte)
+        particoes += 1
+        arquivos += len(partes)
+    return particoes, arquivos
+
+
+# ====== MAIN ======
+if __name__ == "__main__":
+    init(autoreset=True)
+    parser = argparse.ArgumentParser(description="Manutenção do dataset Parquet particionado por uf/cidade/data.")
+    parser.add_argument("comando", choices=["compactar"])
+    parser.add_argument("--diretorio", default=DIRETORIO_PADRAO)
+    parser.add_argument("--minimo", type=int, default=2, help="Compacta partições com pelo menos este número de arquivos")
+    args = parser.parse_args()
+
+    if pa is None:
+        print(Fore.RED + "Instale o pacote pyarrow para usar o dataset Parquet.")
+        exit(1)
+    if not os.path.isdir(args.diretorio):
+        print(Fore.RED + f"Diretório {args.diretorio} não encontrado.")
+        exit(1)
+
+    inicio = time.perf_counter()
+    particoes, arquivos = compactar(args.diretorio, args.minimo)
+    print(Fore.GREEN + Style.BRIGHT + f"✓ {arquivos} arquivos unidos em {particoes} partições "
+          f"({time.perf_counter() - inicio:.1f} s)")
@@ -0,0 +1,155 @@
+import os
+from bs4 import BeautifulSoup
+from colorama import Fore
+
+# Price block and amenities list of a detail page; the field scan is limited to them
+ESCOPO_TESTIDS = ('price-info', 'price-info-value', 'amenities-list', 'listing-features')
+ESCOPO_CLASSES = ('price-info', 'amenities-list')
+_CLASSES_ESCOPO = frozenset(ESCOPO_CLASSES)
+# Which of the two containers each marker belongs to
+GRUPOS_ESCOPO = {'price-info': 'preco', 'price-info-value': 'preco',
+                 'amenities-list': 'comodidades', 'listing-features': 'comodidades'}
+SELETOR_ESCOPO = ", ".join([f'[data-testid="{t}"]' for t in ESCOPO_TESTIDS] + [f'.{c}' for c in ESCOPO_CLASSES])
+
+# Selected with the PARSER_HTML env var; unavailable backends fall back to bs4
+BACKEND_PADRAO = os.getenv('PARSER_HTML', 'lxml')
+
+
+def _juntar(partes):
+    """Join text nodes the way BeautifulSoup's get_text(" ", strip=True) does."""
+    return " ".join(p for p in (parte.strip() for parte in partes) if p)
+
+
+def _no_escopo(tag):
+    return tag.get('data-testid') in ESCOPO_TESTIDS or not _CLASSES_ESCOPO.isdisjoint(tag.get('class') or ())
+
+
+def _grupo(testid, classes):
+    if testid in ESCOPO_TESTIDS:
+        return GRUPOS_ESCOPO[testid]
+    return next(GRUPOS_ESCOPO[c] for c in classes if c in _CLASSES_ESCOPO)
+
+
+class DocumentoBS:
+    """Pure-Python fallback, always available."""
+
+    nome = 'bs4'
+
+    def __init__(self, html):
+        self.soup = BeautifulSoup(html, "html.parser")
+
+    def texto(self):
+        return self.soup.get_text(" ", strip=True)
+
+    def textos_escopo(self):
+        # A predicate walk is much cheaper than soupsieve CSS selectors here
+        textos, vistos = [], set()
+        for tag in self.soup.find_all(_no_escopo):
+            vistos.add(id(tag))
+            if any(id(pai) in vistos for pai in tag.parents):
+                continue
+            textos.append((_grupo(tag.get('data-testid'), tag.get('class') or ()), tag.get_text(" ", strip=True)))
+        return textos
+
+    def primeiro_texto(self, seletor):
+        tag = self.soup.select_one(seletor)
+        return tag.get_text(" ", strip=True) if tag is not None else None
+
+
+class DocumentoLxml:
+    nome = 'lxml'
+    _seletores = {}
+
+    def __init__(self, html):
+        if isinstance(html, str) and html.lstrip().startswith('<?xml'):
+            html = html.encode('utf-8')
+        self.raiz = lxml.html.fromstring(html)
+        etree.strip_elements(self.raiz, 'script', 'style', etree.Comment, with_tail=False)
+
+    @classmethod
+    def _css(cls, seletor):
+        if seletor not in cls._seletores:
+            cls._seletores[seletor] = CSSSelector(seletor)
+        return cls._seletores[seletor]
+
+    def texto(self):
+        return _juntar(self.raiz.itertext())
+
+    def textos_escopo(self):
+        textos, vistos = [], set()
+        for el in self._css(SELETOR_ESCOPO)(self.raiz):
+            vistos.add(el)
+            if any(pai in vistos for pai in el.iterancestors()):
+                continue
+            textos.append((_grupo(el.get('data-testid'), (el.get('class') or '').split()), _juntar(el.itertext())))
+        return textos
+
+    def primeiro_texto(self, seletor):
+        encontrados = self._css(seletor)(self.raiz)
+        return _juntar(encontrados[0].itertext()) if encontrados else None
+
+
+class DocumentoSelectolax:
+    nome = 'selectolax'
+
+    def __init__(self, html):
+        self.arvore = LexborHTMLParser(html)
+        self.arvore.strip_tags(['script', 'style'])
+
+    @staticmethod
+    def _texto_no(no):
+        # "\x1f" keeps text-node boundaries so empty nodes can be dropped like bs4 does
+        return _juntar(no.text(separator="\x1f").split("\x1f"))
+
+    def texto(self):
+        return self._texto_no(self.arvore.root)
+
+    def textos_escopo(self):
+        textos, vistos = [], set()
+        for no in self.arvore.css(SELETOR_ESCOPO):
+            vistos.add(no.mem_id)
+            pai = no.parent
+            while pai is not None and pai.mem_id not in vistos:
+                pai = pai.parent
+            if pai is not None:
+                continue
+            atributos = no.attributes
+            textos.append((_grupo(atributos.get('data-testid'), (atributos.get('class') or '').split()),
+                           self._texto_no(no)))
+        return textos
+
+    def primeiro_texto(self, seletor):
+        no = self.arvore.css_first(seletor)
+        return self._texto_no(no) if no is not None else None
+
+
+BACKENDS = {'bs4': DocumentoBS}
+
+try:
+    import lxml.html
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+    BACKENDS['lxml'] = DocumentoLxml
+except ImportError:
+    pass
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    BACKENDS['selectolax'] = DocumentoSelectolax
+except ImportError:
+    pass
+
+
+_avisados = set()
+
+
+def parse_html(html, backend=None):
+    """Parse a page with the configured backend, falling back to bs4."""
+    nome = backend or BACKEND_PADRAO
+    classe = BACKENDS.get(nome)
+    if classe is None:
+        if nome not in _avisados:
+            _avisados.add(nome)
+            print(Fore.YELLOW + f"Parser '{nome}' indisponível, usando bs4.")
+        classe = DocumentoBS
+    return classe(html)
@@ -0,0 +1,229 @@
+import os
+import time
+import queue
+import threading
+import concurrent.futures
+from colorama import Fore
+from http_fetch import extrair_bruto_de_json
+from parsers import parse_html
+from scraping_utils import extrair_valores, texto_do_anuncio, get_address_from_soup, montar_registro
+from stage_metrics import medir
+
+_FIM = object()
+# Returned by the parse stage for HTTP pages without embedded JSON (a string, so it survives pickling)
+PRECISA_NAVEGADOR = 'precisa_navegador'
+
+
+def extrair_pagina(url, html, so_json=False):
+    """Raw (url, dados_brutos, endereco) of a page, before any type conversion.
+
+    With `so_json` the page came over plain HTTP, whose DOM is not rendered:
+    only its embedded JSON is trusted and None is returned without it.
+    """
+    bruto = extrair_bruto_de_json(html)
+    if bruto is None:
+        if so_json:
+            return None
+        doc = parse_html(html)
+        bruto = extrair_valores(texto_do_anuncio(doc)), get_address_from_soup(doc)
+    return (url,) + tuple(bruto)
+
+
+def parsear_pagina(url, html, so_json=False):
+    """Turn raw HTML into a property record (or PRECISA_NAVEGADOR); runs inside the parse process pool."""
+    bruto = extrair_pagina(url, html, so_json)
+    return montar_registro(*bruto) if bruto is not None else PRECISA_NAVEGADOR
+
+
+def _parsear_medindo(url, html, so_json=False):
+    # Timed inside the worker process, so the time spent waiting for a free process is not counted
+    inicio = time.perf_counter()
+    return parsear_pagina(url, html, so_json), time.perf_counter() - inicio
+
+
+class ContadorEstagio:
+    """Throughput and queue-depth counters for one pipeline stage."""
+
+    def __init__(self, nome, fila=None):
+        self.nome = nome
+        self.fila = fila
+        self.ok = 0
+        self.erros = 0
+        self.pico_fila = 0
+        self.inicio = time.monotonic()
+        self._lock = threading.Lock()
+
+    def registrar(self, sucesso=True):
+        with self._lock:
+            if sucesso:
+                self.ok += 1
+            else:
+                self.erros += 1
+            if self.fila is not None:
+                self.pico_fila = max(self.pico_fila, self.fila.qsize())
+
+    def vazao(self):
+        decorrido = time.monotonic() - self.inicio
+        return (self.ok + self.erros) / decorrido if decorrido else 0.0
+
+    def profundidade(self):
+        return self.fila.qsize() if self.fila is not None else 0
+
+    def resumo(self):
+        linha = f"{self.nome:<9} {self.ok} ok, {self.erros} erros, {self.vazao():.1f}/s"
+        if self.fila is not None:
+            linha += f", fila de saída {self.profundidade()} (pico {self.pico_fila}/{self.fila.maxsize})"
+        return linha
+
+
+class Pipeline:
+    """Fetch -> parse -> write, each stage with its own bounded queue.
+
+    Fetchers call `enviar_html(url, html)`; a dispatcher hands the HTML to a
+    ProcessPoolExecutor so BeautifulSoup/regex work runs on every core
+    instead of under the GIL, and a single writer thread calls
+    `ao_gravar(url, dados)` for each result (`dados` is None on failure).
+    `ao_baixar(url, html)`, if given, runs as each page enters the queue.
+    With `metricas`, parse and write times are recorded per page.
+
+    `navegador(url)`, if given, returns the page rendered by a browser. The
+    HTML sent in is then taken as plain HTTP HTML: only its embedded JSON is
+    read, and pages without it are opened in the browser, in
+    `workers_navegador` threads, before the DOM is parsed. A failed fetch
+    (None) is delivered as a failure, never sent to the browser.
+    """
+
+    def __init__(self, ao_gravar, processos=None, tamanho_fila=200, ao_baixar=None, metricas=None,
+                 navegador=None, workers_navegador=5):
+        self.ao_gravar = ao_gravar
+        self.ao_baixar = ao_baixar
+        self.metricas = metricas
+        self.navegador = navegador
+        self.workers_navegador = workers_navegador
+        self.processos = processos or os.cpu_count() or 1
+        self.fila_html = queue.Queue(maxsize=tamanho_fila)
+        self.fila_registros = queue.Queue(maxsize=tamanho_fila)
+        self.fetch = ContadorEstagio('fetch', self.fila_html)
+        self.parse = ContadorEstagio('parse', self.fila_registros)
+        self.escrita = ContadorEstagio('escrita')
+        self.renderizacao = ContadorEstagio('navegador')
+        # Caps HTML held by the process pool so memory stays bounded
+        self._em_parse = threading.BoundedSemaphore(self.processos * 2)
+        # Pages taken off the HTML queue whose record has not been queued for writing yet
+        self._pendentes = 0
+        self._ociosa = threading.Condition()
+        self._executor = None
+        self._executor_navegador = None
+
+    def enviar_html(self, url, html):
+        if self.ao_baixar:
+            self.ao_baixar(url, html)
+        self.fila_html.put((url, html))
+        self.fetch.registrar(html is not None)
+
+    def _entregar(self, url, dados):
+        self.fila_registros.put((url, dados))
+        self.parse.registrar(dados is not None)
+        with self._ociosa:
+            self._pendentes -= 1
+            self._ociosa.notify_all()
+
+    def _parsear(self, url, html, so_json):
+        self._em_parse.acquire()
+        future = self._executor.submit(_parsear_medindo, url, html, so_json)
+        future.add_done_callback(lambda f, url=url: self._concluir_parse(url, f))
+
+    def _concluir_parse(self, url, future):
+        self._em_parse.release()
+        try:
+            dados, segundos = future.result()
+            if self.metricas:
+                self.metricas.registrar('parse', segundos)
+        except Exception as e:
+            print(Fore.RED + f"\nErro ao processar {url}: {e}")
+            dados = None
+        if dados == PRECISA_NAVEGADOR:
+            self._executor_navegador.submit(self._renderizar, url)
+        else:
+            self._entregar(url, dados)
+
+    def _renderizar(self, url):
+        try:
+            html = self.navegador(url)
+        except Exception as e:
+            print(Fore.RED + f"\nErro ao abrir {url} no navegador: {e}")
+            html = None
+        self.renderizacao.registrar(html is not None)
+        if html is None:
+            self._entregar(url, None)
+            return
+        if self.ao_baixar:
+            # The rendered page replaces the plain HTTP one
+            self.ao_baixar(url, html)
+        self._parsear(url, html, False)
+
+    def _despachar(self):
+        while True:
+            item = self.fila_html.get()
+            if item is _FIM:
+                break
+            url, html = item
+            with self._ociosa:
+                self._pendentes += 1
+            if html is not None:
+                self._parsear(url, html, self.navegador is not None)
+            else:
+                self._entregar(url, None)
+
+    def _gravar(self):
+        while True:
+            item = self.fila_registros.get()
+            if item is _FIM:
+                break
+            url, dados = item
+            try:
+                with medir(self.metricas, 'gravacao'):
+                    self.ao_gravar(url, dados)
+                self.escrita.registrar(dados is not None)
+            except Exception as e:
+                print(Fore.RED + f"\nErro ao gravar {url}: {e}")
+                self.escrita.registrar(False)
+
+    def executar(self, produzir):
+        """Run `produzir(enviar_html)` as the fetch stage and wait for every stage to drain."""
+        escritor = threading.Thread(target=self._gravar, name="pipeline-escrita", daemon=True)
+        escritor.start()
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.processos) as self._executor, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.workers_navegador,
+                                                      thread_name_prefix="pipeline-navegador") as self._executor_navegador:
+            despachante = threading.Thread(target=self._despachar, name="pipeline-parse", daemon=True)
+            despachante.start()
+            try:
+                produzir(self.enviar_html)
+            finally:
+                self.fila_html.put(_FIM)
+                despachante.join()
+                # Pages sent to the browser are parsed again, so the pools stay open until every page is done
+                with self._ociosa:
+                    self._ociosa.wait_for(lambda: not self._pendentes)
+        self.fila_registros.put(_FIM)
+        escritor.join()
+
+    def resumo(self):
+        estagios = (self.fetch, self.renderizacao, self.parse, self.escrita) if self.navegador else \
+            (self.fetch, self.parse, self.escrita)
+        return "\n".join(c.resumo() for c in estagios)
+
+
+def baixar_com_threads(urls, baixar, enviar, workers=5):
+    """Fetch stage for blocking fetchers (e.g. the Selenium BrowserPool)."""
+    def tarefa(url):
+        try:
+            html = baixar(url)
+        except Exception as e:
+            print(Fore.RED + f"\nErro ao baixar {url}: {e}")
+            html = None
+        enviar(url, html)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(tarefa, urls))
@@ -0,0 +1,90 @@
+import time
+import threading
+from colorama import Fore
+
+
+class ProgressReporter:
+    """Keeps job counters in memory and writes them to `scraping_jobs` as one
+    combined update every `intervalo` seconds, plus a final one at job end.
+
+    Besides `properties_scraped` it tracks failures, retries and pages/minute
+    for the JobsMonitor dashboard. With `metricas` (a MetricasEstagios), the
+    stage timings are stored in `scraping_jobs.metrics` and written as a
+    Prometheus textfile when the job ends.
+    """
+
+    def __init__(self, supabase, job_id, intervalo=15.0, metricas=None):
+        self.supabase = supabase
+        self.job_id = job_id
+        self.intervalo = intervalo
+        self.metricas = metricas
+        self.contadores = {'properties_scraped': 0, 'properties_failed': 0, 'retries': 0}
+        self.processados = 0
+        self.inicio = time.monotonic()
+        self._sujo = False
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="progress-reporter", daemon=True)
+        self._thread.start()
+
+    def incrementar(self, campo, n=1):
+        with self._lock:
+            self.contadores[campo] += n
+            self._sujo = True
+
+    def definir(self, campo, valor):
+        with self._lock:
+            self.contadores[campo] = valor
+            self._sujo = True
+
+    def registrar_pagina(self, sucesso):
+        """Called once per processed listing; failures also count as processed."""
+        with self._lock:
+            self.processados += 1
+            if not sucesso:
+                self.contadores['properties_failed'] += 1
+            self._sujo = True
+
+    def _payload(self):
+        minutos = (time.monotonic() - self.inicio) / 60
+        payload = dict(self.contadores)
+        payload['pages_per_minute'] = round(self.processados / minutos, 1) if minutos else 0
+        payload['heartbeat_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        return payload
+
+    def flush(self, **extras):
+        with self._lock:
+            payload = self._payload()
+            self._sujo = False
+        payload.update(extras)
+        try:
+            self.supabase.table('scraping_jobs').update(payload).eq('id', self.job_id).execute()
+        except Exception as e:
+            print(Fore.RED + f"\nErro ao atualizar progresso do job: {e}")
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            if self._sujo:
+                self.flush()
+
+    def finalizar(self, status='completed', error_message=None):
+        """Stop the heartbeat and write the final counters together with the job status."""
+        self._parar.set()
+        self._thread.join()
+        extras = {'status': status, 'completed_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+        if error_message:
+            extras['error_message'] = error_message
+        self.flush(**extras)
+        if self.metricas:
+            self._publicar_metricas()
+
+    def _publicar_metricas(self):
+        # Separate from the status update, so a database without the column still gets the final status
+        try:
+            self.supabase.table('scraping_jobs').update({'metrics': self.metricas.resumo()}).eq('id', self.job_id).execute()
+        except Exception as e:
+            print(Fore.RED + f"\nErro ao gravar métricas do job: {e}")
+        try:
+            self.metricas.salvar_textfile(self.job_id)
+        except OSError as e:
+            print(Fore.RED + f"\nErro ao escrever métricas para o Prometheus: {e}")
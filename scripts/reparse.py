@@ -0,0 +1,132 @@
+import os
+import time
+import argparse
+import collections
+import concurrent.futures
+from tqdm import tqdm
+from colorama import init, Fore, Style
+from supabase import create_client
+from dotenv import load_dotenv
+from html_cache import HtmlCache
+from pipeline import extrair_pagina
+from batch_normalize import normalizar_lote
+from upsert_writer import UpsertWriter
+from dedup import hashes_armazenados
+
+
+def parsear_em_paralelo(paginas, executor, janela):
+    """Yield (url, bruto) in order while keeping at most `janela` pages in the process pool.
+
+    `bruto` is the raw (url, dados_brutos, endereco) from `extrair_pagina`;
+    type conversion is left to the caller so it can be done in batches.
+    """
+    pendentes = collections.deque()
+    for url, html, _ in paginas:
+        pendentes.append((url, executor.submit(extrair_pagina, url, html)))
+        if len(pendentes) >= janela:
+            url_pronta, future = pendentes.popleft()
+            yield url_pronta, _resultado(url_pronta, future)
+    while pendentes:
+        url_pronta, future = pendentes.popleft()
+        yield url_pronta, _resultado(url_pronta, future)
+
+
+def _resultado(url, future):
+    try:
+        return future.result()
+    except Exception as e:
+        print(Fore.RED + f"\nErro ao processar {url}: {e}")
+        return None
+
+
+def reparsear(supabase, cache, processos=None, lote=2000, aplicar=True, incluir_novos=False):
+    """Run every cached page through the current extractor and upsert only the rows that changed.
+
+    Raw fields are converted `lote` pages at a time by `normalizar_lote`.
+    """
+    processos = processos or os.cpu_count() or 1
+    contagem = collections.Counter()
+    inicio = time.monotonic()
+
+    def comparar(brutos, writer):
+        registros = zip([bruto[0] for bruto in brutos], normalizar_lote(brutos))
+        # Rows stored before content hashes existed have NULL here and are rewritten once
+        armazenados = hashes_armazenados(supabase, [bruto[0] for bruto in brutos])
+        for url, dados in registros:
+            if url not in armazenados:
+                contagem['fora_do_banco'] += 1
+                if not incluir_novos:
+                    continue
+            elif armazenados[url] == dados['content_hash']:
+                contagem['iguais'] += 1
+                continue
+            else:
+                contagem['alterados'] += 1
+            if writer:
+                writer.adicionar(dict(dados, link=url))
+
+    writer = UpsertWriter(supabase, arquivo_falhas="falhas_reparse.jsonl") if aplicar else None
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processos) as executor, \
+                tqdm(total=len(cache), desc=f"{Fore.CYAN}Reprocessando páginas", unit="página") as barra:
+            brutos = []
+            for url, bruto in parsear_em_paralelo(cache.iterar(), executor, processos * 4):
+                barra.update(1)
+                if bruto is None:
+                    contagem['erros'] += 1
+                    continue
+                brutos.append(bruto)
+                if len(brutos) >= lote:
+                    comparar(brutos, writer)
+                    brutos = []
+                    barra.set_postfix(alterados=contagem['alterados'])
+            if brutos:
+                comparar(brutos, writer)
+    finally:
+        if writer:
+            writer.fechar()
+    contagem['paginas'] = sum(contagem[k] for k in ('iguais', 'alterados', 'fora_do_banco', 'erros'))
+    contagem['segundos'] = time.monotonic() - inicio
+    if writer:
+        contagem['gravados'] = writer.gravados
+        contagem['falhas_banco'] = writer.falhas
+    return contagem
+
+
+if __name__ == "__main__":
+    init(autoreset=True)
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Reprocessa o HTML em cache com as regras de extração atuais e corrige `properties`.")
+    parser.add_argument("--cache", default="cache_html", help="Diretório do cache de HTML")
+    parser.add_argument("--processos", type=int, help="Processos de parse (padrão: todos os núcleos)")
+    parser.add_argument("--lote", type=int, default=2000, help="Páginas normalizadas e comparadas com o banco por vez")
+    parser.add_argument("--simular", action="store_true", help="Só conta as diferenças, sem gravar no banco")
+    parser.add_argument("--incluir-novos", action="store_true", help="Também insere páginas em cache que não estão no banco")
+    args = parser.parse_args()
+
+    # Rewriting existing listings needs the service_role key
+    url, chave = os.getenv('VITE_SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+    if not url or not chave:
+        print(Fore.RED + "ERRO: defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY para gravar no banco.")
+        exit(1)
+    if not os.path.isdir(args.cache):
+        print(Fore.RED + f"Cache de HTML não encontrado em {args.cache}")
+        exit(1)
+
+    print(Fore.GREEN + Style.BRIGHT + "=== REPROCESSAMENTO DO CACHE DE HTML ===\n")
+    # Eviction would drop pages we are about to reparse, so the cache is opened without limits
+    cache = HtmlCache(args.cache, retencao=float('inf'), limite_bytes=float('inf'))
+    try:
+        resultado = reparsear(create_client(url, chave), cache, processos=args.processos, lote=args.lote,
+                              aplicar=not args.simular, incluir_novos=args.incluir_novos)
+    finally:
+        cache.fechar()
+
+    segundos = max(resultado['segundos'], 1e-9)
+    print(Fore.GREEN + f"\n{resultado['paginas']} páginas em {segundos:.1f} s ({resultado['paginas'] / segundos:.0f} páginas/s)")
+    print(Fore.WHITE + f"Alterados: {resultado['alterados']}, iguais: {resultado['iguais']}, "
+                       f"fora do banco: {resultado['fora_do_banco']}, erros de parse: {resultado['erros']}")
+    if args.simular:
+        print(Fore.YELLOW + "Simulação: nada foi gravado.")
+    else:
+        print(Fore.WHITE + f"Banco: {resultado['gravados']} gravados, {resultado['falhas_banco']} com falha")
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import argparse
+import threading
+import httpx
+from tqdm import tqdm
+from colorama import init, Fore, Style
+from supabase import create_client, Client
+from dotenv import load_dotenv
+from browser_pool import BrowserPool, baixar_pagina
+from async_engine import rodar_crawl
+from pipeline import Pipeline
+from upsert_writer import UpsertWriter
+from progress_reporter import ProgressReporter
+from html_cache import HtmlCache
+from parquet_store import escritor_do_job, finalizar_escritor
+from scraping_utils import limpar_console
+
+# ====== CONFIGURAÇÃO ======
+init(autoreset=True)
+load_dotenv()
+
+ORCAMENTO_PADRAO = 2000    # listings fetched per run
+MAX_EM_VOO = 100
+TAXA_POR_HOST = 4.0
+NAVEGADORES = 2           # Chrome sessions for pages without embedded JSON
+STATUS_REMOVIDO = {404, 410}
+
+
+def planejar_revisitas(supabase, orcamento, pesos=None):
+    """Links to fetch this run, highest `plan_revisits` score first."""
+    resposta = supabase.rpc('plan_revisits', {'p_limit': orcamento, 'p_pesos': pesos or {}}).execute()
+    return [linha['link'] for linha in resposta.data or []]
+
+
+def _em_blocos(supabase, funcao, links, tamanho=500):
+    links = list(links)
+    for i in range(0, len(links), tamanho):
+        supabase.rpc(funcao, {'links': links[i:i + tamanho]}).execute()
+
+
+def marcar_verificados(supabase, links):
+    _em_blocos(supabase, 'marcar_verificados', links)
+
+
+def marcar_inativos(supabase, links):
+    _em_blocos(supabase, 'marcar_inativos', links)
+
+
+# ====== MAIN ======
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Revisita os imóveis já gravados com maior chance de terem mudado.")
+    parser.add_argument("--orcamento", type=int, default=ORCAMENTO_PADRAO, help="Quantos anúncios baixar nesta execução")
+    parser.add_argument("--pesos", help='Arquivo JSON com o peso de cada cidade ou UF, ex.: {"Santos": 2, "SP": 1}')
+    args = parser.parse_args()
+
+    SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
+    # marcar_verificados / marcar_inativos only accept the service_role key
+    SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print(Fore.RED + "ERRO: defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY para a revisita.")
+        exit(1)
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    pesos = {}
+    if args.pesos:
+        try:
+            with open(args.pesos, 'r', encoding='utf-8') as f:
+                pesos = json.load(f)
+        except (OSError, ValueError) as e:
+            print(Fore.RED + f"Erro ao ler {args.pesos}: {e}"); exit(1)
+
+    limpar_console()
+    print(Fore.GREEN + Style.BRIGHT + "=== REVISITA DE IMÓVEIS ===\n")
+    try:
+        job_id = supabase.table('scraping_jobs').insert({
+            'status': 'running', 'started_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'search_name': 'revisita'
+        }).execute().data[0]['id']
+        links = planejar_revisitas(supabase, args.orcamento, pesos)
+    except Exception as e:
+        print(Fore.RED + f"Erro ao planejar revisitas: {e}"); exit(1)
+    print(Fore.WHITE + f"{len(links)} imóveis selecionados (orçamento {args.orcamento}).\n")
+    supabase.table('scraping_jobs').update({'links_found': len(links), 'new_links_to_process': len(links)}).eq('id', job_id).execute()
+
+    removidos = set()
+    verificados = set()
+    lock = threading.Lock()
+    progresso = ProgressReporter(supabase, job_id)
+    # Every checked listing is appended, changed or not, as this revisit's snapshot of it
+    parquet = escritor_do_job()
+
+    def ao_falhar(url, erro):
+        if isinstance(erro, httpx.HTTPStatusError) and erro.response.status_code in STATUS_REMOVIDO:
+            with lock:
+                removidos.add(url)
+
+    def ao_concluir_lote(lote, sucesso):
+        # Unchanged listings are confirmed without a write, so they count as checked too
+        if sucesso:
+            progresso.incrementar('properties_scraped', len(lote))
+            if parquet:
+                parquet.adicionar_lote(lote)
+
+    with UpsertWriter(supabase, arquivo_falhas=f"falhas_{job_id}.jsonl", detectar_alteracoes=True,
+                      ao_repetir=lambda: progresso.incrementar('retries'), ao_concluir_lote=ao_concluir_lote) as writer, \
+            BrowserPool(size=NAVEGADORES) as pool, \
+            HtmlCache() as cache, \
+            tqdm(total=len(links), desc=f"{Fore.CYAN}Revisitando imóveis", unit="imóvel") as barra:
+        def ao_gravar(url, dados):
+            progresso.registrar_pagina(dados is not None or url in removidos)
+            barra.update(1)
+            if url in removidos:
+                # Marked inactive below; whatever came back for it is not the listing
+                return
+            if dados:
+                # job_id is left alone so the row keeps pointing at the job that found it
+                dados['link'] = url
+                writer.adicionar(dados)
+                verificados.add(url)
+
+        pipeline = Pipeline(ao_gravar, ao_baixar=cache.guardar, navegador=lambda url: baixar_pagina(url, pool),
+                            workers_navegador=pool.size)
+        # Always fetched fresh (no cache reads): the point of a revisit is the current page
+        pipeline.executar(lambda enviar: rodar_crawl(
+            links, enviar, max_em_voo=MAX_EM_VOO, taxa_por_host=TAXA_POR_HOST, extrair=None,
+            ao_repetir=lambda: progresso.incrementar('retries'), ao_falhar=ao_falhar))
+
+    marcar_verificados(supabase, verificados)
+    marcar_inativos(supabase, removidos)
+    print(Fore.WHITE + "\n" + pipeline.resumo())
+    print(Fore.WHITE + f"Banco: {writer.gravados} alterados, {writer.inalterados} sem mudança, {writer.falhas} com falha")
+    print(Fore.YELLOW + f"Anúncios removidos (404/410) marcados como inativos: {len(removidos)}")
+    finalizar_escritor(parquet)
+    progresso.finalizar('completed')
+    print(Fore.GREEN + Style.BRIGHT + "\n✓ Revisita concluída!")
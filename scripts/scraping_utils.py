@@ -0,0 +1,160 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+from urllib.parse import urlparse, urlunparse
+
+
+def limpar_console():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def human_sleep(a=0.6, b=1.2):
+    time.sleep(random.uniform(a, b))
+
+def normalize_url(url: str) -> str:
+    """Remove query parameters and fragments to create a canonical URL."""
+    if not url:
+        return ""
+    parsed = urlparse(url)
+    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', '', ''))
+
+def extrair_tipo_imovel(url: str) -> str:
+    PREFIXOS = [
+        # Commercial Types
+        'consultorio', 'galpao-deposito-armazem', 'imovel-comercial',
+        'ponto-comercial', 'sala-comercial', 'predio-comercial',
+        # Residential Types
+        'edificio-residencial', 'casa-de-condominio', 'fazenda---sitio',
+        'lote-terreno', 'apartamento', 'cobertura', 'sobrado',
+        'kitnet', 'flat', 'casa'
+    ]
+    try:
+        path = urlparse(url).path
+        segmento = path.split('/imovel/')[1]
+        for prefixo in PREFIXOS:
+            if segmento.startswith(prefixo):
+                return 'casa isolada' if prefixo == 'casa' else prefixo.replace('-', ' ')
+        return 'nao informado'
+    except (IndexError, AttributeError):
+        return 'nao informado'
+
+def to_int(value_str, default=0):
+    if not value_str: return default
+    try:
+        return int(re.sub(r'[^\d]', '', value_str))
+    except (ValueError, TypeError):
+        return default
+
+def to_float(value_str, default=0.0):
+    if not value_str: return default
+    try:
+        # Handles formats like "1.500,50" or "1500"
+        cleaned_str = re.sub(r'[^\d,]', '', value_str).replace(',', '.')
+        return float(cleaned_str)
+    except (ValueError, TypeError):
+        return default
+
+def to_bool(value_str):
+    return value_str == "1"
+
+VALORES_PADRAO = {
+    'valor': "0", 'area_privativa': "0", 'dormitorio': "0", 'banheiro': "0", 'vaga': "0",
+    'suite': "0", 'andar': "0", 'piscina': "0", 'varanda': "0", 'elevador': "0",
+}
+CAMPOS_BOOLEANOS = {'piscina', 'varanda', 'elevador'}
+
+# One alternation per field, scanned once; condo fee and IPTU are consumed
+# without a group so their "R$" is never mistaken for the price.
+CAMPOS_RE = re.compile(
+    r"(?:condom[ií]nio|iptu)\s*:?\s*R\$\s*[\d.,]+"
+    r"|R\$\s*(?P<valor>[\d.,]+)"
+    r"|(?P<area_privativa>[\d.,]+)\s*m²"
+    r"|(?P<dormitorio>\d+)\s*quartos?"
+    r"|(?P<banheiro>\d+)\s*banheiros?"
+    r"|(?P<vaga>\d+)\s*vagas?"
+    r"|(?P<suite>\d+)\s*su[ií]tes?"
+    r"|(?P<andar>\d+)º?\s*andar"
+    r"|(?P<piscina>piscina)"
+    r"|(?P<varanda>varanda)"
+    r"|(?P<elevador>elevador)",
+    re.IGNORECASE,
+)
+
+def texto_do_anuncio(doc):
+    """Text of the price and amenities containers, or the whole page unless both are found."""
+    textos = doc.textos_escopo()
+    if {grupo for grupo, _ in textos} != {'preco', 'comodidades'}:
+        return doc.texto()
+    return " ".join(texto for _, texto in textos)
+
+def extrair_valores(texto):
+    dados = dict(VALORES_PADRAO)
+    encontrados = set()
+    for m in CAMPOS_RE.finditer(texto):
+        campo = m.lastgroup
+        if campo is None or campo in encontrados:
+            continue
+        encontrados.add(campo)
+        dados[campo] = "1" if campo in CAMPOS_BOOLEANOS else m.group(campo).strip()
+        if len(encontrados) == len(VALORES_PADRAO):
+            break
+    return dados
+
+def dividir_endereco(endereco_texto):
+    if not endereco_texto or endereco_texto == "0":
+        return "0", "0", "0", "0"
+    # Matches "Street, Number - Neighborhood, City - UF"
+    m = re.match(r"^(.*?)\s*-\s*(.*?),\s*(.*?)\s*-\s*(.{2})$", endereco_texto)
+    if m:
+        return m.group(1).strip(), m.group(2).strip(), m.group(3).strip(), m.group(4).strip()
+    return endereco_texto, "0", "0", "0"
+
+SELETORES_ENDERECO = ('p[data-testid="location-address"]', 'div[data-testid="location-address"]', 'span[itemprop="streetAddress"]')
+
+def get_address_from_soup(doc):
+    """`doc` is any parsers.py document (bs4, lxml or selectolax backend)."""
+    for selector in SELETORES_ENDERECO:
+        texto = doc.primeiro_texto(selector)
+        if texto:
+            return texto
+    return "0"
+
+def montar_registro(url, dados_brutos, endereco):
+    """Convert raw extracted strings into the record stored in `properties`."""
+    dados_convertidos = {
+        'valor': to_float(dados_brutos.get('valor')),
+        'area_privativa': to_float(dados_brutos.get('area_privativa')),
+        'dormitorio': to_int(dados_brutos.get('dormitorio')),
+        'banheiro': to_int(dados_brutos.get('banheiro')),
+        'vaga': to_int(dados_brutos.get('vaga')),
+        'suite': to_int(dados_brutos.get('suite')),
+        'andar': dados_brutos.get('andar', '0'), # Keep as text
+        'piscina': to_bool(dados_brutos.get('piscina')),
+        'varanda': to_bool(dados_brutos.get('varanda')),
+        'elevador': to_bool(dados_brutos.get('elevador')),
+        'tipo': extrair_tipo_imovel(url)
+    }
+    dados_convertidos['endereco_completo'] = endereco
+    rua, bairro, cidade, uf = dividir_endereco(endereco)
+    dados_convertidos.update({'rua': rua, 'bairro': bairro, 'cidade': cidade, 'uf': uf})
+    dados_convertidos['content_hash'] = hash_registro(dados_convertidos)
+    return dados_convertidos
+
+# Columns produced by montar_registro, in the order they enter the content hash
+CAMPOS_REGISTRO = ['valor', 'area_privativa', 'dormitorio', 'banheiro', 'vaga', 'suite', 'andar',
+                   'piscina', 'varanda', 'elevador', 'tipo', 'endereco_completo', 'rua', 'bairro', 'cidade', 'uf']
+
+def normalizar_valor(valor):
+    """Common form for a record value and the same value read back from the database."""
+    if isinstance(valor, bool) or valor is None:
+        return valor
+    if isinstance(valor, (int, float)):
+        return round(float(valor), 2)
+    return str(valor).strip()
+
+def hash_registro(registro):
+    """Stable hash of the listing fields; equal hashes mean nothing worth rewriting changed."""
+    valores = [normalizar_valor(registro.get(campo)) for campo in CAMPOS_REGISTRO]
+    return hashlib.sha1(json.dumps(valores, ensure_ascii=False).encode('utf-8')).hexdigest()
@@ -0,0 +1,113 @@
+import os
+import math
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+DIRETORIO_TEXTFILE = os.getenv('METRICS_TEXTFILE_DIR', '.')
+QUANTIS = (0.5, 0.95, 0.99)
+# Buckets 2% wide on a log scale, as in market_price_buckets: any quantile is within 1%
+_LOG_PASSO = math.log(1.02)
+_MINIMO = 1e-6
+
+
+class Histograma:
+    """Log-bucketed durations in seconds; memory grows with the range of values, not their count."""
+
+    def __init__(self):
+        self.faixas = {}
+        self.n = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, segundos):
+        faixa = math.floor(math.log(max(segundos, _MINIMO)) / _LOG_PASSO)
+        self.faixas[faixa] = self.faixas.get(faixa, 0) + 1
+        self.n += 1
+        self.soma += segundos
+        self.maximo = max(self.maximo, segundos)
+
+    def quantil(self, q):
+        if not self.n:
+            return 0.0
+        alvo = q * self.n
+        acumulado = 0
+        for faixa in sorted(self.faixas):
+            acumulado += self.faixas[faixa]
+            if acumulado >= alvo:
+                # Geometric middle of the bucket, capped by the largest value seen
+                return min(math.exp((faixa + 0.5) * _LOG_PASSO), self.maximo)
+        return self.maximo
+
+
+class MetricasEstagios:
+    """Timing spans of every stage of a job (Chrome startup, page loads, waits, parsing, DB round trips).
+
+    `medir(estagio)` is a context manager; `registrar` takes a duration
+    measured elsewhere (e.g. in the parse processes). Thread-safe. At job
+    end `resumo()` goes to `scraping_jobs.metrics` and `salvar_textfile`
+    writes the same numbers for the Prometheus node_exporter.
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self.estagios = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, estagio, segundos):
+        with self._lock:
+            if estagio not in self.estagios:
+                self.estagios[estagio] = Histograma()
+            self.estagios[estagio].registrar(segundos)
+
+    @contextmanager
+    def medir(self, estagio):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(estagio, time.perf_counter() - inicio)
+
+    def resumo(self):
+        """{estagio: {n, total_s, p50_ms, p95_ms, p99_ms, max_ms}}, ready to be stored as JSON."""
+        with self._lock:
+            resumo = {}
+            for estagio, h in sorted(self.estagios.items()):
+                resumo[estagio] = {'n': h.n, 'total_s': round(h.soma, 3)}
+                for q in QUANTIS:
+                    resumo[estagio][f"p{int(q * 100)}_ms"] = round(h.quantil(q) * 1000, 3)
+                resumo[estagio]['max_ms'] = round(h.maximo * 1000, 3)
+            return resumo
+
+    def prometheus(self, job_id):
+        with self._lock:
+            linhas = [
+                "# HELP vivareal_stage_duration_seconds Duration of each scraper stage in the last job.",
+                "# TYPE vivareal_stage_duration_seconds summary",
+            ]
+            for estagio, h in sorted(self.estagios.items()):
+                rotulos = f'script="{self.script}",stage="{estagio}"'
+                for q in QUANTIS:
+                    linhas.append(f'vivareal_stage_duration_seconds{{{rotulos},quantile="{q}"}} {h.quantil(q):.6f}')
+                linhas.append(f"vivareal_stage_duration_seconds_sum{{{rotulos}}} {h.soma:.6f}")
+                linhas.append(f"vivareal_stage_duration_seconds_count{{{rotulos}}} {h.n}")
+        linhas += [
+            "# HELP vivareal_job_completed_timestamp_seconds When the last job of this script finished.",
+            "# TYPE vivareal_job_completed_timestamp_seconds gauge",
+            f'vivareal_job_completed_timestamp_seconds{{script="{self.script}",job_id="{job_id}"}} {time.time():.0f}',
+        ]
+        return "\n".join(linhas) + "\n"
+
+    def salvar_textfile(self, job_id, diretorio=DIRETORIO_TEXTFILE):
+        """Write vivareal_<script>.prom, replacing the previous job's; returns the path."""
+        caminho = os.path.join(diretorio, f"vivareal_{self.script}.prom")
+        # node_exporter may read at any moment, so the file is swapped in whole
+        with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(self.prometheus(job_id))
+        os.replace(caminho + '.tmp', caminho)
+        return caminho
+
+
+def medir(metricas, estagio):
+    """`metricas.medir(estagio)`, or a no-op when metrics are not being collected."""
+    return metricas.medir(estagio) if metricas is not None else nullcontext()
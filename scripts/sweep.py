@@ -0,0 +1,207 @@
+import os
+import time
+import json
+import argparse
+from tqdm import tqdm
+from colorama import init, Fore, Style
+from supabase import create_client, Client
+from dotenv import load_dotenv
+from browser_pool import BrowserPool, baixar_pagina
+from async_engine import rodar_crawl
+from pipeline import Pipeline
+from upsert_writer import UpsertWriter
+from progress_reporter import ProgressReporter
+from dedup import filtrar_links_novos
+from html_cache import HtmlCache
+from listing_discovery import descobrir_buscas
+from scraping_utils import limpar_console, normalize_url
+from excel_export import exportar_em_segundo_plano
+from parquet_store import escritor_do_job, finalizar_escritor
+from stage_metrics import MetricasEstagios, medir
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# ====== CONFIGURAÇÃO ======
+init(autoreset=True)
+load_dotenv()
+
+CONFIG_PADRAO = {
+    'max_em_voo': 100,       # concurrent HTTP requests shared by every search
+    'taxa_por_host': 4.0,    # requests/s allowed per host (token bucket), across all searches
+    'paginas_por_onda': 10,  # listing pages fetched at once per search
+    'navegadores': 5,        # Chrome sessions for pages without embedded JSON
+}
+
+
+def carregar_config(caminho):
+    """Read a sweep file (.yaml/.yml or .json) with a `buscas` list of {nome, url}."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        if caminho.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ValueError("Instale o pacote pyyaml para usar arquivos YAML.")
+            config = yaml.safe_load(f) or {}
+        else:
+            config = json.load(f)
+    buscas = config.get('buscas') or []
+    if not buscas:
+        raise ValueError("O arquivo não tem nenhuma busca em `buscas`.")
+    urls = set()
+    for i, busca in enumerate(buscas):
+        if not isinstance(busca, dict) or not busca.get('url'):
+            raise ValueError(f"A busca {i + 1} precisa de uma `url`.")
+        busca.setdefault('nome', f"busca-{i + 1}")
+        # Jobs and discovery results are keyed by URL, so a repeated one would take over the other's job
+        if busca['url'] in urls:
+            raise ValueError(f"A busca '{busca['nome']}' repete a url de outra busca.")
+        urls.add(busca['url'])
+    return {**CONFIG_PADRAO, **{k: v for k, v in config.items() if k != 'buscas'}}, buscas
+
+
+def agora():
+    return time.strftime('%Y-%m-%d %H:%M:%S')
+
+
+# ====== MAIN ======
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa várias buscas do VivaReal em uma única varredura.")
+    parser.add_argument("config", help="Arquivo .yaml ou .json com as buscas")
+    args = parser.parse_args()
+
+    SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
+    # Upserts update existing listings, which only the service_role key may do
+    SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print(Fore.RED + "ERRO: defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY para gravar no banco.")
+        exit(1)
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    limpar_console()
+    print(Fore.GREEN + Style.BRIGHT + "=== VARREDURA DE BUSCAS VIVAREAL ===\n")
+    try:
+        config, buscas = carregar_config(args.config)
+    except (OSError, ValueError) as e:
+        print(Fore.RED + f"Erro ao ler {args.config}: {e}"); exit(1)
+    print(Fore.WHITE + f"{len(buscas)} buscas, {config['max_em_voo']} requisições simultâneas, "
+                       f"{config['taxa_por_host']}/s por host\n")
+
+    # One scraping_jobs row per search, so each shows up separately in the dashboard
+    jobs = {}
+    for busca in buscas:
+        try:
+            resposta = supabase.table('scraping_jobs').insert({
+                'status': 'running', 'started_at': agora(), 'search_name': busca['nome'], 'search_url': busca['url']
+            }).execute()
+            jobs[busca['url']] = resposta.data[0]['id']
+        except Exception as e:
+            print(Fore.RED + f"Erro ao criar job para '{busca['nome']}': {e}"); exit(1)
+
+    # On any error every job still running is marked failed; those whose discovery failed keep their own error
+    progressos = {}
+    encerrados = set()
+    exportacao = None
+    # Only batches stored in the database reach the Parquet dataset
+    parquet = escritor_do_job()
+    try:
+        # One crawl serves every search, so its stage timings are stored in each of the sweep's jobs
+        metricas = MetricasEstagios('sweep')
+        print(Fore.YELLOW + "Descobrindo links de todas as buscas...")
+        with medir(metricas, 'descoberta_http'):
+            descobertos = descobrir_buscas([b['url'] for b in buscas], janela=config['paginas_por_onda'],
+                                           max_em_voo=config['max_em_voo'], taxa_por_host=config['taxa_por_host'],
+                                           metricas=metricas)
+
+        # Each link belongs to the first search that found it; later searches skip it
+        dono = {}
+        links_por_job = {}
+        for busca in buscas:
+            job_id = jobs[busca['url']]
+            resultado = descobertos[busca['url']]
+            if isinstance(resultado, Exception):
+                print(Fore.RED + f"'{busca['nome']}': {resultado}")
+                supabase.table('scraping_jobs').update({
+                    'status': 'failed', 'error_message': str(resultado), 'completed_at': agora()
+                }).eq('id', job_id).execute()
+                encerrados.add(job_id)
+                continue
+            proprios = {normalize_url(link) for link in resultado} - dono.keys()
+            dono.update(dict.fromkeys(proprios, job_id))
+            links_por_job[job_id] = (len(resultado), proprios)
+            print(f"{Fore.CYAN}{busca['nome']}: {Fore.WHITE}{len(resultado)} links, {len(proprios)} exclusivos desta busca")
+
+        print(Fore.YELLOW + "\nConsultando quais links já existem no banco de dados...")
+        with medir(metricas, 'supabase_dedup'):
+            novos = filtrar_links_novos(supabase, set(dono))
+        for job_id, (encontrados, proprios) in links_por_job.items():
+            supabase.table('scraping_jobs').update({
+                'links_found': encontrados, 'new_links_to_process': len(proprios & novos)
+            }).eq('id', job_id).execute()
+        new_links_to_process = list(novos)
+        print(f"{Fore.GREEN+Style.BRIGHT}Total de links NOVOS para processar: {len(new_links_to_process)}\n")
+
+        progressos.update((job_id, ProgressReporter(supabase, job_id, metricas=metricas)) for job_id in links_por_job)
+
+        def ao_concluir_lote(lote, sucesso):
+            if sucesso:
+                for registro in lote:
+                    progressos[registro['job_id']].incrementar('properties_scraped')
+                if parquet:
+                    parquet.adicionar_lote(lote)
+
+        arquivo_parcial = f"parcial_varredura_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        if new_links_to_process:
+            with UpsertWriter(supabase, arquivo_falhas=arquivo_parcial.replace('parcial_', 'falhas_'),
+                              ao_concluir_lote=ao_concluir_lote, metricas=metricas) as writer, \
+                    open(arquivo_parcial, 'a', encoding='utf-8') as parcial, \
+                    BrowserPool(size=config['navegadores'], metricas=metricas) as pool, \
+                    HtmlCache() as cache, \
+                    tqdm(total=len(new_links_to_process), desc=f"{Fore.CYAN}Processando imóveis", unit="imóvel") as barra:
+                def ao_gravar(url, dados):
+                    progressos[dono[url]].registrar_pagina(dados is not None)
+                    barra.update(1)
+                    barra.set_postfix(fila_html=pipeline.fetch.profundidade(), fila_registros=pipeline.parse.profundidade(),
+                                      lote_db=writer.lote)
+                    if dados:
+                        dados['link'] = url
+                        dados['job_id'] = dono[url]
+                        parcial.write(json.dumps(dados, ensure_ascii=False) + "\n")
+                        writer.adicionar(dados)
+
+                def produzir(enviar):
+                    # Every search feeds one crawl, so the fetch workers stay busy until the last page of the sweep
+                    restantes = cache.enviar_cacheados(new_links_to_process, enviar)
+                    rodar_crawl(restantes, enviar, max_em_voo=config['max_em_voo'], taxa_por_host=config['taxa_por_host'],
+                                extrair=None, metricas=metricas)
+
+                # Pages without embedded JSON are opened in Chrome by the pipeline
+                pipeline = Pipeline(ao_gravar, ao_baixar=cache.guardar, metricas=metricas,
+                                    navegador=lambda url: baixar_pagina(url, pool), workers_navegador=pool.size)
+                pipeline.executar(produzir)
+            print(Fore.WHITE + "\n" + pipeline.resumo())
+            print(Fore.WHITE + f"Banco: {writer.gravados} gravados em {writer.lotes} lotes, {writer.falhas} com falha")
+            print(Fore.WHITE + f"Cache HTML: {cache.acertos} páginas reaproveitadas, {cache.faltas} a baixar")
+
+        # The DB write is done; one workbook per search is written while the jobs are being finalized
+        if os.path.exists(arquivo_parcial):
+            exportacao = exportar_em_segundo_plano(arquivo_parcial, por_job=True)
+    except BaseException as e:
+        mensagem = str(e) or type(e).__name__
+        finalizar_escritor(parquet)
+        for job_id in jobs.values():
+            if job_id in progressos:
+                progressos[job_id].finalizar('failed', error_message=mensagem)
+            elif job_id not in encerrados:
+                supabase.table('scraping_jobs').update({
+                    'status': 'failed', 'error_message': mensagem, 'completed_at': agora()
+                }).eq('id', job_id).execute()
+        print(Fore.RED + f"\nVarredura interrompida: {e!r}")
+        exit(1)
+
+    finalizar_escritor(parquet)
+    for progresso in progressos.values():
+        progresso.finalizar('completed')
+    if exportacao:
+        exportacao.join()
+    print(Fore.GREEN + Style.BRIGHT + "\n✓ Varredura concluída!")
@@ -0,0 +1,74 @@
+import os
+import sys
+import uuid
+import tempfile
+import pytest
+
+DIRETORIO_SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DIRETORIO_MIGRACOES = os.path.join(os.path.dirname(DIRETORIO_SCRIPTS), "supabase", "migrations")
+# The scripts are flat modules run from scripts/, not an installed package
+sys.path.insert(0, DIRETORIO_SCRIPTS)
+
+
+@pytest.fixture(scope="session")
+def servidor():
+    """Base URL of a local server for the saved pages in tests/fixtures."""
+    from fixture_server import servir_corpus
+    server, base_url = servir_corpus(DIRETORIO_FIXTURES)
+    yield base_url
+    server.shutdown()
+
+
+@pytest.fixture
+def pagina():
+    def ler(nome):
+        with open(os.path.join(DIRETORIO_FIXTURES, nome + ".html"), encoding="utf-8") as f:
+            return f.read()
+    return ler
+
+
+def aplicar_migracao(conn, arquivo):
+    """Runs one file from supabase/migrations on the connection."""
+    with open(os.path.join(DIRETORIO_MIGRACOES, arquivo), encoding="utf-8") as f:
+        with conn.cursor() as cur:
+            cur.execute(f.read())
+
+
+@pytest.fixture(scope="session")
+def dsn_postgres():
+    """TEST_DATABASE_URL, or a throwaway server from `pgserver` when it is installed."""
+    pytest.importorskip("psycopg2")
+    dsn = os.getenv("TEST_DATABASE_URL")
+    if dsn:
+        return dsn
+    pgserver = pytest.importorskip("pgserver", reason="defina TEST_DATABASE_URL ou instale pgserver")
+    return pgserver.get_server(os.path.join(tempfile.gettempdir(), "vivareal_pgdata"), cleanup_mode="stop").get_uri()
+
+
+@pytest.fixture(scope="module")
+def novo_banco(dsn_postgres):
+    """Creates empty databases (with the Supabase roles) dropped at the end of the module."""
+    import psycopg2
+    admin = psycopg2.connect(dsn_postgres)
+    admin.autocommit = True
+    criados = []
+
+    def criar(prefixo):
+        nome = f"{prefixo}_{uuid.uuid4().hex[:8]}"
+        with admin.cursor() as cur:
+            cur.execute(f"CREATE DATABASE {nome}")
+            for papel in ("anon", "authenticated", "service_role"):
+                cur.execute(f"DO $$BEGIN IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = '{papel}') "
+                            f"THEN CREATE ROLE {papel}; END IF; END$$;")
+        conn = psycopg2.connect(psycopg2.extensions.make_dsn(dsn_postgres, dbname=nome))
+        conn.autocommit = True
+        criados.append((nome, conn))
+        return conn
+
+    yield criar
+    with admin.cursor() as cur:
+        for nome, conn in criados:
+            conn.close()
+            cur.execute(f"DROP DATABASE {nome}")
+    admin.close()
@@ -0,0 +1,113 @@
+import pytest
+from conftest import aplicar_migracao
+from dedup import filtrar_links_novos, _conhecidos_in
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+
+class Resposta:
+    def __init__(self, data):
+        self.data = data
+
+
+class Consulta:
+    """The few query-builder calls dedup.py makes, run as SQL on the test database."""
+
+    def __init__(self, conn, tabela):
+        self.conn = conn
+        self.tabela = tabela
+        self.filtros = []
+        self.valores = []
+
+    def select(self, colunas):
+        self.colunas = colunas
+        return self
+
+    def in_(self, coluna, valores):
+        self.filtros.append(f"{coluna} = ANY(%s)")
+        self.valores.append(list(valores))
+        return self
+
+    def gt(self, coluna, valor):
+        self.filtros.append(f"{coluna} > %s")
+        self.valores.append(valor)
+        return self
+
+    def order(self, coluna):
+        self.ordem = coluna
+        return self
+
+    def limit(self, n):
+        self.limite = n
+        return self
+
+    def execute(self):
+        sql = f"SELECT {self.colunas} FROM {self.tabela} WHERE {' AND '.join(self.filtros)} " \
+              f"ORDER BY {self.ordem} LIMIT {self.limite}"
+        with self.conn.cursor() as cur:
+            cur.execute(sql, self.valores)
+            nomes = [d[0] for d in cur.description]
+            return Resposta([dict(zip(nomes, linha)) for linha in cur.fetchall()])
+
+
+class ClientePostgres:
+    def __init__(self, conn, com_rpc=True):
+        self.conn = conn
+        self.com_rpc = com_rpc
+        self.chamadas = []
+
+    def table(self, tabela):
+        self.chamadas.append(tabela)
+        return Consulta(self.conn, tabela)
+
+    def rpc(self, nome, parametros):
+        self.chamadas.append(nome)
+        if not self.com_rpc:
+            raise Exception(f"Could not find the function public.{nome}")
+        conn = self.conn
+
+        class Chamada:
+            def execute(self):
+                with conn.cursor() as cur:
+                    cur.execute(f"SELECT * FROM public.{nome}(%s)", [parametros['links']])
+                    return Resposta([{'link': linha[0]} for linha in cur.fetchall()])
+        return Chamada()
+
+
+@pytest.fixture(scope="module")
+def banco(novo_banco):
+    conn = novo_banco("teste_dedup")
+    with conn.cursor() as cur:
+        cur.execute("CREATE TABLE public.properties (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), "
+                    "link text UNIQUE NOT NULL)")
+        aplicar_migracao(conn, "20251010110000_create_links_desconhecidos_function.sql")
+        cur.execute("INSERT INTO public.properties (link) "
+                    "SELECT 'https://www.vivareal.com.br/imovel/apartamento-' || i || '/' FROM generate_series(0, 2999, 2) i")
+    return conn
+
+
+def links_de(indices):
+    return [f"https://www.vivareal.com.br/imovel/apartamento-{i}/" for i in indices]
+
+
+# Known (even) and new (odd) links, with repeats, spanning several RPC and `in` chunks
+ENTRADA = links_de(range(0, 3000)) + links_de(range(100, 200)) + links_de(range(3000, 3100))
+ESPERADO = set(links_de(range(1, 3000, 2))) | set(links_de(range(3000, 3100)))
+
+
+def test_rpc_links_desconhecidos(banco):
+    cliente = ClientePostgres(banco)
+    assert filtrar_links_novos(cliente, ENTRADA) == ESPERADO
+    assert set(cliente.chamadas) == {'links_desconhecidos'}
+
+
+def test_fallback_in_da_o_mesmo_resultado(banco):
+    cliente = ClientePostgres(banco, com_rpc=False)
+    assert filtrar_links_novos(cliente, ENTRADA) == ESPERADO
+    assert cliente.chamadas.count('properties') > 1
+
+
+def test_paginacao_keyset_do_in(banco):
+    # Pages smaller than the chunk force several `gt(link, ultimo)` requests
+    chunk = links_de(range(0, 60))
+    assert _conhecidos_in(ClientePostgres(banco), chunk, pagina=7) == set(links_de(range(0, 60, 2)))
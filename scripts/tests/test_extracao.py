@@ -0,0 +1,25 @@
+import pytest
+from parsers import BACKENDS, parse_html
+from scraping_utils import extrair_valores, texto_do_anuncio
+
+PRECO = '<div data-testid="price-info"><p data-testid="price-info-value">R$ 500.000</p><p>Condomínio R$ 700</p></div>'
+COMODIDADES = '<ul class="amenities-list"><li>3 quartos</li><li>Piscina</li></ul>'
+
+
+def documento(corpo, backend):
+    return parse_html(f"<html><body>{corpo}</body></html>", backend)
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_escopo_sem_repetir_aninhados(backend):
+    doc = documento(PRECO + COMODIDADES + "<p>Vizinho com 4 banheiros</p>", backend)
+    assert doc.textos_escopo() == [('preco', "R$ 500.000 Condomínio R$ 700"), ('comodidades', "3 quartos Piscina")]
+    dados = extrair_valores(texto_do_anuncio(doc))
+    assert (dados['valor'], dados['dormitorio'], dados['piscina'], dados['banheiro']) == ("500.000", "3", "1", "0")
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_um_so_container_usa_a_pagina_toda(backend):
+    doc = documento(PRECO + "<p>3 quartos 2 banheiros 1 vaga</p>", backend)
+    dados = extrair_valores(texto_do_anuncio(doc))
+    assert (dados['valor'], dados['dormitorio'], dados['banheiro'], dados['vaga']) == ("500.000", "3", "2", "1")
@@ -0,0 +1,14 @@
+import os
+from html_cache import HtmlCache
+
+
+def test_limite_respeitado_durante_o_crawl(tmp_path):
+    limite = 200 * 1024
+    with HtmlCache(str(tmp_path), limite_bytes=limite) as cache:
+        for i in range(300):
+            # Random bytes do not compress, so each page costs about 4 KB on disk
+            cache.guardar(f"https://www.vivareal.com.br/imovel/apartamento-{i}/", os.urandom(2048).hex())
+            assert cache.tamanho() <= limite + cache.limpar_a_cada
+        # The most recent pages are the ones kept
+        assert cache.obter("https://www.vivareal.com.br/imovel/apartamento-299/") is not None
+        assert cache.obter("https://www.vivareal.com.br/imovel/apartamento-0/") is None
@@ -0,0 +1,69 @@
+import pytest
+from async_engine import rodar_crawl
+from http_fetch import criar_cliente_http, extrair_bruto_de_json, extrair_de_json, extrair_informacoes_http
+from parsers import BACKENDS, parse_html
+from pipeline import parsear_pagina
+from scraping_utils import extrair_valores, texto_do_anuncio, get_address_from_soup, montar_registro
+
+COM_JSON = ["apartamento-next-data", "casa-de-condominio-ld-json"]
+SEM_JSON = "cobertura-sem-json"
+
+
+def registro_dom(url, html, backend):
+    doc = parse_html(html, backend)
+    return montar_registro(url, extrair_valores(texto_do_anuncio(doc)), get_address_from_soup(doc))
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    with criar_cliente_http() as cliente:
+        yield cliente
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+@pytest.mark.parametrize("nome", COM_JSON)
+def test_json_igual_ao_dom(servidor, cliente, pagina, nome, backend):
+    url = f"{servidor}/imovel/{nome}/"
+    assert extrair_informacoes_http(url, cliente) == registro_dom(url, pagina(nome), backend)
+
+
+def test_campos_do_next_data(servidor, cliente):
+    url = f"{servidor}/imovel/apartamento-next-data/"
+    registro = extrair_informacoes_http(url, cliente)
+    assert registro['valor'] == 850000.0
+    assert registro['area_privativa'] == 72.0
+    assert (registro['dormitorio'], registro['banheiro'], registro['vaga'], registro['suite']) == (2, 2, 1, 1)
+    assert registro['andar'] == "5"
+    assert (registro['piscina'], registro['varanda'], registro['elevador']) == (True, False, True)
+    assert (registro['rua'], registro['bairro'], registro['cidade'], registro['uf']) == \
+        ("Rua Exemplo, 100", "Santa Maria", "Santos", "SP")
+    assert registro['tipo'] == "apartamento"
+
+
+def test_sem_json_devolve_none(servidor, cliente, pagina):
+    assert extrair_bruto_de_json(pagina(SEM_JSON)) is None
+    assert extrair_informacoes_http(f"{servidor}/imovel/{SEM_JSON}/", cliente) is None
+
+
+def test_sem_json_lido_pelo_dom(pagina):
+    url = f"http://exemplo/imovel/{SEM_JSON}/"
+    registro = parsear_pagina(url, pagina(SEM_JSON))
+    assert registro == registro_dom(url, pagina(SEM_JSON), 'bs4')
+    assert registro['valor'] == 2400000.0
+    assert (registro['dormitorio'], registro['banheiro'], registro['vaga'], registro['suite']) == (4, 5, 3, 2)
+    assert registro['tipo'] == "cobertura"
+
+
+def test_crawl_usa_navegador_so_sem_json(servidor, cliente):
+    urls = [f"{servidor}/imovel/{nome}/" for nome in COM_JSON + [SEM_JSON]]
+    resultados, navegador = {}, []
+
+    def fallback(url):
+        navegador.append(url)
+        return "renderizado"
+
+    rodar_crawl(urls, resultados.__setitem__, taxa_por_host=100, extrair=extrair_de_json, fallback=fallback)
+    assert navegador == [f"{servidor}/imovel/{SEM_JSON}/"]
+    assert resultados[navegador[0]] == "renderizado"
+    for url in urls[:2]:
+        assert resultados[url] == extrair_informacoes_http(url, cliente)
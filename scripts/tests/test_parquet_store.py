@@ -0,0 +1,43 @@
+import json
+import pytest
+import parquet_store
+from fake_supabase import SupabaseEmMemoria
+from upsert_writer import UpsertWriter
+from excel_export import exportar_parcial
+
+if parquet_store.pa is None:
+    pytest.skip("pyarrow não instalado", allow_module_level=True)
+
+
+def registros(n):
+    return [{'link': f"https://www.vivareal.com.br/imovel/apartamento-{i}/", 'valor': 500000 + i, 'dormitorio': 2,
+             'cidade': 'Santos', 'uf': 'SP', 'data': '2025-10-16'} for i in range(n)]
+
+
+def test_lotes_gravados_entram_uma_vez(tmp_path):
+    diretorio = str(tmp_path / "dados_parquet")
+    parquet = parquet_store.escritor_do_job(diretorio)
+
+    def ao_concluir_lote(lote, sucesso):
+        if sucesso:
+            parquet.adicionar_lote(lote)
+
+    parcial = tmp_path / "parcial.jsonl"
+    with UpsertWriter(SupabaseEmMemoria(), ao_concluir_lote=ao_concluir_lote, intervalo=0.05) as writer, \
+            parcial.open('w', encoding='utf-8') as f:
+        for registro in registros(120):
+            f.write(json.dumps(registro) + "\n")
+            writer.adicionar(registro)
+    assert parquet_store.finalizar_escritor(parquet) == 120
+
+    # Writing the workbook again (as after a failed export) leaves the dataset alone
+    for _ in range(2):
+        exportar_parcial(str(parcial), str(tmp_path / "resultados.xlsx"), remover=False)
+    assert parquet_store.abrir(diretorio).count_rows() == 120
+
+
+def test_sem_lotes_nao_cria_arquivos(tmp_path):
+    diretorio = tmp_path / "dados_parquet"
+    assert parquet_store.finalizar_escritor(parquet_store.escritor_do_job(str(diretorio))) == 0
+    assert parquet_store.finalizar_escritor(None) == 0
+    assert not diretorio.exists()
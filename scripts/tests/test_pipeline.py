@@ -0,0 +1,89 @@
+import threading
+from http_fetch import extrair_de_json
+from pipeline import Pipeline, parsear_pagina
+
+COM_JSON = "apartamento-next-data"
+SEM_JSON = "cobertura-sem-json"
+
+
+def url_de(nome):
+    return f"http://exemplo/imovel/{nome}/"
+
+
+def rodar(pagina, envios, navegador=None):
+    """Run the pipeline over (nome, html) pairs; returns ({url: dados}, urls opened in the browser)."""
+    gravados, abertos, lock = {}, [], threading.Lock()
+
+    def abrir(url):
+        with lock:
+            abertos.append(url)
+        return pagina(url.rstrip('/').rsplit('/', 1)[-1])
+
+    def produzir(enviar):
+        for nome, html in envios:
+            enviar(url_de(nome), html)
+
+    pipeline = Pipeline(gravados.__setitem__, processos=2, navegador=abrir if navegador else None)
+    pipeline.executar(produzir)
+    return gravados, abertos
+
+
+def test_pagina_sem_json_vai_ao_navegador(pagina):
+    gravados, abertos = rodar(pagina, [(COM_JSON, pagina(COM_JSON)), (SEM_JSON, "<html><body>carregando</body></html>")],
+                              navegador=True)
+    assert abertos == [url_de(SEM_JSON)]
+    assert gravados[url_de(COM_JSON)] == extrair_de_json(pagina(COM_JSON), url_de(COM_JSON))
+    # The DOM is read from the page the browser returned, not from the plain HTTP one
+    assert gravados[url_de(SEM_JSON)] == parsear_pagina(url_de(SEM_JSON), pagina(SEM_JSON))
+    assert gravados[url_de(SEM_JSON)]['valor'] == 2400000.0
+
+
+def test_falha_http_nao_vai_ao_navegador(pagina):
+    gravados, abertos = rodar(pagina, [(SEM_JSON, None)], navegador=True)
+    assert abertos == []
+    assert gravados[url_de(SEM_JSON)] is None
+
+
+def test_404_nao_gera_registro(servidor, pagina):
+    from async_engine import rodar_crawl
+    urls = [f"{servidor}/imovel/{nome}/" for nome in (COM_JSON, "anuncio-removido")]
+    gravados, abertos, falhas = {}, [], []
+
+    def abrir(url):
+        abertos.append(url)
+        return "<html><body><h1>Página não encontrada</h1></body></html>"
+
+    pipeline = Pipeline(gravados.__setitem__, processos=2, navegador=abrir)
+    pipeline.executar(lambda enviar: rodar_crawl(urls, enviar, taxa_por_host=100, extrair=None,
+                                                 ao_falhar=lambda url, erro: falhas.append(url)))
+    assert falhas == [urls[1]]
+    assert abertos == []
+    assert gravados[urls[1]] is None
+    assert gravados[urls[0]]['valor'] == 850000.0
+
+
+def test_sem_navegador_le_o_dom(pagina):
+    gravados, abertos = rodar(pagina, [(SEM_JSON, pagina(SEM_JSON)), (COM_JSON, None)])
+    assert abertos == []
+    assert gravados[url_de(SEM_JSON)]['valor'] == 2400000.0
+    assert gravados[url_de(COM_JSON)] is None
+
+
+def test_fila_cheia_nao_trava_o_event_loop(servidor):
+    import time
+    from async_engine import rodar_crawl
+    urls = [f"{servidor}/imovel/{nome}/" for nome in (COM_JSON, SEM_JSON, "casa-de-condominio-ld-json")]
+    liberar, chegadas = threading.Event(), []
+
+    def ao_concluir(url, html):
+        chegadas.append(url)
+        if len(chegadas) == 1:
+            # Stands for a put on a full queue; the other pages must still be fetched meanwhile
+            liberar.wait(5)
+        elif len(chegadas) == len(urls):
+            liberar.set()
+
+    inicio = time.monotonic()
+    rodar_crawl(urls, ao_concluir, taxa_por_host=100, extrair=None)
+    assert sorted(chegadas) == sorted(urls)
+    assert time.monotonic() - inicio < 4
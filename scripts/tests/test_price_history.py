@@ -0,0 +1,46 @@
+import pytest
+from conftest import aplicar_migracao
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+LINK = "https://www.vivareal.com.br/imovel/apartamento-1/"
+
+
+def _banco_com_valor(novo_banco, tipo):
+    """Minimal `properties` with `valor` of the given type and the price history migration."""
+    conn = novo_banco("teste_historico")
+    with conn.cursor() as cur:
+        cur.execute("CREATE TABLE public.properties (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), "
+                    f"link text UNIQUE NOT NULL, valor {tipo})")
+        cur.execute("ALTER TABLE public.properties ENABLE ROW LEVEL SECURITY")
+        aplicar_migracao(conn, "20251014100000_add_content_hash_and_price_history.sql")
+    return conn
+
+
+def _historico(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT valor_anterior, valor FROM public.property_price_history ORDER BY id")
+        return cur.fetchall()
+
+
+@pytest.mark.parametrize("tipo,inicial,novo", [
+    # Before 20251018 is finalized the scrapers store JSON numbers and BR-formatted text
+    ("text", "1.500.000", "850000.0"),
+    ("numeric(12,2)", 1500000, 850000),
+])
+def test_alteracao_de_preco_vai_para_o_historico(novo_banco, tipo, inicial, novo):
+    conn = _banco_com_valor(novo_banco, tipo)
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO public.properties (link, valor) VALUES (%s, %s)", [LINK, inicial])
+        cur.execute("UPDATE public.properties SET valor = %s WHERE link = %s", [novo, LINK])
+        # Same price again: no new history row
+        cur.execute("UPDATE public.properties SET valor = %s WHERE link = %s", [novo, LINK])
+    assert _historico(conn) == [(1500000, 850000)]
+
+
+def test_preco_ilegivel_vira_nulo(novo_banco):
+    conn = _banco_com_valor(novo_banco, "text")
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO public.properties (link, valor) VALUES (%s, 'Sob consulta')", [LINK])
+        cur.execute("UPDATE public.properties SET valor = 'R$ 920.000' WHERE link = %s", [LINK])
+    assert _historico(conn) == [(None, 920000)]
@@ -0,0 +1,171 @@
+import threading
+import pytest
+from conftest import aplicar_migracao
+from work_queue import FilaDistribuida
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+
+@pytest.fixture(scope="module")
+def banco(novo_banco):
+    conn = novo_banco("teste_fila")
+    with conn.cursor() as cur:
+        cur.execute("CREATE TABLE public.scraping_jobs (id uuid PRIMARY KEY DEFAULT gen_random_uuid(), "
+                    "status text DEFAULT 'running', properties_scraped integer DEFAULT 0, "
+                    "properties_failed integer DEFAULT 0, heartbeat_at timestamptz, completed_at timestamptz)")
+        aplicar_migracao(conn, "20251013100000_create_crawl_queue.sql")
+    return conn
+
+
+@pytest.fixture(scope="module")
+def dsn_banco(banco, dsn_postgres):
+    """DSN of the test database, for tests that need more than one connection."""
+    return psycopg2.extensions.make_dsn(dsn_postgres, dbname=banco.info.dbname)
+
+
+@pytest.fixture
+def job(banco):
+    """A running job with 'u0'..'u9' queued; returns a function running one SQL statement."""
+    def sql(consulta, *parametros):
+        with banco.cursor() as cur:
+            cur.execute(consulta, parametros)
+            return cur.fetchall() if cur.description else None
+
+    job_id = sql("INSERT INTO public.scraping_jobs DEFAULT VALUES RETURNING id")[0][0]
+    sql("INSERT INTO public.crawl_queue (job_id, url) SELECT %s, 'u' || i FROM generate_series(0, 9) i", job_id)
+    sql.id = job_id
+    return sql
+
+
+def reivindicar(job, worker, limite=10, max_tentativas=3):
+    return [url for url, in job("SELECT * FROM public.claim_crawl_urls(%s, %s, %s, 120, %s)",
+                                job.id, worker, limite, max_tentativas)]
+
+
+def concluir(job, worker, urls, sucesso, max_tentativas=3):
+    job("SELECT public.finish_crawl_urls(%s, %s, %s, %s, 'erro', %s)", job.id, worker, urls, sucesso, max_tentativas)
+
+
+def expirar(job, urls):
+    job("UPDATE public.crawl_queue SET lease_expires_at = now() - interval '1 second' "
+        "WHERE job_id = %s AND url = ANY(%s)", job.id, urls)
+
+
+def estados(job):
+    return dict(job("SELECT url, state FROM public.crawl_queue WHERE job_id = %s", job.id))
+
+
+def test_reivindicacoes_concorrentes_nao_repetem_urls(banco, dsn_banco):
+    with banco.cursor() as cur:
+        cur.execute("INSERT INTO public.scraping_jobs DEFAULT VALUES RETURNING id")
+        job_id = cur.fetchone()[0]
+        cur.execute("INSERT INTO public.crawl_queue (job_id, url) SELECT %s, 'u' || i FROM generate_series(1, 2000) i",
+                    [job_id])
+    recebidas = {}
+    largada = threading.Barrier(8)
+
+    def worker(nome):
+        conn = psycopg2.connect(dsn_banco)
+        conn.autocommit = True
+        recebidas[nome] = []
+        largada.wait()
+        with conn.cursor() as cur:
+            while True:
+                cur.execute("SELECT * FROM public.claim_crawl_urls(%s, %s, 25)", [job_id, nome])
+                urls = [url for url, in cur.fetchall()]
+                if not urls:
+                    break
+                recebidas[nome] += urls
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    todas = [url for urls in recebidas.values() for url in urls]
+    assert len(todas) == len(set(todas)) == 2000
+    # SKIP LOCKED lets the workers run side by side instead of one taking everything
+    assert sum(1 for urls in recebidas.values() if urls) > 1
+
+
+def test_lease_expirado_e_reivindicado_por_outro(job):
+    urls = reivindicar(job, "a", limite=3)
+    assert set(reivindicar(job, "b")) == set(estados(job)) - set(urls)
+    assert reivindicar(job, "b") == []
+    expirar(job, urls)
+    assert sorted(reivindicar(job, "b")) == sorted(urls)
+    # The first worker lost the lease, so its late finish changes nothing
+    concluir(job, "a", urls, True)
+    assert {estados(job)[u] for u in urls} == {'leased'}
+    assert job("SELECT DISTINCT attempts FROM public.crawl_queue WHERE url = ANY(%s) AND job_id = %s",
+               urls, job.id) == [(2,)]
+
+
+def test_falha_volta_para_a_fila_ate_max_tentativas(job):
+    for tentativa in range(1, 4):
+        urls = reivindicar(job, "a", max_tentativas=3)
+        assert len(urls) == 10
+        concluir(job, "a", urls, False, max_tentativas=3)
+        assert set(estados(job).values()) == {'failed' if tentativa == 3 else 'pending'}
+    assert reivindicar(job, "a", max_tentativas=3) == []
+
+
+def test_sync_conclui_o_job(job):
+    urls = reivindicar(job, "a")
+    concluir(job, "a", urls[:8], True)
+    concluir(job, "a", urls[8:9], False, max_tentativas=1)
+    assert job("SELECT public.sync_crawl_job(%s, 1)", job.id) == [('running',)]
+    # The last lease expired on its final attempt and is swept as failed
+    expirar(job, urls[9:])
+    assert job("SELECT public.sync_crawl_job(%s, 1)", job.id) == [('completed',)]
+    assert job("SELECT properties_scraped, properties_failed, completed_at IS NOT NULL "
+               "FROM public.scraping_jobs WHERE id = %s", job.id) == [(8, 2, True)]
+
+
+class Resposta:
+    def __init__(self, data):
+        self.data = data
+
+
+class ClientePostgres:
+    """`supabase.rpc(...).execute()` run on the test database, one connection per call like PostgREST."""
+
+    def __init__(self, dsn):
+        self.dsn = dsn
+
+    def rpc(self, nome, parametros):
+        dsn = self.dsn
+
+        class Chamada:
+            def execute(self):
+                conn = psycopg2.connect(dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    argumentos = ", ".join(f"{chave} => %s" for chave in parametros)
+                    cur.execute(f"SELECT * FROM public.{nome}({argumentos})", list(parametros.values()))
+                    linhas = cur.fetchall() if cur.description else []
+                conn.close()
+                if nome == 'claim_crawl_urls':
+                    return Resposta([{'url': url} for url, in linhas])
+                return Resposta(linhas[0][0] if linhas else None)
+        return Chamada()
+
+
+def test_worker_espera_as_urls_de_outro_worker(dsn_banco, job):
+    cliente = ClientePostgres(dsn_banco)
+    with FilaDistribuida(cliente, job.id, lease=3) as a, FilaDistribuida(cliente, job.id, lease=3) as b:
+        urls = a.proximo_lote(10)
+        resultado = {}
+        t = threading.Thread(target=lambda: resultado.setdefault('b', b.proximo_lote(10)))
+        t.start()
+        t.join(1.5)
+        # Nothing is pending, but the job is not over while `a` holds leases
+        assert t.is_alive()
+        a.concluir(urls[:5], True)
+        a.concluir(urls[5:], False, "erro")
+        t.join(10)
+        assert sorted(resultado['b']) == sorted(urls[5:])
+        b.concluir(resultado['b'], True)
+        assert a.proximo_lote(10) == [] and b.proximo_lote(10) == []
+    assert set(estados(job).values()) == {'done'}
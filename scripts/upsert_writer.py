@@ -0,0 +1,165 @@
+import json
+import time
+import queue
+import random
+import threading
+from colorama import Fore
+from dedup import hashes_armazenados
+from stage_metrics import medir
+
+_FIM = object()
+
+
+class UpsertWriter:
+    """Streams records into Supabase from a background thread.
+
+    Records are buffered and flushed when the batch is full or `intervalo`
+    seconds have passed since the first buffered record. The batch size
+    adapts to the measured round trip: it doubles while upserts return well
+    under `latencia_alvo` and halves when they go over it. Failed batches are
+    retried with exponential backoff; batches that still fail are appended to
+    `arquivo_falhas` (JSON lines) so they can be replayed later.
+    `ao_concluir_lote(lote, sucesso)` is called once per batch either way.
+
+    With `detectar_alteracoes`, each batch is first checked against the
+    stored `content_hash` of its links in one RPC, and records whose hash
+    did not change are skipped (counted in `inalterados`) instead of being
+    rewritten.
+
+    `metricas` (a MetricasEstagios) receives the duration of every hash
+    lookup, upsert attempt and retry wait.
+    """
+
+    def __init__(self, supabase, tabela='properties', on_conflict='link', lote=50, lote_min=10,
+                 lote_max=500, intervalo=5.0, latencia_alvo=1.0, tentativas=5, arquivo_falhas=None,
+                 ao_gravar=None, ao_repetir=None, ao_concluir_lote=None, detectar_alteracoes=False, capacidade=5000,
+                 metricas=None):
+        self.supabase = supabase
+        self.tabela = tabela
+        self.on_conflict = on_conflict
+        self.lote = lote
+        self.lote_min = lote_min
+        self.lote_max = lote_max
+        self.intervalo = intervalo
+        self.latencia_alvo = latencia_alvo
+        self.tentativas = tentativas
+        self.arquivo_falhas = arquivo_falhas
+        self.ao_gravar = ao_gravar
+        self.ao_repetir = ao_repetir
+        self.ao_concluir_lote = ao_concluir_lote
+        self.detectar_alteracoes = detectar_alteracoes
+        self.metricas = metricas
+        self.gravados = 0
+        self.inalterados = 0
+        self.lotes = 0
+        self.falhas = 0
+        # Bounded so a slow database pauses the producers instead of growing memory
+        self._fila = queue.Queue(maxsize=capacidade)
+        self._thread = threading.Thread(target=self._executar, name="upsert-writer", daemon=True)
+        self._thread.start()
+
+    def adicionar(self, registro):
+        self._fila.put(registro)
+
+    def _ajustar_lote(self, latencia):
+        if latencia < self.latencia_alvo / 2:
+            self.lote = min(self.lote * 2, self.lote_max)
+        elif latencia > self.latencia_alvo:
+            self.lote = max(self.lote // 2, self.lote_min)
+
+    def _filtrar_inalterados(self, lote):
+        try:
+            with medir(self.metricas, 'supabase_hashes'):
+                armazenados = hashes_armazenados(self.supabase, [r[self.on_conflict] for r in lote])
+        except Exception as e:
+            print(Fore.YELLOW + f"\nNão foi possível comparar hashes, gravando o lote inteiro: {e}")
+            return lote
+        alterados, inalterados = [], []
+        for registro in lote:
+            mudou = armazenados.get(registro[self.on_conflict]) != registro.get('content_hash')
+            (alterados if mudou else inalterados).append(registro)
+        if inalterados:
+            self.inalterados += len(inalterados)
+            # Skipped records are already up to date, so they count as confirmed
+            self._notificar_lote(inalterados, True)
+        return alterados
+
+    def _enviar(self, lote):
+        if self.detectar_alteracoes:
+            lote = self._filtrar_inalterados(lote)
+            if not lote:
+                return
+        for tentativa in range(1, self.tentativas + 1):
+            inicio = time.monotonic()
+            try:
+                with medir(self.metricas, 'supabase_upsert'):
+                    self.supabase.table(self.tabela).upsert(lote, on_conflict=self.on_conflict).execute()
+            except Exception as e:
+                if tentativa == self.tentativas:
+                    print(Fore.RED + f"\nErro ao inserir/atualizar lote no banco após {tentativa} tentativas: {e}")
+                    self._registrar_falha(lote)
+                    self._notificar_lote(lote, False)
+                    return
+                if self.ao_repetir:
+                    self.ao_repetir()
+                with medir(self.metricas, 'backoff_upsert'):
+                    time.sleep(min(2 ** tentativa, 30) + random.uniform(0, 1))
+                continue
+            self._ajustar_lote(time.monotonic() - inicio)
+            self.gravados += len(lote)
+            self.lotes += 1
+            self._notificar_lote(lote, True)
+            if self.ao_gravar:
+                try:
+                    self.ao_gravar(self.gravados)
+                except Exception as e:
+                    print(Fore.RED + f"\nErro ao atualizar progresso: {e}")
+            return
+
+    def _notificar_lote(self, lote, sucesso):
+        if self.ao_concluir_lote:
+            try:
+                self.ao_concluir_lote(lote, sucesso)
+            except Exception as e:
+                print(Fore.RED + f"\nErro ao registrar lote: {e}")
+
+    def _registrar_falha(self, lote):
+        self.falhas += len(lote)
+        if not self.arquivo_falhas:
+            return
+        with open(self.arquivo_falhas, 'a', encoding='utf-8') as f:
+            for registro in lote:
+                f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+
+    def _executar(self):
+        buffer = []
+        prazo = None
+        while True:
+            espera = None if prazo is None else max(prazo - time.monotonic(), 0)
+            try:
+                item = self._fila.get(timeout=espera)
+            except queue.Empty:
+                item = None
+            if item is _FIM:
+                break
+            if item is not None:
+                buffer.append(item)
+                if prazo is None:
+                    prazo = time.monotonic() + self.intervalo
+            if buffer and (len(buffer) >= self.lote or time.monotonic() >= prazo):
+                self._enviar(buffer)
+                buffer, prazo = [], None
+        while buffer:
+            self._enviar(buffer[:self.lote])
+            buffer = buffer[self.lote:]
+
+    def fechar(self):
+        """Flush what is left and wait for the background thread."""
+        self._fila.put(_FIM)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
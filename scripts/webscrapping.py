@@ -1,23 +1,29 @@
 import os
-import re
 import time
 import json
-import random
-import pandas as pd
+import argparse
 from tqdm import tqdm
-from bs4 import BeautifulSoup
 from colorama import init, Fore, Style
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 from supabase import create_client, Client
 from dotenv import load_dotenv
-from urllib.parse import urlparse, urlunparse
-import concurrent.futures
+from browser_pool import BrowserPool, chromedriver_path, baixar_pagina
+from async_engine import rodar_crawl
+from pipeline import Pipeline, baixar_com_threads
+from upsert_writer import UpsertWriter
+from progress_reporter import ProgressReporter
+from dedup import filtrar_links_novos
+from html_cache import HtmlCache
+from listing_discovery import descobrir_links
+from work_queue import enfileirar_urls
+from frontier import Frontier, EM_ANDAMENTO, CONCLUIDO, FALHOU
+from scraping_utils import limpar_console, human_sleep, normalize_url
+from excel_export import exportar_em_segundo_plano
+from parquet_store import escritor_do_job, finalizar_escritor
+from stage_metrics import MetricasEstagios, medir
 
 
 # ====== CONFIGURAÇÃO ======
@@ -26,149 +32,53 @@ load_dotenv()
 
 URL_LISTAGEM = "https://www.vivareal.com.br/venda/sp/santos/bairros/santa-maria/apartamento_residencial/?transacao=venda&onde=%2CS%C3%A3o+Paulo%2CSantos%2C%2CSanta+Maria%2C%2C%2Cneighborhood%2CBR%3ESao+Paulo%3ENULL%3ESantos%3EBarrios%3ESanta+Maria%2C-23.940526%2C-46.370098%2C%3B%2CS%C3%A3o+Paulo%2CSantos%2C%2CAreia+Branca%2C%2C%2Cneighborhood%2CBR%3ESao+Paulo%3ENULL%3ESantos%3EBarrios%3EAreia+Branca%2C-23.946714%2C-46.373514%2C&tipos=apartamento_residencial&areaMaxima=132&areaMinima=33"
 
+# Reads listing data from the page's embedded JSON; Selenium only when it is missing
+MODO_HTTP = True
+MAX_EM_VOO = 100       # concurrent HTTP requests held by the async engine
+TAXA_POR_HOST = 4.0    # requests/s allowed per host (token bucket)
+
 SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('VITE_SUPABASE_ANON_KEY')
+# Upserts update existing listings, which only the service_role key may do
+SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
 
 if not SUPABASE_URL or not SUPABASE_KEY:
-    print(Fore.RED + "ERRO: Variáveis de ambiente do Supabase não encontradas!")
+    print(Fore.RED + "ERRO: defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY para gravar no banco.")
     exit(1)
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-# ====== FUNÇÕES AUXILIARES ======
-def limpar_console():
-    os.system("cls" if os.name == "nt" else "clear")
-
-def human_sleep(a=0.6, b=1.2):
-    time.sleep(random.uniform(a, b))
-
-def normalize_url(url: str) -> str:
-    """Remove query parameters and fragments to create a canonical URL."""
-    if not url:
-        return ""
-    parsed = urlparse(url)
-    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', '', ''))
-
-def extrair_tipo_imovel(url: str) -> str:
-    PREFIXOS = [
-        # Commercial Types
-        'consultorio', 'galpao-deposito-armazem', 'imovel-comercial',
-        'ponto-comercial', 'sala-comercial', 'predio-comercial',
-        # Residential Types
-        'edificio-residencial', 'casa-de-condominio', 'fazenda---sitio',
-        'lote-terreno', 'apartamento', 'cobertura', 'sobrado',
-        'kitnet', 'flat', 'casa'
-    ]
-    try:
-        path = urlparse(url).path
-        segmento = path.split('/imovel/')[1]
-        for prefixo in PREFIXOS:
-            if segmento.startswith(prefixo):
-                return 'casa isolada' if prefixo == 'casa' else prefixo.replace('-', ' ')
-        return 'nao informado'
-    except (IndexError, AttributeError):
-        return 'nao informado'
-
-def to_int(value_str, default=0):
-    if not value_str: return default
-    try:
-        return int(re.sub(r'[^\d]', '', value_str))
-    except (ValueError, TypeError):
-        return default
-
-def to_float(value_str, default=0.0):
-    if not value_str: return default
-    try:
-        # Handles formats like "1.500,50" or "1500"
-        cleaned_str = re.sub(r'[^\d,]', '', value_str).replace(',', '.')
-        return float(cleaned_str)
-    except (ValueError, TypeError):
-        return default
-
-def to_bool(value_str):
-    return value_str == "1"
-
-def extrair_valores(texto):
-    dados = {}
-    preco_match = re.search(r"R\$\s*([\d\.\,]+)", texto)
-    dados['valor'] = preco_match.group(1).strip() if preco_match else "0"
-    metragem_match = re.search(r"([\d\.,]+)\s*m²", texto, re.IGNORECASE)
-    dados['area_privativa'] = metragem_match.group(1) if metragem_match else "0"
-    quartos_match = re.search(r"(\d+)\s*quartos?", texto, re.IGNORECASE)
-    dados['dormitorio'] = quartos_match.group(1) if quartos_match else "0"
-    banheiros_match = re.search(r"(\d+)\s*banheiros?", texto, re.IGNORECASE)
-    dados['banheiro'] = banheiros_match.group(1) if banheiros_match else "0"
-    vagas_match = re.search(r"(\d+)\s*vagas?", texto, re.IGNORECASE)
-    dados['vaga'] = vagas_match.group(1) if vagas_match else "0"
-    suites_match = re.search(r"(\d+)\s*suítes?", texto, re.IGNORECASE)
-    dados['suite'] = suites_match.group(1) if suites_match else "0"
-    andar_match = re.search(r"(\d+)(?:º)?\s*andar", texto, re.IGNORECASE)
-    dados['andar'] = andar_match.group(1) if andar_match else "0"
-    dados['piscina'] = "1" if re.search(r"piscinas?", texto, re.IGNORECASE) else "0"
-    dados['varanda'] = "1" if re.search(r"varandas?", texto, re.IGNORECASE) else "0"
-    dados['elevador'] = "1" if re.search(r"elevador", texto, re.IGNORECASE) else "0"
-    return dados
-
-def dividir_endereco(endereco_texto):
-    if not endereco_texto or endereco_texto == "0":
-        return "0", "0", "0", "0"
-    # Matches "Street, Number - Neighborhood, City - UF"
-    m = re.match(r"^(.*?)\s*-\s*(.*?),\s*(.*?)\s*-\s*(.{2})$", endereco_texto)
-    if m:
-        return m.group(1).strip(), m.group(2).strip(), m.group(3).strip(), m.group(4).strip()
-    return endereco_texto, "0", "0", "0"
-
-def get_address_from_soup(soup):
-    for selector in ['p[data-testid="location-address"]', 'div[data-testid="location-address"]', 'span[itemprop="streetAddress"]']:
-        tag = soup.select_one(selector)
-        if tag:
-            return tag.get_text(" ", strip=True)
-    return "0"
-
-def estilizar_excel(nome_arquivo):
-    try:
-        wb = load_workbook(nome_arquivo)
-        ws = wb.active
-        header_fill = PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid")
-        header_font = Font(color="FFFFFF", bold=True)
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        for col in ws.columns:
-            max_length = max(len(str(cell.value)) for cell in col if cell.value)
-            ws.column_dimensions[col[0].column_letter].width = max_length + 2
-        ws.freeze_panes = "A2"
-        wb.save(nome_arquivo)
-    except Exception as e:
-        print(Fore.RED + f"Erro ao estilizar Excel: {e}")
-
 # ====== COLETAR LINKS ======
-def coletar_links_listagem():
+def coletar_links_listagem(metricas=None):
     print(Fore.YELLOW + "Iniciando navegador para coleta de links em todas as páginas...")
     options = webdriver.ChromeOptions()
     options.add_argument("--start-maximized")
     #options.add_argument("--headless")
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    with medir(metricas, 'chrome_inicio'):
+        driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
     
     all_hrefs = set()
     page_count = 1
 
     try:
         print(Fore.CYAN + f"Acessando URL inicial: {URL_LISTAGEM}")
-        driver.get(URL_LISTAGEM)
-        human_sleep(3, 4)
+        with medir(metricas, 'driver_get'):
+            driver.get(URL_LISTAGEM)
+        with medir(metricas, 'espera_fixa'):
+            human_sleep(3, 4)
 
         while True:
             print(f"\n{Fore.CYAN}--- Processando Página {page_count} ---")
             
             # Scroll to ensure all lazy-loaded elements are present
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            human_sleep(1.5, 2.5)
-
-            anchors = driver.find_elements(By.CSS_SELECTOR, "a[href*='/imovel/']")
-            page_hrefs = {a.get_attribute("href") for a in anchors if a.get_attribute("href")}
+            with medir(metricas, 'scroll'):
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            with medir(metricas, 'espera_fixa'):
+                human_sleep(1.5, 2.5)
+
+            with medir(metricas, 'links_da_pagina'):
+                anchors = driver.find_elements(By.CSS_SELECTOR, "a[href*='/imovel/']")
+                page_hrefs = {a.get_attribute("href") for a in anchors if a.get_attribute("href")}
             
             new_links_count = len(page_hrefs - all_hrefs)
             print(f"{Fore.WHITE}Encontrados {len(page_hrefs)} links nesta página ({new_links_count} novos).")
@@ -184,10 +94,12 @@ def coletar_links_listagem():
                     break
                 
                 # Use JavaScript click to avoid interception issues
-                driver.execute_script("arguments[0].click();", next_button)
+                with medir(metricas, 'paginacao'):
+                    driver.execute_script("arguments[0].click();", next_button)
                 print(f"{Fore.YELLOW}Navegando para a página {page_count + 1}...")
                 page_count += 1
-                human_sleep(3, 5) # Wait for new page content
+                with medir(metricas, 'espera_fixa'):
+                    human_sleep(3, 5) # Wait for new page content
 
             except NoSuchElementException:
                 print(Fore.GREEN + "Link 'Próxima página' não encontrado. Fim da navegação.")
@@ -201,153 +113,208 @@ def coletar_links_listagem():
     finally:
         driver.quit()
 
-# ====== EXTRAIR INFORMAÇÕES DE UMA PÁGINA (THREAD-SAFE) ======
-def extrair_informacoes(url):
-    driver = None
-    try:
-        options = webdriver.ChromeOptions()
-        options.add_experimental_option('excludeSwitches', ['enable-logging'])
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        driver.maximize_window()
-        driver.get(url)
-        time.sleep(2)
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(1)
-        
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        texto = soup.get_text(" ", strip=True)
-        
-        dados_brutos = extrair_valores(texto)
-        
-        dados_convertidos = {
-            'valor': to_float(dados_brutos.get('valor')),
-            'area_privativa': to_float(dados_brutos.get('area_privativa')),
-            'dormitorio': to_int(dados_brutos.get('dormitorio')),
-            'banheiro': to_int(dados_brutos.get('banheiro')),
-            'vaga': to_int(dados_brutos.get('vaga')),
-            'suite': to_int(dados_brutos.get('suite')),
-            'andar': dados_brutos.get('andar', '0'), # Keep as text
-            'piscina': to_bool(dados_brutos.get('piscina')),
-            'varanda': to_bool(dados_brutos.get('varanda')),
-            'elevador': to_bool(dados_brutos.get('elevador')),
-            'tipo': extrair_tipo_imovel(url)
-        }
-        
-        endereco = get_address_from_soup(soup)
-        dados_convertidos['endereco_completo'] = endereco
-        rua, bairro, cidade, uf = dividir_endereco(endereco)
-        dados_convertidos.update({'rua': rua, 'bairro': bairro, 'cidade': cidade, 'uf': uf})
-        
-        return dados_convertidos
-    except Exception as e:
-        print(Fore.RED + f"\nErro ao processar {url}: {e}")
-        return None
-    finally:
-        if driver:
-            driver.quit()
+def coletar_links(metricas=None):
+    """Direct page-N discovery over HTTP, falling back to clicking through pages in Chrome."""
+    if MODO_HTTP:
+        print(Fore.YELLOW + "Descobrindo páginas da listagem via HTTP...")
+        try:
+            with medir(metricas, 'descoberta_http'):
+                links = descobrir_links(URL_LISTAGEM, taxa_por_host=TAXA_POR_HOST, metricas=metricas)
+            if links:
+                print(f"\n{Fore.GREEN+Style.BRIGHT}Coleta de links finalizada. Total de links únicos encontrados: {len(links)}")
+                return links
+            print(Fore.YELLOW + "Nenhum link encontrado via HTTP.")
+        except Exception as e:
+            print(Fore.YELLOW + f"Descoberta via HTTP falhou: {e}")
+        print(Fore.YELLOW + "Usando o navegador para paginar a listagem.")
+    return coletar_links_listagem(metricas)
 
 # ====== MAIN ======
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coletor de imóveis do VivaReal.")
+    parser.add_argument("--resume", metavar="JOB_ID", help="Retoma um job interrompido a partir do seu frontier local")
+    parser.add_argument("--distribuido", action="store_true",
+                        help="Só coleta os links e os coloca na fila do banco para `worker.py` processar")
+    parser.add_argument("--url", default=URL_LISTAGEM, help="URL da busca no VivaReal")
+    parser.add_argument("--taxa", type=float, default=TAXA_POR_HOST, help="Requisições por segundo permitidas por host")
+    args = parser.parse_args()
+    URL_LISTAGEM, TAXA_POR_HOST = args.url, args.taxa
+
     limpar_console()
     print(Fore.GREEN + Style.BRIGHT + "=== COLETOR DE DADOS VIVAREAL (Paginado e Paralelo) ===\n")
 
     # Pre-cache the Chrome Driver to avoid race conditions in threads
     print(Fore.YELLOW + "Verificando e instalando o ChromeDriver, se necessário...")
     try:
-        ChromeDriverManager().install()
+        chromedriver_path()
         print(Fore.GREEN + "ChromeDriver está pronto.\n")
     except Exception as e:
         print(Fore.RED + f"Não foi possível instalar o ChromeDriver: {e}")
         exit(1)
 
-    job_id = None
+    job_id = args.resume
+    # Timing of every stage, stored with the job and exported for Prometheus at the end
+    metricas = MetricasEstagios('webscrapping')
 
-    try:
-        job_response = supabase.table('scraping_jobs').insert({
-            'status': 'running', 'started_at': time.strftime('%Y-%m-%d %H:%M:%S')
-        }).execute()
-        job_id = job_response.data[0]['id']
-        print(Fore.GREEN + f"Job de scraping criado com ID: {job_id}\n")
-    except Exception as e:
-        print(Fore.RED + f"Erro ao criar job no Supabase: {e}"); exit(1)
+    if job_id:
+        if not Frontier.existe(job_id):
+            print(Fore.RED + f"Nenhum frontier encontrado para o job {job_id} (frontier_{job_id}.sqlite)."); exit(1)
+        try:
+            supabase.table('scraping_jobs').update({
+                'status': 'running', 'completed_at': None, 'error_message': None
+            }).eq('id', job_id).execute()
+            print(Fore.GREEN + f"Retomando job de scraping {job_id}\n")
+        except Exception as e:
+            print(Fore.RED + f"Erro ao retomar job no Supabase: {e}"); exit(1)
+    else:
+        try:
+            job_response = supabase.table('scraping_jobs').insert({
+                'status': 'running', 'started_at': time.strftime('%Y-%m-%d %H:%M:%S')
+            }).execute()
+            job_id = job_response.data[0]['id']
+            print(Fore.GREEN + f"Job de scraping criado com ID: {job_id}\n")
+        except Exception as e:
+            print(Fore.RED + f"Erro ao criar job no Supabase: {e}"); exit(1)
 
-    try:
-        links_brutos = coletar_links_listagem()
-        
-        print(Fore.MAGENTA + "\n" + "="*50)
-        print(Fore.MAGENTA + "NORMALIZANDO E FILTRANDO DUPLICADOS")
-        print(Fore.MAGENTA + "="*50)
-        
-        links_unicos_scrape = {normalize_url(link) for link in links_brutos}
-        print(f"{Fore.WHITE}Links únicos (normalizados) nesta varredura: {len(links_unicos_scrape)}")
-
-        print(Fore.YELLOW + "Buscando links existentes no banco de dados...")
-        existing_links_response = supabase.table('properties').select('link').execute()
-        
-        existing_links_db = {item['link'] for item in existing_links_response.data} if existing_links_response.data else set()
-        print(f"{Fore.WHITE}Links existentes no banco: {len(existing_links_db)}")
-
-        new_links_to_process = list(links_unicos_scrape - existing_links_db)
-        print(f"{Fore.GREEN+Style.BRIGHT}Total de links NOVOS para processar: {len(new_links_to_process)}\n")
-
-        supabase.table('scraping_jobs').update({
-            'links_found': len(links_brutos), 'new_links_to_process': len(new_links_to_process)
-        }).eq('id', job_id).execute()
-    except Exception as e:
-        print(Fore.RED + f"Erro ao coletar e filtrar links: {e}")
-        supabase.table('scraping_jobs').update({
-            'status': 'failed', 'error_message': str(e), 'completed_at': time.strftime('%Y-%m-%d %H:%M:%S')
-        }).eq('id', job_id).execute(); exit(1)
+    # Checkpoint of every link in the job; lets `--resume` skip what is already in the database
+    frontier = Frontier(job_id)
 
-    all_results = []
-    if not new_links_to_process:
-        print(Fore.GREEN + "Nenhum imóvel novo para adicionar.")
+    if args.resume:
+        new_links_to_process = frontier.pendentes()
+        contagem = frontier.contagem()
+        print(f"{Fore.WHITE}Já gravados neste job: {contagem[CONCLUIDO]}, com falha: {contagem[FALHOU]}")
+        print(f"{Fore.GREEN+Style.BRIGHT}Total de links para retomar: {len(new_links_to_process)}\n")
     else:
-        print(Fore.CYAN + "Iniciando scraping paralelo com 5 workers...")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_url = {executor.submit(extrair_informacoes, url): url for url in new_links_to_process}
-            for future in tqdm(concurrent.futures.as_completed(future_to_url), total=len(new_links_to_process), desc=f"{Fore.CYAN}Processando imóveis", unit="imóvel"):
-                dados = future.result()
-                if dados:
-                    dados['link'] = future_to_url[future]
-                    dados['job_id'] = job_id
-                    all_results.append(dados)
-
-    properties_scraped = 0
-    if all_results:
-        print(f"\n{Fore.YELLOW}Scraping concluído. {len(all_results)} imóveis coletados. Salvando no banco...")
-        BATCH_SIZE = 50
-        for i in tqdm(range(0, len(all_results), BATCH_SIZE), desc=f"{Fore.CYAN}Salvando no Supabase", unit="lote"):
-            batch = all_results[i:i + BATCH_SIZE]
-            try:
-                supabase.table('properties').upsert(
-                    batch, 
-                    on_conflict='link'
-                ).execute()
-                properties_scraped += len(batch)
-                supabase.table('scraping_jobs').update({'properties_scraped': properties_scraped}).eq('id', job_id).execute()
-            except Exception as e:
-                print(Fore.RED + f"\nErro ao inserir/atualizar lote no banco: {e}")
+        try:
+            with medir(metricas, 'coleta_links'):
+                links_brutos = coletar_links(metricas)
+
+            print(Fore.MAGENTA + "\n" + "="*50)
+            print(Fore.MAGENTA + "NORMALIZANDO E FILTRANDO DUPLICADOS")
+            print(Fore.MAGENTA + "="*50)
+
+            links_unicos_scrape = {normalize_url(link) for link in links_brutos}
+            print(f"{Fore.WHITE}Links únicos (normalizados) nesta varredura: {len(links_unicos_scrape)}")
 
-    if all_results:
+            print(Fore.YELLOW + "Consultando quais links já existem no banco de dados...")
+            with medir(metricas, 'supabase_dedup'):
+                new_links_to_process = list(filtrar_links_novos(supabase, links_unicos_scrape))
+            print(f"{Fore.WHITE}Links já existentes no banco: {len(links_unicos_scrape) - len(new_links_to_process)}")
+
+            print(f"{Fore.GREEN+Style.BRIGHT}Total de links NOVOS para processar: {len(new_links_to_process)}\n")
+
+            frontier.adicionar(new_links_to_process)
+            supabase.table('scraping_jobs').update({
+                'links_found': len(links_brutos), 'new_links_to_process': len(new_links_to_process)
+            }).eq('id', job_id).execute()
+        except Exception as e:
+            print(Fore.RED + f"Erro ao coletar e filtrar links: {e}")
+            supabase.table('scraping_jobs').update({
+                'status': 'failed', 'error_message': str(e), 'completed_at': time.strftime('%Y-%m-%d %H:%M:%S')
+            }).eq('id', job_id).execute(); exit(1)
+
+    if args.distribuido:
         try:
-            df = pd.DataFrame(all_results)
-            colunas = ['tipo', 'valor', 'area_privativa', 'dormitorio', 'banheiro', 'vaga', 'suite',
-                       'andar', 'piscina', 'varanda', 'elevador',
-                       'rua', 'bairro', 'cidade', 'uf', 'endereco_completo', 'link']
-            df = df.reindex(columns=colunas, fill_value=0)
-            output_file = f"resultados_{job_id}.xlsx"
-            df.to_excel(output_file, index=False)
-            estilizar_excel(output_file)
-            print(Fore.GREEN + f"\nBackup dos novos imóveis salvo em {output_file}")
+            enfileirar_urls(supabase, job_id, new_links_to_process)
         except Exception as e:
-            print(Fore.RED + f"Erro ao gerar Excel: {e}")
+            print(Fore.RED + f"Erro ao enfileirar links: {e}"); exit(1)
+        frontier.fechar()
+        print(Fore.GREEN + f"{len(new_links_to_process)} links na fila distribuída do job.")
+        print(Fore.YELLOW + f"Inicie um ou mais workers com: python worker.py {job_id}")
+        exit(0)
+
+    # Every record is also appended here as it arrives, so a crash keeps what was scraped
+    arquivo_parcial = f"parcial_{job_id}.jsonl"
+    coletados = 0
+    # Counters are flushed to scraping_jobs in one update every 15 s instead of per batch
+    progresso = ProgressReporter(supabase, job_id, metricas=metricas)
+    contar_repeticao = lambda: progresso.incrementar('retries')
+    ja_gravados = frontier.contagem()[CONCLUIDO]
+    # Only batches stored in the database reach the Parquet dataset, and a resumed run skips them
+    parquet = escritor_do_job()
+
+    def ao_concluir_lote(lote, sucesso):
+        frontier.marcar([registro['link'] for registro in lote], CONCLUIDO if sucesso else FALHOU)
+        if sucesso and parquet:
+            parquet.adicionar_lote(lote)
 
-    try:
-        supabase.table('scraping_jobs').update({
-            'status': 'completed', 'properties_scraped': len(all_results), 'completed_at': time.strftime('%Y-%m-%d %H:%M:%S')
-        }).eq('id', job_id).execute()
-        print(Fore.GREEN + Style.BRIGHT + f"\n✓ Scraping concluído!")
-        print(Fore.CYAN + f"Total de imóveis novos processados: {len(all_results)}")
-    except Exception as e:
-        print(Fore.RED + f"Erro ao finalizar job: {e}")
+    if not new_links_to_process:
+        print(Fore.GREEN + "Nenhum imóvel novo para adicionar.")
+    else:
+        try:
+            with UpsertWriter(supabase, arquivo_falhas=f"falhas_{job_id}.jsonl", ao_repetir=contar_repeticao,
+                              ao_concluir_lote=ao_concluir_lote,
+                              ao_gravar=lambda total: progresso.definir('properties_scraped', ja_gravados + total),
+                              metricas=metricas) as writer, \
+                    open(arquivo_parcial, 'a', encoding='utf-8') as parcial, \
+                    BrowserPool(size=5, metricas=metricas) as pool, \
+                    HtmlCache() as cache, \
+                    tqdm(total=len(new_links_to_process), desc=f"{Fore.CYAN}Processando imóveis", unit="imóvel") as barra:
+                def ao_gravar(url, dados):
+                    progresso.registrar_pagina(dados is not None)
+                    barra.update(1)
+                    barra.set_postfix(fila_html=pipeline.fetch.profundidade(), fila_registros=pipeline.parse.profundidade(),
+                                      lote_db=writer.lote)
+                    if dados:
+                        dados['link'] = url
+                        dados['job_id'] = job_id
+                        parcial.write(json.dumps(dados, ensure_ascii=False) + "\n")
+                        writer.adicionar(dados)
+                    else:
+                        frontier.marcar([url], FALHOU)
+
+                def ao_baixar(url, html):
+                    cache.guardar(url, html)
+                    frontier.marcar([url], EM_ANDAMENTO)
+
+                def produzir(enviar):
+                    # Pages fetched within the cache TTL are parsed again without touching the network
+                    restantes = cache.enviar_cacheados(new_links_to_process, enviar)
+                    if MODO_HTTP:
+                        rodar_crawl(restantes, enviar, max_em_voo=MAX_EM_VOO, taxa_por_host=TAXA_POR_HOST, extrair=None,
+                                    ao_repetir=contar_repeticao, metricas=metricas)
+                    else:
+                        baixar_com_threads(restantes, lambda url: baixar_pagina(url, pool), enviar, workers=5)
+
+                # In HTTP mode, pages without embedded JSON are opened in Chrome by the pipeline
+                pipeline = Pipeline(ao_gravar, ao_baixar=ao_baixar, metricas=metricas,
+                                    navegador=(lambda url: baixar_pagina(url, pool)) if MODO_HTTP else None,
+                                    workers_navegador=pool.size)
+                if MODO_HTTP:
+                    print(Fore.CYAN + f"Iniciando scraping assíncrono ({MAX_EM_VOO} requisições simultâneas, {TAXA_POR_HOST}/s por host)...")
+                else:
+                    print(Fore.CYAN + "Iniciando scraping paralelo com 5 workers...")
+                pipeline.executar(produzir)
+                coletados = pipeline.escrita.ok
+                print(f"\n{Fore.YELLOW}Scraping concluído. {coletados} imóveis coletados. Aguardando gravação no banco...")
+        except BaseException as e:
+            # Anything already upserted is marked done in the frontier, so a resumed run picks up from here
+            progresso.finalizar('failed', error_message=str(e) or type(e).__name__)
+            finalizar_escritor(parquet)
+            frontier.fechar()
+            print(Fore.RED + f"\nScraping interrompido: {e!r}")
+            print(Fore.YELLOW + f"Para continuar de onde parou: python webscrapping.py --resume {job_id}")
+            exit(1)
+        print(Fore.WHITE + pipeline.resumo())
+        print(Fore.WHITE + f"Cache HTML: {cache.acertos} páginas reaproveitadas, {cache.faltas} a baixar")
+        print(Fore.WHITE + f"Banco: {writer.gravados} gravados em {writer.lotes} lotes, {writer.falhas} com falha")
+
+    # The DB write is done; the workbook is written while the job is being finalized
+    exportacao = None
+    if os.path.exists(arquivo_parcial):
+        # The partial file spans every run of a resumed job; only the last record per link is exported
+        exportacao = exportar_em_segundo_plano(arquivo_parcial, f"resultados_{job_id}.xlsx")
+
+    # The frontier holds the totals across every run of this job
+    contagem = frontier.contagem()
+    progresso.definir('properties_scraped', contagem[CONCLUIDO])
+    progresso.definir('properties_failed', contagem[FALHOU])
+    finalizar_escritor(parquet)
+    progresso.finalizar('completed')
+    frontier.fechar()
+    if exportacao:
+        exportacao.join()
+    print(Fore.GREEN + Style.BRIGHT + "\n✓ Scraping concluído!")
+    print(Fore.CYAN + f"Total de imóveis novos processados: {coletados}")
+    if contagem[FALHOU]:
+        print(Fore.YELLOW + f"{contagem[FALHOU]} imóveis falharam; para tentar de novo: python webscrapping.py --resume {job_id}")
@@ -0,0 +1,109 @@
+import os
+import time
+import uuid
+import socket
+import threading
+from colorama import Fore
+
+
+def enfileirar_urls(supabase, job_id, urls, tamanho=1000):
+    """Add `urls` to the job's `crawl_queue`; URLs already queued are left as they are."""
+    urls = list(urls)
+    for i in range(0, len(urls), tamanho):
+        linhas = [{'job_id': job_id, 'url': url} for url in urls[i:i + tamanho]]
+        supabase.table('crawl_queue').upsert(linhas, on_conflict='job_id,url', ignore_duplicates=True).execute()
+
+
+class FilaDistribuida:
+    """One worker's view of a job's `crawl_queue` in Postgres.
+
+    `reivindicar()` leases a batch through `claim_crawl_urls`, which uses
+    `FOR UPDATE SKIP LOCKED`, so any number of workers can pull from the
+    same job without overlap. A background heartbeat renews this worker's
+    leases every `lease / 3` seconds and syncs the job counters; if the
+    process dies, its leases expire and the URLs are claimed by others.
+    `proximo_lote()` keeps a worker on the job until nothing is pending or
+    leased anywhere.
+    """
+
+    def __init__(self, supabase, job_id, worker_id=None, lease=120, max_tentativas=3):
+        self.supabase = supabase
+        self.job_id = job_id
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease = lease
+        self.max_tentativas = max_tentativas
+        self.reivindicados = 0
+        # URLs claimed by this worker and not yet passed to `concluir`
+        self._em_maos = 0
+        self._concluidos = threading.Condition()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _rpc(self, nome, parametros):
+        return self.supabase.rpc(nome, {'p_job_id': self.job_id, **parametros}).execute().data
+
+    def reivindicar(self, limite=200):
+        linhas = self._rpc('claim_crawl_urls', {'p_worker': self.worker_id, 'p_limit': limite,
+                                                'p_lease_seconds': self.lease, 'p_max_attempts': self.max_tentativas})
+        urls = [linha['url'] for linha in linhas or []]
+        self.reivindicados += len(urls)
+        with self._concluidos:
+            self._em_maos += len(urls)
+        return urls
+
+    def proximo_lote(self, limite=200):
+        """Claim the next batch; [] only once the job has no pending or leased URL left.
+
+        An empty claim is not the end of the job: this worker's URLs still in
+        the pipeline may go back to pending, and other workers' leases may
+        expire. So it waits for its own URLs to be concluded, then polls every
+        `lease / 3` seconds while the job is running.
+        """
+        while True:
+            urls = self.reivindicar(limite)
+            if urls:
+                return urls
+            with self._concluidos:
+                if self._em_maos:
+                    self._concluidos.wait_for(lambda: not self._em_maos)
+                    continue
+            if self.sincronizar() != 'running':
+                return []
+            time.sleep(self.lease / 3)
+
+    def concluir(self, urls, sucesso=True, erro=None):
+        """Release leased URLs as done, or back to pending (failed after `max_tentativas`)."""
+        if not urls:
+            return
+        try:
+            self._rpc('finish_crawl_urls', {'p_worker': self.worker_id, 'p_urls': list(urls), 'p_success': sucesso,
+                                            'p_error': erro, 'p_max_attempts': self.max_tentativas})
+        finally:
+            with self._concluidos:
+                self._em_maos -= len(urls)
+                self._concluidos.notify_all()
+
+    def sincronizar(self):
+        """Copy the queue totals into `scraping_jobs`; returns the job status."""
+        return self._rpc('sync_crawl_job', {'p_max_attempts': self.max_tentativas})
+
+    def _heartbeat(self):
+        while not self._parar.wait(self.lease / 3):
+            try:
+                # Leases left behind by a failed `concluir` are not renewed, so they expire and are claimed again
+                if self._em_maos:
+                    self._rpc('renew_crawl_leases', {'p_worker': self.worker_id, 'p_lease_seconds': self.lease})
+                self.sincronizar()
+            except Exception as e:
+                print(Fore.RED + f"\nErro ao renovar leases: {e}")
+
+    def fechar(self):
+        self._parar.set()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
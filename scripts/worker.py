@@ -0,0 +1,87 @@
+import os
+import argparse
+from tqdm import tqdm
+from colorama import init, Fore, Style
+from supabase import create_client, Client
+from dotenv import load_dotenv
+from browser_pool import BrowserPool, baixar_pagina
+from async_engine import rodar_crawl
+from pipeline import Pipeline
+from upsert_writer import UpsertWriter
+from html_cache import HtmlCache
+from work_queue import FilaDistribuida
+from parquet_store import escritor_do_job, finalizar_escritor
+from scraping_utils import limpar_console
+
+# ====== CONFIGURAÇÃO ======
+init(autoreset=True)
+load_dotenv()
+
+MAX_EM_VOO = 100       # concurrent HTTP requests on this node
+TAXA_POR_HOST = 4.0    # requests/s allowed per host on this node (token bucket)
+LOTE_LEASE = 200       # URLs leased per claim
+LEASE_SEGUNDOS = 120   # a lease not renewed within this time goes back to the queue
+
+
+# ====== MAIN ======
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker que processa a fila distribuída de um job.")
+    parser.add_argument("job_id", help="Job criado com `python webscrapping.py --distribuido`")
+    parser.add_argument("--navegadores", type=int, default=2, help="Sessões do Chrome para páginas sem JSON")
+    args = parser.parse_args()
+
+    SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
+    # Upserts update existing listings, which only the service_role key may do
+    SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print(Fore.RED + "ERRO: defina VITE_SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY para gravar no banco.")
+        exit(1)
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    limpar_console()
+    print(Fore.GREEN + Style.BRIGHT + f"=== WORKER DISTRIBUÍDO (job {args.job_id}) ===\n")
+
+    # Each worker appends the batches it stored; the queue hands every URL to a single worker
+    parquet = escritor_do_job()
+
+    def ao_concluir_lote(lote, sucesso):
+        fila.concluir([registro['link'] for registro in lote], sucesso, None if sucesso else "falha ao gravar no banco")
+        if sucesso and parquet:
+            parquet.adicionar_lote(lote)
+
+    with FilaDistribuida(supabase, args.job_id, lease=LEASE_SEGUNDOS) as fila, \
+            UpsertWriter(supabase, arquivo_falhas=f"falhas_{args.job_id}_{fila.worker_id}.jsonl",
+                         ao_concluir_lote=ao_concluir_lote) as writer, \
+            BrowserPool(size=args.navegadores) as pool, \
+            HtmlCache() as cache, \
+            tqdm(desc=f"{Fore.CYAN}Processando imóveis", unit="imóvel") as barra:
+        print(Fore.WHITE + f"Worker {fila.worker_id}")
+
+        def ao_gravar(url, dados):
+            barra.update(1)
+            if dados:
+                dados['link'] = url
+                dados['job_id'] = args.job_id
+                writer.adicionar(dados)
+            else:
+                fila.concluir([url], False, "falha ao baixar ou processar")
+
+        def produzir(enviar):
+            # Waits for this worker's URLs and other workers' leases before leaving the job
+            while True:
+                urls = fila.proximo_lote(LOTE_LEASE)
+                if not urls:
+                    break
+                restantes = cache.enviar_cacheados(urls, enviar)
+                rodar_crawl(restantes, enviar, max_em_voo=MAX_EM_VOO, taxa_por_host=TAXA_POR_HOST, extrair=None)
+
+        # Pages without embedded JSON are opened in Chrome by the pipeline
+        pipeline = Pipeline(ao_gravar, ao_baixar=cache.guardar, navegador=lambda url: baixar_pagina(url, pool),
+                            workers_navegador=pool.size)
+        pipeline.executar(produzir)
+
+    print(Fore.WHITE + "\n" + pipeline.resumo())
+    print(Fore.WHITE + f"Banco: {writer.gravados} gravados em {writer.lotes} lotes, {writer.falhas} com falha")
+    finalizar_escritor(parquet)
+    status = fila.sincronizar()
+    print(Fore.GREEN + Style.BRIGHT + f"\n✓ Worker finalizado: {fila.reivindicados} URLs reivindicadas. Status do job: {status}")
@@ -113,6 +113,9 @@ export function JobsMonitor() {
                       {getStatusLabel(job.status)}
                     </span>
                     <span style={styles.jobId}>ID: {job.id.slice(0, 8)}</span>
+                    {job.search_name && (
+                      <span style={styles.searchName} title={job.search_url ?? undefined}>{job.search_name}</span>
+                    )}
                   </div>
                   <span style={styles.jobDate}>{formatDate(job.created_at)}</span>
                 </div>
@@ -127,8 +130,12 @@ export function JobsMonitor() {
                     <span style={styles.statValue}>{job.properties_scraped}</span>
                   </div>
                   <div style={styles.jobStat}>
-                    <span style={styles.statLabel}>Scrolls</span>
-                    <span style={styles.statValue}>{job.max_scrolls}</span>
+                    <span style={styles.statLabel}>Falhas / Repetições</span>
+                    <span style={styles.statValue}>{job.properties_failed ?? 0} / {job.retries ?? 0}</span>
+                  </div>
+                  <div style={styles.jobStat}>
+                    <span style={styles.statLabel}>Páginas/min</span>
+                    <span style={styles.statValue}>{job.pages_per_minute ?? '-'}</span>
                   </div>
                   <div style={styles.jobStat}>
                     <span style={styles.statLabel}>Duração</span>
@@ -136,6 +143,12 @@ export function JobsMonitor() {
                   </div>
                 </div>
 
+                {job.status === 'running' && job.heartbeat_at && (
+                  <div style={styles.heartbeat}>
+                    Última atualização: {formatDate(job.heartbeat_at)}
+                  </div>
+                )}
+
                 {job.error_message && (
                   <div style={styles.errorMessage}>
                     <strong>Erro:</strong> {job.error_message}
@@ -242,6 +255,11 @@ const styles = {
     color: '#9ca3af',
     fontFamily: 'monospace',
   } as React.CSSProperties,
+  searchName: {
+    fontSize: '12px',
+    fontWeight: 600,
+    color: '#374151',
+  } as React.CSSProperties,
   jobDate: {
     fontSize: '12px',
     color: '#6b7280',
@@ -266,6 +284,11 @@ const styles = {
     fontWeight: 600,
     color: '#1a1a1a',
   } as React.CSSProperties,
+  heartbeat: {
+    marginTop: '12px',
+    fontSize: '12px',
+    color: '#6b7280',
+  } as React.CSSProperties,
   errorMessage: {
     marginTop: '12px',
     padding: '12px',
@@ -1,5 +1,5 @@
 import { supabase } from './supabase'
-import type { Property, ScrapingJob, FilterOptions, PropertyStats, PropertyOld } from '../types/database.types'
+import type { Property, ScrapingJob, FilterOptions, PropertyStats, PropertyOld, MarketSummary, MarketTotals } from '../types/database.types'
 
 const ITEMS_PER_PAGE = 40
 
@@ -56,18 +56,77 @@ const safeParseFloat = (val: string | number | null | undefined): number | null
   return null;
 };
 
+// properties' numeric columns stay text until finalize_typed_columns() runs
+// (migration 20251018100000), and text ranges compare as strings. PostgREST
+// returns numeric columns as JSON numbers, so one row tells which case applies.
+let propertiesTypedCheck: Promise<boolean> | null = null
+
+function propertiesNumericColumnsTyped(): Promise<boolean> {
+  if (!propertiesTypedCheck) {
+    propertiesTypedCheck = (async () => {
+      const { data, error } = await supabase.from('properties').select('valor').not('valor', 'is', null).limit(1)
+      return !error && typeof data?.[0]?.valor === 'number'
+    })()
+  }
+  return propertiesTypedCheck
+}
+
+// Numeric filters for rows fetched without them, while properties is still text
+function matchesNumericFilters(p: Property, filters: FilterOptions): boolean {
+  if (filters.valorMin !== undefined) {
+      const valor = safeParseFloat(p.valor);
+      if (valor === null || valor < filters.valorMin) return false;
+  }
+  if (filters.valorMax !== undefined) {
+      const valor = safeParseFloat(p.valor);
+      if (valor === null || valor > filters.valorMax) return false;
+  }
+  if (filters.areaMin !== undefined) {
+      const area = safeParseFloat(p.area_privativa);
+      if (area === null || area < filters.areaMin) return false;
+  }
+  if (filters.areaMax !== undefined) {
+      const area = safeParseFloat(p.area_privativa);
+      if (area === null || area > filters.areaMax) return false;
+  }
+  if (filters.quartosMin !== undefined) {
+      const quartos = safeParseFloat(p.dormitorio);
+      if (quartos === null || quartos < filters.quartosMin) return false;
+  }
+  if (filters.banheirosMin !== undefined) {
+      const banheiros = safeParseFloat(p.banheiro);
+      if (banheiros === null || banheiros < filters.banheirosMin) return false;
+  }
+  if (filters.vagasMin !== undefined) {
+      const vagas = safeParseFloat(p.vaga);
+      if (vagas === null || vagas < filters.vagasMin) return false;
+  }
+  if (filters.suitesMin !== undefined) {
+      const suites = safeParseFloat(p.suite);
+      if (suites === null || suites < filters.suitesMin) return false;
+  }
+  return true;
+}
+
 export async function fetchProperties(filters: FilterOptions, page: number = 1) {
+  // properties_old was created with numeric columns; properties only after the conversion
+  const propertiesTyped = await propertiesNumericColumnsTyped()
+
   // Base query builder for both tables (without pagination)
   const buildQuery = (table: 'properties' | 'properties_old') => {
     let query = supabase.from(table).select('*')
 
+    // Listings that returned 404/410 on revisit stay in the table but are hidden
+    if (table === 'properties') query = query.eq('ativo', true)
+
     // String, boolean, and date filters that work correctly at the DB level
     if (filters.search) {
       const searchColumn = table === 'properties' ? 'endereco_completo' : 'endereco'
       query = query.or(`${searchColumn}.ilike.%${filters.search}%,bairro.ilike.%${filters.search}%,cidade.ilike.%${filters.search}%`)
     }
     if (filters.estado) query = query.eq('uf', filters.estado)
-    if (filters.cidade) query = query.ilike('cidade', `%${filters.cidade}%`)
+    // Exact match (the dropdown only offers stored values), so the (cidade, valor) style indexes apply
+    if (filters.cidade) query = query.eq('cidade', filters.cidade)
     
     if (filters.bairro && filters.bairro.length > 0) {
       query = query.in('bairro', filters.bairro)
@@ -80,8 +139,17 @@ export async function fetchProperties(filters: FilterOptions, page: number = 1)
     if (filters.dataMin) query = query.gte('data', filters.dataMin)
     if (filters.dataMax) query = query.lte('data', filters.dataMax)
 
-    // Numeric filters (like valor, area, quartos) are removed from here
-    // and will be applied on the client-side after fetching.
+    // Ranges run in the DB only on typed columns; otherwise they are applied after fetching
+    if (table === 'properties' && !propertiesTyped) return query
+
+    if (filters.valorMin !== undefined) query = query.gte('valor', filters.valorMin)
+    if (filters.valorMax !== undefined) query = query.lte('valor', filters.valorMax)
+    if (filters.areaMin !== undefined) query = query.gte('area_privativa', filters.areaMin)
+    if (filters.areaMax !== undefined) query = query.lte('area_privativa', filters.areaMax)
+    if (filters.quartosMin !== undefined) query = query.gte('dormitorio', filters.quartosMin)
+    if (filters.banheirosMin !== undefined) query = query.gte('banheiro', filters.banheirosMin)
+    if (filters.vagasMin !== undefined) query = query.gte('vaga', filters.vagasMin)
+    if (filters.suitesMin !== undefined) query = query.gte('suite', filters.suitesMin)
 
     return query
   }
@@ -92,7 +160,7 @@ export async function fetchProperties(filters: FilterOptions, page: number = 1)
     queriesToRun.push(buildQuery('properties_old'));
   }
 
-  // Fetch ALL matching data from the tables based on non-numeric filters
+  // Fetch ALL matching data from the tables
   const results = await Promise.all(queriesToRun.map(q => q.order('data', { ascending: false })));
 
   // Process results from 'properties' table
@@ -108,49 +176,13 @@ export async function fetchProperties(filters: FilterOptions, page: number = 1)
   }
 
   // Map and add data source identifier
-  const mappedNew: Property[] = (newProperties || []).map(p => ({ ...p, dataSource: 'new' }))
+  let mappedNew: Property[] = (newProperties || []).map(p => ({ ...p, dataSource: 'new' }))
+  if (!propertiesTyped) mappedNew = mappedNew.filter(p => matchesNumericFilters(p, filters))
   const mappedOld: Property[] = (oldProperties || []).map(p => ({ ...mapOldToNew(p), dataSource: 'old' }))
 
   // Combine all data
-  const combinedData = [...mappedNew, ...mappedOld]
+  const filteredData = [...mappedNew, ...mappedOld]
 
-  // Apply numeric filters on the client-side for correct comparison
-  const filteredData = combinedData.filter(p => {
-    if (filters.valorMin !== undefined) {
-        const valor = safeParseFloat(p.valor);
-        if (valor === null || valor < filters.valorMin) return false;
-    }
-    if (filters.valorMax !== undefined) {
-        const valor = safeParseFloat(p.valor);
-        if (valor === null || valor > filters.valorMax) return false;
-    }
-    if (filters.areaMin !== undefined) {
-        const area = safeParseFloat(p.area_privativa);
-        if (area === null || area < filters.areaMin) return false;
-    }
-    if (filters.areaMax !== undefined) {
-        const area = safeParseFloat(p.area_privativa);
-        if (area === null || area > filters.areaMax) return false;
-    }
-    if (filters.quartosMin !== undefined) {
-        const quartos = safeParseFloat(p.dormitorio);
-        if (quartos === null || quartos < filters.quartosMin) return false;
-    }
-    if (filters.banheirosMin !== undefined) {
-        const banheiros = safeParseFloat(p.banheiro);
-        if (banheiros === null || banheiros < filters.banheirosMin) return false;
-    }
-    if (filters.vagasMin !== undefined) {
-        const vagas = safeParseFloat(p.vaga);
-        if (vagas === null || vagas < filters.vagasMin) return false;
-    }
-    if (filters.suitesMin !== undefined) {
-        const suites = safeParseFloat(p.suite);
-        if (suites === null || suites < filters.suitesMin) return false;
-    }
-    return true;
-  });
-  
   // Sort the entire filtered dataset by date
   filteredData.sort((a, b) => new Date(b.data!).getTime() - new Date(a.data!).getTime())
 
@@ -228,7 +260,7 @@ export async function getFilterOptions() {
     { data: propertiesData, error: propertiesError },
     { data: oldPropertiesData, error: oldPropertiesError }
   ] = await Promise.all([
-    supabase.from('properties').select('cidade, bairro, uf, tipo'),
+    supabase.from('market_aggregates').select('cidade, bairro, uf, tipo'),
     supabase.from('properties_old').select('cidade, bairro, uf, tipo')
   ])
 
@@ -262,29 +294,35 @@ export async function getFilterOptions() {
 }
 
 export async function getStats(): Promise<PropertyStats> {
-  const { data, error, count } = await supabase
-    .from('properties')
-    .select('dormitorio, cidade, bairro, piscina, elevador', { count: 'exact' })
+  // Summed in SQL over market_aggregates, so the result is one row however many groups exist
+  const { data, error } = await supabase
+    .from('market_totals')
+    .select('*')
+    .single()
 
   if (error) throw error
 
-  const quartos = data.map(p => parseInt(p.dormitorio || '0') || 0).filter(q => q > 0)
-  const avgQuartos = quartos.length > 0
-    ? quartos.reduce((a, b) => a + b, 0) / quartos.length
-    : 0
-
-  const cidades = new Set(data.map(p => p.cidade).filter(Boolean))
-  const bairros = new Set(data.map(p => p.bairro).filter(Boolean))
-  
-  const propertiesWithPiscina = data.filter(p => p.piscina === true).length
-  const propertiesWithElevador = data.filter(p => p.elevador === true).length
+  const totals = (data || {}) as Partial<MarketTotals>
 
   return {
-    totalProperties: count || 0,
-    totalCidades: cidades.size,
-    totalBairros: bairros.size,
-    avgQuartos: Math.round(avgQuartos * 10) / 10,
-    propertiesWithPiscina,
-    propertiesWithElevador
+    totalProperties: Number(totals.total || 0),
+    totalCidades: Number(totals.cidades || 0),
+    totalBairros: Number(totals.bairros || 0),
+    avgQuartos: Number(totals.dormitorios_medio || 0),
+    propertiesWithPiscina: Number(totals.com_piscina || 0),
+    propertiesWithElevador: Number(totals.com_elevador || 0)
   }
 }
+
+export async function getMarketSummary(cidade?: string): Promise<MarketSummary[]> {
+  let query = supabase
+    .from('market_summary')
+    .select('*')
+    .order('total', { ascending: false })
+
+  if (cidade) query = query.eq('cidade', cidade)
+
+  const { data, error } = await query
+  if (error) throw error
+  return (data || []) as MarketSummary[]
+}
@@ -26,9 +26,21 @@ export interface Property {
   idade_aparente: string | null;
   estado_conservacao: string | null;
   padrao_acabamento: string | null;
+  content_hash?: string | null;
+  last_checked_at?: string | null;
+  ativo?: boolean;
+  delisted_at?: string | null;
   dataSource?: 'new' | 'old';
 }
 
+export interface PropertyPriceHistory {
+  id: number;
+  link: string;
+  valor_anterior: number | null;
+  valor: number | null;
+  alterado_em: string;
+}
+
 export interface PropertyOld {
   id: number;
   tipo?: string;
@@ -63,6 +75,27 @@ export interface ScrapingJob {
   status: 'running' | 'completed' | 'failed';
   total_properties_found: number | null;
   error_message: string | null;
+  links_found: number | null;
+  properties_scraped: number | null;
+  max_scrolls: number | null;
+  started_at: string | null;
+  completed_at: string | null;
+  properties_failed: number | null;
+  retries: number | null;
+  pages_per_minute: number | null;
+  heartbeat_at: string | null;
+  search_name: string | null;
+  search_url: string | null;
+  metrics?: Record<string, StageMetrics> | null;
+}
+
+export interface StageMetrics {
+  n: number;
+  total_s: number;
+  p50_ms: number;
+  p95_ms: number;
+  p99_ms: number;
+  max_ms: number;
 }
 
 export interface FilterOptions {
@@ -95,3 +128,35 @@ export interface PropertyStats {
   propertiesWithPiscina: number;
   propertiesWithElevador: number;
 }
+
+export interface MarketSummary {
+  uf: string;
+  cidade: string;
+  bairro: string;
+  tipo: string;
+  total: number;
+  com_valor: number;
+  valor_medio: number | null;
+  valor_p25: number | null;
+  valor_mediana: number | null;
+  valor_p75: number | null;
+  valor_m2_medio: number | null;
+  valor_m2_p25: number | null;
+  valor_m2_mediana: number | null;
+  valor_m2_p75: number | null;
+  com_dormitorio: number;
+  soma_dormitorio: number;
+  dormitorios_medio: number | null;
+  com_piscina: number;
+  com_elevador: number;
+  atualizado_em: string;
+}
+
+export interface MarketTotals {
+  total: number;
+  cidades: number;
+  bairros: number;
+  dormitorios_medio: number | null;
+  com_piscina: number;
+  com_elevador: number;
+}
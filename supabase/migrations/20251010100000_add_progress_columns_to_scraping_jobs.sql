@@ -0,0 +1,20 @@
+/*
+  # Add progress heartbeat columns to 'scraping_jobs'
+
+  1. Table Modified: `scraping_jobs`
+    - `properties_failed` (integer) - Listings that could not be fetched or parsed
+    - `retries` (integer) - HTTP and database retries performed by the job
+    - `pages_per_minute` (numeric) - Processing throughput at the last heartbeat
+    - `heartbeat_at` (timestamptz) - When the scraper last reported progress
+
+  2. Notes
+    - The scraper now writes these together with `properties_scraped` in a single
+      update every few seconds instead of one update per batch.
+    - No changes to RLS policies are needed as these are data columns.
+*/
+
+ALTER TABLE public.scraping_jobs
+ADD COLUMN IF NOT EXISTS properties_failed integer DEFAULT 0,
+ADD COLUMN IF NOT EXISTS retries integer DEFAULT 0,
+ADD COLUMN IF NOT EXISTS pages_per_minute numeric(10,1) DEFAULT 0,
+ADD COLUMN IF NOT EXISTS heartbeat_at timestamptz;
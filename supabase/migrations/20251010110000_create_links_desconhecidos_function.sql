@@ -0,0 +1,29 @@
+/*
+  # Create 'links_desconhecidos' anti-join function
+
+  1. New Function: `links_desconhecidos(links text[])`
+    - Returns only the links from the given array that are not in `properties`.
+    - Lets the scraper deduplicate a crawl by sending its links in chunks
+      instead of downloading every stored link (which PostgREST also caps
+      at its default row limit).
+    - Uses the unique index on `properties.link` required by the scraper's
+      `upsert(on_conflict='link')`, so each lookup is an index probe.
+
+  2. Security
+    - Runs with the caller's privileges (SECURITY INVOKER); `properties` is
+      already publicly readable through RLS.
+*/
+
+CREATE OR REPLACE FUNCTION public.links_desconhecidos(links text[])
+RETURNS TABLE (link text)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT DISTINCT l.link
+  FROM unnest(links) AS l(link)
+  WHERE NOT EXISTS (
+    SELECT 1 FROM public.properties p WHERE p.link = l.link
+  );
+$$;
+
+GRANT EXECUTE ON FUNCTION public.links_desconhecidos(text[]) TO anon, authenticated;
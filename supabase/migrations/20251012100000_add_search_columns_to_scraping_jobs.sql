@@ -0,0 +1,16 @@
+/*
+  # Add search identification columns to 'scraping_jobs'
+
+  1. Table Modified: `scraping_jobs`
+    - `search_name` (text) - Name of the search in the sweep config
+    - `search_url` (text) - Listing URL the job collected links from
+
+  2. Notes
+    - `sweep.py` creates one job per configured search and fills both columns.
+    - Jobs started by `webscrapping.py` and `manual_scraping.py` leave them NULL.
+    - No changes to RLS policies are needed as these are data columns.
+*/
+
+ALTER TABLE public.scraping_jobs
+ADD COLUMN IF NOT EXISTS search_name text,
+ADD COLUMN IF NOT EXISTS search_url text;
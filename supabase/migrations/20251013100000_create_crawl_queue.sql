@@ -0,0 +1,195 @@
+/*
+  # Create 'crawl_queue' table and lease functions for distributed workers
+
+  1. New Table: `crawl_queue`
+    - One row per (job, url) to be scraped.
+    - `state` is 'pending', 'leased', 'done' or 'failed'.
+    - `lease_owner` / `lease_expires_at` identify the worker holding a leased URL.
+    - `attempts` counts how many times the URL was claimed.
+
+  2. New Functions
+    - `claim_crawl_urls(job, worker, limit, lease_seconds, max_attempts)`
+      Leases up to `limit` URLs that are pending, or whose lease expired,
+      using `FOR UPDATE SKIP LOCKED`. Concurrent workers never block on or
+      receive the same rows, and URLs held by a crashed worker return to
+      the queue when their lease runs out. An expired lease that already
+      used its last attempt is marked failed instead of being left leased.
+    - `renew_crawl_leases(job, worker, lease_seconds)`
+      Heartbeat; extends every lease the worker still holds.
+    - `finish_crawl_urls(job, worker, urls, success, error, max_attempts)`
+      Marks URLs done. Failed URLs go back to pending until they reach
+      `max_attempts`, and are marked failed after that.
+    - `sync_crawl_job(job, max_attempts)`
+      Fails exhausted expired leases the same way, copies the queue totals
+      into `scraping_jobs` and completes the job once nothing is pending or
+      leased.
+
+  3. Security
+    - RLS enabled with public read access only. `webscrapping.py --distribuido`
+      enqueues and `worker.py` claims with the service key, which bypasses RLS.
+    - The four functions move leases for any job and worker, so they are
+      granted only to `service_role`.
+    - There is no DELETE policy: rows only leave the queue with their job.
+*/
+
+CREATE TABLE IF NOT EXISTS public.crawl_queue (
+  job_id uuid NOT NULL REFERENCES public.scraping_jobs(id) ON DELETE CASCADE,
+  url text NOT NULL,
+  state text NOT NULL DEFAULT 'pending' CHECK (state IN ('pending', 'leased', 'done', 'failed')),
+  lease_owner text,
+  lease_expires_at timestamptz,
+  attempts integer NOT NULL DEFAULT 0,
+  last_error text,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (job_id, url)
+);
+
+-- Claims only look at claimable rows, so keep that index small
+CREATE INDEX IF NOT EXISTS idx_crawl_queue_claimable
+  ON public.crawl_queue (job_id, lease_expires_at)
+  WHERE state IN ('pending', 'leased');
+
+ALTER TABLE public.crawl_queue ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public access to crawl queue" ON public.crawl_queue;
+
+DROP POLICY IF EXISTS "Allow public read access to crawl queue" ON public.crawl_queue;
+CREATE POLICY "Allow public read access to crawl queue"
+  ON public.crawl_queue
+  FOR SELECT
+  TO public
+  USING (true);
+
+DROP POLICY IF EXISTS "Allow public insert access to crawl queue" ON public.crawl_queue;
+DROP POLICY IF EXISTS "Allow public update access to crawl queue" ON public.crawl_queue;
+
+CREATE OR REPLACE FUNCTION public.claim_crawl_urls(
+  p_job_id uuid, p_worker text, p_limit integer DEFAULT 50,
+  p_lease_seconds integer DEFAULT 120, p_max_attempts integer DEFAULT 3)
+RETURNS TABLE (url text)
+LANGUAGE sql
+AS $$
+  -- Nobody will claim these again, so they would keep the job open forever
+  WITH esgotados AS (
+    UPDATE public.crawl_queue
+    SET state = 'failed',
+        lease_owner = NULL,
+        lease_expires_at = NULL,
+        last_error = coalesce(last_error, 'lease expirou na última tentativa'),
+        updated_at = now()
+    WHERE job_id = p_job_id
+      AND state = 'leased'
+      AND lease_expires_at < now()
+      AND attempts >= p_max_attempts
+  ),
+  candidatos AS (
+    SELECT q.job_id, q.url
+    FROM public.crawl_queue q
+    WHERE q.job_id = p_job_id
+      AND q.attempts < p_max_attempts
+      AND (q.state = 'pending' OR (q.state = 'leased' AND q.lease_expires_at < now()))
+    ORDER BY q.attempts, q.updated_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE public.crawl_queue q
+  SET state = 'leased',
+      lease_owner = p_worker,
+      lease_expires_at = now() + make_interval(secs => p_lease_seconds),
+      attempts = q.attempts + 1,
+      updated_at = now()
+  FROM candidatos c
+  WHERE q.job_id = c.job_id AND q.url = c.url
+  RETURNING q.url;
+$$;
+
+CREATE OR REPLACE FUNCTION public.renew_crawl_leases(
+  p_job_id uuid, p_worker text, p_lease_seconds integer DEFAULT 120)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH renovados AS (
+    UPDATE public.crawl_queue
+    SET lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+    WHERE job_id = p_job_id AND lease_owner = p_worker AND state = 'leased'
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM renovados;
+$$;
+
+CREATE OR REPLACE FUNCTION public.finish_crawl_urls(
+  p_job_id uuid, p_worker text, p_urls text[], p_success boolean,
+  p_error text DEFAULT NULL, p_max_attempts integer DEFAULT 3)
+RETURNS void
+LANGUAGE sql
+AS $$
+  UPDATE public.crawl_queue
+  SET state = CASE
+        WHEN p_success THEN 'done'
+        WHEN attempts >= p_max_attempts THEN 'failed'
+        ELSE 'pending'
+      END,
+      lease_owner = NULL,
+      lease_expires_at = NULL,
+      last_error = CASE WHEN p_success THEN NULL ELSE p_error END,
+      updated_at = now()
+  WHERE job_id = p_job_id
+    AND url = ANY(p_urls)
+    AND state = 'leased'
+    -- A lease that expired and was taken by another worker belongs to that worker now
+    AND lease_owner = p_worker;
+$$;
+
+DROP FUNCTION IF EXISTS public.sync_crawl_job(uuid);
+
+CREATE OR REPLACE FUNCTION public.sync_crawl_job(p_job_id uuid, p_max_attempts integer DEFAULT 3)
+RETURNS text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_done integer;
+  v_failed integer;
+  v_open integer;
+  v_status text;
+BEGIN
+  -- Also swept here, so the job completes even when no worker claims again
+  UPDATE public.crawl_queue
+  SET state = 'failed',
+      lease_owner = NULL,
+      lease_expires_at = NULL,
+      last_error = coalesce(last_error, 'lease expirou na última tentativa'),
+      updated_at = now()
+  WHERE job_id = p_job_id
+    AND state = 'leased'
+    AND lease_expires_at < now()
+    AND attempts >= p_max_attempts;
+
+  SELECT count(*) FILTER (WHERE state = 'done'),
+         count(*) FILTER (WHERE state = 'failed'),
+         count(*) FILTER (WHERE state IN ('pending', 'leased'))
+  INTO v_done, v_failed, v_open
+  FROM public.crawl_queue
+  WHERE job_id = p_job_id;
+
+  UPDATE public.scraping_jobs
+  SET properties_scraped = v_done,
+      properties_failed = v_failed,
+      heartbeat_at = now(),
+      status = CASE WHEN v_open = 0 THEN 'completed' ELSE status END,
+      completed_at = CASE WHEN v_open = 0 THEN coalesce(completed_at, now()) ELSE completed_at END
+  WHERE id = p_job_id
+  RETURNING status INTO v_status;
+
+  RETURN v_status;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.claim_crawl_urls(uuid, text, integer, integer, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.renew_crawl_leases(uuid, text, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.finish_crawl_urls(uuid, text, text[], boolean, text, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.sync_crawl_job(uuid, integer) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION public.claim_crawl_urls(uuid, text, integer, integer, integer) TO service_role;
+GRANT EXECUTE ON FUNCTION public.renew_crawl_leases(uuid, text, integer) TO service_role;
+GRANT EXECUTE ON FUNCTION public.finish_crawl_urls(uuid, text, text[], boolean, text, integer) TO service_role;
+GRANT EXECUTE ON FUNCTION public.sync_crawl_job(uuid, integer) TO service_role;
@@ -0,0 +1,102 @@
+/*
+  # Add content hash to 'properties' and a price history table
+
+  1. Table Modified: `properties`
+    - `content_hash` (text) - SHA-1 of the normalized listing fields, computed
+      by the scraper (`hash_registro`). Rows whose hash did not change are not
+      upserted again.
+
+  2. New Table: `property_price_history`
+    - One row per price change: `link`, `valor_anterior`, `valor`, `alterado_em`.
+    - Filled by the `registrar_alteracao_preco` trigger whenever an update
+      changes `properties.valor`, so the current price stays in `properties`
+      and the earlier ones are kept here.
+
+  3. New Functions
+    - `numero_br(texto text)` - Text to numeric accepting plain numbers
+      ("1500000.0", as the REST API stores JSON numbers; at most two
+      decimals) and Brazilian formatting ("R$ 1.500.000", "850,50"), like
+      `to_float` in the scrapers. `properties.valor` is still text until
+      20251018100000 is finalized, so the trigger converts through it.
+    - `property_hashes(links text[])` - Returns (link, content_hash) for the
+      given links that exist in `properties`, so the writer can compare a
+      whole batch in one call.
+
+  4. Security
+    - `properties` keeps no UPDATE policy, so anon cannot rewrite
+      listings. The scrapers, the reparse and the revisit update existing
+      rows with `upsert(on_conflict='link')` and use the service key.
+      The policy an earlier version of this migration created is dropped.
+    - `property_price_history` gets public read access like `properties`;
+      inserts only happen through the trigger.
+*/
+
+ALTER TABLE public.properties
+ADD COLUMN IF NOT EXISTS content_hash text;
+
+DROP POLICY IF EXISTS "Allow public update to properties" ON public.properties;
+
+CREATE TABLE IF NOT EXISTS public.property_price_history (
+  id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  link text NOT NULL,
+  valor_anterior numeric,
+  valor numeric,
+  alterado_em timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_property_price_history_link
+  ON public.property_price_history (link, alterado_em);
+
+ALTER TABLE public.property_price_history ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access to property price history" ON public.property_price_history;
+CREATE POLICY "Allow public read access to property price history"
+  ON public.property_price_history
+  FOR SELECT
+  TO public
+  USING (true);
+
+CREATE OR REPLACE FUNCTION public.numero_br(texto text)
+RETURNS numeric
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT CASE
+    WHEN btrim(texto) ~ '^-?[0-9]+(\.[0-9]{1,2})?$' THEN btrim(texto)::numeric
+    WHEN replace(regexp_replace(texto, '[^0-9,]', '', 'g'), ',', '.') ~ '^[0-9]+(\.[0-9]+)?$'
+      THEN replace(regexp_replace(texto, '[^0-9,]', '', 'g'), ',', '.')::numeric
+  END
+$$;
+
+CREATE OR REPLACE FUNCTION public.registrar_alteracao_preco()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO public.property_price_history (link, valor_anterior, valor)
+  -- ::text first, so it works before and after the column is typed
+  VALUES (NEW.link, numero_br(OLD.valor::text), numero_br(NEW.valor::text));
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_properties_price_history ON public.properties;
+CREATE TRIGGER trg_properties_price_history
+  AFTER UPDATE OF valor ON public.properties
+  FOR EACH ROW
+  WHEN (OLD.valor IS DISTINCT FROM NEW.valor)
+  EXECUTE FUNCTION public.registrar_alteracao_preco();
+
+CREATE OR REPLACE FUNCTION public.property_hashes(links text[])
+RETURNS TABLE (link text, content_hash text)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT p.link, p.content_hash
+  FROM public.properties p
+  WHERE p.link = ANY(links);
+$$;
+
+GRANT EXECUTE ON FUNCTION public.property_hashes(text[]) TO anon, authenticated;
@@ -0,0 +1,87 @@
+/*
+  # Add revisit tracking to 'properties' and the revisit planner functions
+
+  1. Table Modified: `properties`
+    - `last_checked_at` (timestamptz) - Last time the listing page was fetched
+    - `ativo` (boolean) - False once the listing page returns 404/410
+    - `delisted_at` (timestamptz) - When the listing was found removed
+
+  2. New Functions
+    - `plan_revisits(p_limit, p_pesos)`
+      Returns the `p_limit` active listings most worth fetching again, by
+      score = days since last check (or since `data`)
+            * (1 + ln(1 + number of recorded price changes))
+            * region weight.
+      `p_pesos` is a JSON object of weights by `cidade` or `uf`
+      (e.g. {"Santos": 2, "SP": 1}); regions not listed weigh 1.
+    - `marcar_verificados(links text[])` - Stamps `last_checked_at` and reactivates
+    - `marcar_inativos(links text[])` - Sets `ativo = false` and `delisted_at`
+
+  3. Security
+    - The two `marcar_*` functions run as SECURITY DEFINER with a fixed
+      `search_path`, so they bypass RLS and can write to any row.
+    - For that reason they are granted only to `service_role`;
+      `revisit.py` calls them with the service key.
+
+  4. Notes
+    - The dashboard only lists active properties.
+    - Existing rows start active and unchecked, so their age comes from `data`.
+*/
+
+ALTER TABLE public.properties
+ADD COLUMN IF NOT EXISTS last_checked_at timestamptz,
+ADD COLUMN IF NOT EXISTS ativo boolean NOT NULL DEFAULT true,
+ADD COLUMN IF NOT EXISTS delisted_at timestamptz;
+
+CREATE INDEX IF NOT EXISTS idx_properties_ativo_last_checked
+  ON public.properties (last_checked_at)
+  WHERE ativo;
+
+CREATE OR REPLACE FUNCTION public.plan_revisits(p_limit integer DEFAULT 1000, p_pesos jsonb DEFAULT '{}'::jsonb)
+RETURNS TABLE (link text, score double precision)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH mudancas AS (
+    SELECT h.link, count(*) AS n
+    FROM public.property_price_history h
+    GROUP BY h.link
+  )
+  SELECT p.link,
+         (extract(epoch FROM now() - coalesce(p.last_checked_at, p.data::timestamptz, now() - interval '30 days')) / 86400.0)
+         * (1 + ln(1 + coalesce(m.n, 0)))
+         * coalesce((p_pesos ->> p.cidade)::double precision, (p_pesos ->> p.uf)::double precision, 1.0) AS score
+  FROM public.properties p
+  LEFT JOIN mudancas m ON m.link = p.link
+  WHERE p.ativo AND p.link IS NOT NULL
+  ORDER BY score DESC
+  LIMIT p_limit;
+$$;
+
+CREATE OR REPLACE FUNCTION public.marcar_verificados(links text[])
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  UPDATE public.properties
+  SET last_checked_at = now(), ativo = true, delisted_at = NULL
+  WHERE link = ANY(links);
+$$;
+
+CREATE OR REPLACE FUNCTION public.marcar_inativos(links text[])
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  UPDATE public.properties
+  SET last_checked_at = now(), ativo = false, delisted_at = coalesce(delisted_at, now())
+  WHERE link = ANY(links);
+$$;
+
+GRANT EXECUTE ON FUNCTION public.plan_revisits(integer, jsonb) TO anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.marcar_verificados(text[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.marcar_inativos(text[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.marcar_verificados(text[]) TO service_role;
+GRANT EXECUTE ON FUNCTION public.marcar_inativos(text[]) TO service_role;
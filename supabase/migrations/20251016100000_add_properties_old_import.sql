@@ -0,0 +1,59 @@
+/*
+  # Bulk import of historical spreadsheets into 'properties_old'
+
+  1. Table Modified: `properties_old`
+    - `id` now defaults to a sequence, started after the current max id
+    - Index on `link`, used to skip listings that are already loaded
+
+  2. New Function
+    - `import_properties_old(registros jsonb)`
+      Inserts a JSON array of rows (properties_old column names), skipping
+      rows without a link, repeated links within the batch and links
+      already in the table. Returns the number of rows inserted.
+
+  3. Security
+    - properties_old stays read-only through the REST API; the function is
+      SECURITY DEFINER so the importer can append without a write policy.
+    - Because it bypasses RLS, it is granted only to `service_role`;
+      `import_backups.py --destino banco` calls it with the service key.
+    - A transaction-level advisory lock serializes concurrent imports, so
+      two loaders can never insert the same link twice.
+*/
+
+CREATE SEQUENCE IF NOT EXISTS public.properties_old_id_seq OWNED BY public.properties_old.id;
+SELECT setval('public.properties_old_id_seq', coalesce(max(id), 0) + 1, false) FROM public.properties_old;
+ALTER TABLE public.properties_old ALTER COLUMN id SET DEFAULT nextval('public.properties_old_id_seq');
+
+CREATE INDEX IF NOT EXISTS idx_properties_old_link ON public.properties_old (link);
+
+CREATE OR REPLACE FUNCTION public.import_properties_old(registros jsonb)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  inseridos integer;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('import_properties_old'));
+
+  INSERT INTO properties_old (tipo, endereco, bairro, cidade, uf, area_privativa, valor, valor_unitario,
+                              dormitorio, suite, banheiro, vaga, piscina, varanda, elevador, link, data)
+  SELECT DISTINCT ON (r.link)
+         r.tipo, r.endereco, r.bairro, r.cidade, r.uf, r.area_privativa, r.valor, r.valor_unitario,
+         r.dormitorio, r.suite, r.banheiro, r.vaga, r.piscina, r.varanda, r.elevador, r.link, r.data
+  FROM jsonb_to_recordset(registros) AS r(
+    tipo text, endereco text, bairro text, cidade text, uf text, area_privativa numeric, valor numeric,
+    valor_unitario numeric, dormitorio integer, suite integer, banheiro integer, vaga integer,
+    piscina boolean, varanda boolean, elevador boolean, link text, data timestamptz)
+  WHERE r.link IS NOT NULL
+    AND NOT EXISTS (SELECT 1 FROM properties_old o WHERE o.link = r.link)
+  ORDER BY r.link;
+
+  GET DIAGNOSTICS inseridos = ROW_COUNT;
+  RETURN inseridos;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.import_properties_old(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.import_properties_old(jsonb) TO service_role;
@@ -0,0 +1,287 @@
+/*
+  # Incrementally maintained market aggregates per uf/cidade/bairro/tipo
+
+  1. New Tables
+    - `market_aggregates` - One row per (uf, cidade, bairro, tipo) of active properties:
+      counts, sums of price, price per m² and bedrooms, and amenity counts
+    - `market_price_buckets` - Log-scale histograms (2% wide buckets) of `valor`
+      and `valor / area_privativa` per group, used for percentiles
+
+  2. Maintenance
+    - Statement-level triggers on `properties` read the transition tables of
+      each INSERT/UPDATE/DELETE and apply only that statement's delta: rows
+      added, removed, or whose aggregated columns changed (price, area,
+      bedrooms, amenities, location, type, `ativo`). A 500-row upsert costs
+      one grouped update, never a rescan.
+    - `rebuild_market_aggregates()` recomputes everything from `properties`
+      in keyset batches (first load or repair) and returns how many active
+      listings were aggregated.
+
+  3. New Views
+    - `market_summary` - The aggregates with mean values and p25/p50/p75 of
+      price and price per m², estimated from the buckets (within 1%).
+    - `market_totals` - A single row with the dashboard totals, summed in
+      SQL so the client never has to page through every group.
+
+  4. Security
+    - Both tables are readable by anyone and written only by the trigger and
+      rebuild functions, which are SECURITY DEFINER.
+    - `market_aplicar_delta` is revoked from PUBLIC (only the trigger calls
+      it) and `rebuild_market_aggregates` is granted only to `service_role`;
+      `market_stats.py --recalcular` uses the service key.
+
+  5. Notes
+    - NULL location or type is stored as '' so it can be part of the key.
+    - Only active listings (`ativo`) are counted, as in the dashboard.
+*/
+
+CREATE TABLE IF NOT EXISTS public.market_aggregates (
+  uf text NOT NULL DEFAULT '',
+  cidade text NOT NULL DEFAULT '',
+  bairro text NOT NULL DEFAULT '',
+  tipo text NOT NULL DEFAULT '',
+  total bigint NOT NULL DEFAULT 0,
+  com_valor bigint NOT NULL DEFAULT 0,
+  soma_valor numeric NOT NULL DEFAULT 0,
+  com_valor_m2 bigint NOT NULL DEFAULT 0,
+  soma_valor_m2 numeric NOT NULL DEFAULT 0,
+  com_dormitorio bigint NOT NULL DEFAULT 0,
+  soma_dormitorio bigint NOT NULL DEFAULT 0,
+  com_piscina bigint NOT NULL DEFAULT 0,
+  com_elevador bigint NOT NULL DEFAULT 0,
+  atualizado_em timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (uf, cidade, bairro, tipo)
+);
+
+CREATE TABLE IF NOT EXISTS public.market_price_buckets (
+  uf text NOT NULL DEFAULT '',
+  cidade text NOT NULL DEFAULT '',
+  bairro text NOT NULL DEFAULT '',
+  tipo text NOT NULL DEFAULT '',
+  medida text NOT NULL CHECK (medida IN ('valor', 'valor_m2')),
+  faixa integer NOT NULL,
+  n bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (uf, cidade, bairro, tipo, medida, faixa)
+);
+
+ALTER TABLE public.market_aggregates ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.market_price_buckets ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access to market aggregates" ON public.market_aggregates;
+CREATE POLICY "Allow public read access to market aggregates"
+  ON public.market_aggregates FOR SELECT
+  TO anon, authenticated
+  USING (true);
+
+DROP POLICY IF EXISTS "Allow public read access to market price buckets" ON public.market_price_buckets;
+CREATE POLICY "Allow public read access to market price buckets"
+  ON public.market_price_buckets FOR SELECT
+  TO anon, authenticated
+  USING (true);
+
+-- Adds (sinal = 1) or removes (sinal = -1) a JSON array of properties rows
+CREATE OR REPLACE FUNCTION public.market_aplicar_delta(linhas jsonb, sinal integer)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF linhas IS NULL OR jsonb_array_length(linhas) = 0 THEN
+    RETURN;
+  END IF;
+
+  CREATE TEMP TABLE IF NOT EXISTS market_delta (
+    uf text, cidade text, bairro text, tipo text, valor numeric, valor_m2 numeric,
+    dormitorio integer, piscina boolean, elevador boolean
+  ) ON COMMIT DROP;
+  TRUNCATE market_delta;
+
+  INSERT INTO market_delta
+  SELECT coalesce(r.uf, ''), coalesce(r.cidade, ''), coalesce(r.bairro, ''), coalesce(r.tipo, ''),
+         CASE WHEN r.valor > 0 THEN r.valor END,
+         CASE WHEN r.valor > 0 AND r.area_privativa > 0 THEN r.valor / r.area_privativa END,
+         CASE WHEN r.dormitorio > 0 THEN r.dormitorio END,
+         coalesce(r.piscina, false), coalesce(r.elevador, false)
+  FROM jsonb_to_recordset(linhas) AS r(uf text, cidade text, bairro text, tipo text, valor numeric,
+                                       area_privativa numeric, dormitorio integer, piscina boolean, elevador boolean);
+
+  -- Sorted so concurrent writers lock the group rows in the same order
+  INSERT INTO market_aggregates AS m (uf, cidade, bairro, tipo, total, com_valor, soma_valor, com_valor_m2,
+                                      soma_valor_m2, com_dormitorio, soma_dormitorio, com_piscina, com_elevador)
+  SELECT d.uf, d.cidade, d.bairro, d.tipo,
+         sinal * count(*), sinal * count(d.valor), sinal * coalesce(sum(d.valor), 0),
+         sinal * count(d.valor_m2), sinal * coalesce(sum(d.valor_m2), 0),
+         sinal * count(d.dormitorio), sinal * coalesce(sum(d.dormitorio), 0),
+         sinal * count(*) FILTER (WHERE d.piscina), sinal * count(*) FILTER (WHERE d.elevador)
+  FROM market_delta d
+  GROUP BY d.uf, d.cidade, d.bairro, d.tipo
+  ORDER BY d.uf, d.cidade, d.bairro, d.tipo
+  ON CONFLICT (uf, cidade, bairro, tipo) DO UPDATE SET
+    total = m.total + EXCLUDED.total,
+    com_valor = m.com_valor + EXCLUDED.com_valor,
+    soma_valor = m.soma_valor + EXCLUDED.soma_valor,
+    com_valor_m2 = m.com_valor_m2 + EXCLUDED.com_valor_m2,
+    soma_valor_m2 = m.soma_valor_m2 + EXCLUDED.soma_valor_m2,
+    com_dormitorio = m.com_dormitorio + EXCLUDED.com_dormitorio,
+    soma_dormitorio = m.soma_dormitorio + EXCLUDED.soma_dormitorio,
+    com_piscina = m.com_piscina + EXCLUDED.com_piscina,
+    com_elevador = m.com_elevador + EXCLUDED.com_elevador,
+    atualizado_em = now();
+
+  INSERT INTO market_price_buckets AS b (uf, cidade, bairro, tipo, medida, faixa, n)
+  SELECT uf, cidade, bairro, tipo, medida, faixa, sinal * count(*)
+  FROM (
+    SELECT uf, cidade, bairro, tipo, 'valor' AS medida, floor(ln(valor) / ln(1.02))::integer AS faixa
+    FROM market_delta WHERE valor IS NOT NULL
+    UNION ALL
+    SELECT uf, cidade, bairro, tipo, 'valor_m2', floor(ln(valor_m2) / ln(1.02))::integer
+    FROM market_delta WHERE valor_m2 IS NOT NULL
+  ) f
+  GROUP BY uf, cidade, bairro, tipo, medida, faixa
+  ORDER BY uf, cidade, bairro, tipo, medida, faixa
+  ON CONFLICT (uf, cidade, bairro, tipo, medida, faixa) DO UPDATE SET n = b.n + EXCLUDED.n;
+
+  IF sinal < 0 THEN
+    DELETE FROM market_price_buckets b
+    USING (SELECT DISTINCT uf, cidade, bairro, tipo FROM market_delta) d
+    WHERE (b.uf, b.cidade, b.bairro, b.tipo) = (d.uf, d.cidade, d.bairro, d.tipo) AND b.n <= 0;
+    DELETE FROM market_aggregates m
+    USING (SELECT DISTINCT uf, cidade, bairro, tipo FROM market_delta) d
+    WHERE (m.uf, m.cidade, m.bairro, m.tipo) = (d.uf, d.cidade, d.bairro, d.tipo) AND m.total <= 0;
+  END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.market_aggregates_trigger()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM market_aplicar_delta((SELECT jsonb_agg(to_jsonb(n)) FROM novas n WHERE n.ativo), 1);
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM market_aplicar_delta((SELECT jsonb_agg(to_jsonb(o)) FROM antigas o WHERE o.ativo), -1);
+  ELSE
+    -- Updates that touch none of the aggregated columns (e.g. last_checked_at) cost nothing
+    PERFORM market_aplicar_delta((
+      SELECT jsonb_agg(to_jsonb(o)) FROM antigas o JOIN novas n ON n.id = o.id
+      WHERE o.ativo
+        AND (o.ativo, o.uf, o.cidade, o.bairro, o.tipo, o.valor, o.area_privativa, o.dormitorio, o.piscina, o.elevador)
+            IS DISTINCT FROM
+            (n.ativo, n.uf, n.cidade, n.bairro, n.tipo, n.valor, n.area_privativa, n.dormitorio, n.piscina, n.elevador)
+    ), -1);
+    PERFORM market_aplicar_delta((
+      SELECT jsonb_agg(to_jsonb(n)) FROM antigas o JOIN novas n ON n.id = o.id
+      WHERE n.ativo
+        AND (o.ativo, o.uf, o.cidade, o.bairro, o.tipo, o.valor, o.area_privativa, o.dormitorio, o.piscina, o.elevador)
+            IS DISTINCT FROM
+            (n.ativo, n.uf, n.cidade, n.bairro, n.tipo, n.valor, n.area_privativa, n.dormitorio, n.piscina, n.elevador)
+    ), 1);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_market_aggregates_insert ON public.properties;
+CREATE TRIGGER trg_market_aggregates_insert
+  AFTER INSERT ON public.properties
+  REFERENCING NEW TABLE AS novas
+  FOR EACH STATEMENT EXECUTE FUNCTION public.market_aggregates_trigger();
+
+DROP TRIGGER IF EXISTS trg_market_aggregates_update ON public.properties;
+CREATE TRIGGER trg_market_aggregates_update
+  AFTER UPDATE ON public.properties
+  REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+  FOR EACH STATEMENT EXECUTE FUNCTION public.market_aggregates_trigger();
+
+DROP TRIGGER IF EXISTS trg_market_aggregates_delete ON public.properties;
+CREATE TRIGGER trg_market_aggregates_delete
+  AFTER DELETE ON public.properties
+  REFERENCING OLD TABLE AS antigas
+  FOR EACH STATEMENT EXECUTE FUNCTION public.market_aggregates_trigger();
+
+CREATE OR REPLACE FUNCTION public.rebuild_market_aggregates(p_lote integer DEFAULT 10000)
+RETURNS bigint
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  ultimo uuid;
+  lido integer;
+  linhas jsonb;
+  total bigint := 0;
+BEGIN
+  -- Blocks writers to properties so no delta is applied twice or lost during the rebuild
+  LOCK TABLE properties IN SHARE MODE;
+  DELETE FROM market_price_buckets;
+  DELETE FROM market_aggregates;
+  LOOP
+    SELECT count(*), (array_agg(l.id ORDER BY l.id DESC))[1], jsonb_agg(to_jsonb(l)) FILTER (WHERE l.ativo)
+    INTO lido, ultimo, linhas
+    FROM (
+      SELECT p.* FROM properties p
+      WHERE ultimo IS NULL OR p.id > ultimo
+      ORDER BY p.id
+      LIMIT p_lote
+    ) l;
+    EXIT WHEN lido = 0;
+    PERFORM market_aplicar_delta(linhas, 1);
+    -- Inactive rows are read but not aggregated
+    total := total + coalesce(jsonb_array_length(linhas), 0);
+  END LOOP;
+  RETURN total;
+END;
+$$;
+
+CREATE OR REPLACE VIEW public.market_summary AS
+WITH acumulado AS (
+  SELECT b.uf, b.cidade, b.bairro, b.tipo, b.medida, b.faixa,
+         sum(b.n) OVER (PARTITION BY b.uf, b.cidade, b.bairro, b.tipo, b.medida ORDER BY b.faixa) AS ate_aqui,
+         sum(b.n) OVER (PARTITION BY b.uf, b.cidade, b.bairro, b.tipo, b.medida) AS n_total
+  FROM public.market_price_buckets b
+  WHERE b.n > 0
+),
+percentis AS (
+  -- Each bucket is represented by its geometric midpoint
+  SELECT uf, cidade, bairro, tipo, medida,
+         round(exp((min(faixa) FILTER (WHERE ate_aqui >= 0.25 * n_total) + 0.5) * ln(1.02))::numeric, 2) AS p25,
+         round(exp((min(faixa) FILTER (WHERE ate_aqui >= 0.50 * n_total) + 0.5) * ln(1.02))::numeric, 2) AS p50,
+         round(exp((min(faixa) FILTER (WHERE ate_aqui >= 0.75 * n_total) + 0.5) * ln(1.02))::numeric, 2) AS p75
+  FROM acumulado
+  GROUP BY uf, cidade, bairro, tipo, medida
+)
+SELECT a.uf, a.cidade, a.bairro, a.tipo, a.total,
+       a.com_valor,
+       round(a.soma_valor / nullif(a.com_valor, 0), 2) AS valor_medio,
+       v.p25 AS valor_p25, v.p50 AS valor_mediana, v.p75 AS valor_p75,
+       round(a.soma_valor_m2 / nullif(a.com_valor_m2, 0), 2) AS valor_m2_medio,
+       m.p25 AS valor_m2_p25, m.p50 AS valor_m2_mediana, m.p75 AS valor_m2_p75,
+       a.com_dormitorio, a.soma_dormitorio,
+       round(a.soma_dormitorio::numeric / nullif(a.com_dormitorio, 0), 1) AS dormitorios_medio,
+       a.com_piscina, a.com_elevador, a.atualizado_em
+FROM public.market_aggregates a
+LEFT JOIN percentis v ON (v.uf, v.cidade, v.bairro, v.tipo, v.medida) = (a.uf, a.cidade, a.bairro, a.tipo, 'valor')
+LEFT JOIN percentis m ON (m.uf, m.cidade, m.bairro, m.tipo, m.medida) = (a.uf, a.cidade, a.bairro, a.tipo, 'valor_m2')
+WHERE a.total > 0;
+
+CREATE OR REPLACE VIEW public.market_totals AS
+SELECT coalesce(sum(a.total), 0)::bigint AS total,
+       count(DISTINCT a.cidade) FILTER (WHERE a.cidade <> '') AS cidades,
+       count(DISTINCT a.bairro) FILTER (WHERE a.bairro <> '') AS bairros,
+       round(sum(a.soma_dormitorio)::numeric / nullif(sum(a.com_dormitorio), 0), 1) AS dormitorios_medio,
+       coalesce(sum(a.com_piscina), 0)::bigint AS com_piscina,
+       coalesce(sum(a.com_elevador), 0)::bigint AS com_elevador
+FROM public.market_aggregates a
+WHERE a.total > 0;
+
+GRANT SELECT ON public.market_summary TO anon, authenticated;
+GRANT SELECT ON public.market_totals TO anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.market_aplicar_delta(jsonb, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.rebuild_market_aggregates(integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rebuild_market_aggregates(integer) TO service_role;
+
+SELECT public.rebuild_market_aggregates();
@@ -0,0 +1,313 @@
+/*
+  # Typed numeric columns on 'properties' and composite range indexes
+
+  1. Online Type Conversion
+    - Databases created from the first migration keep `valor`, `area_privativa`,
+      counts and amenities as `text DEFAULT '0'` when the one-shot
+      ALTER TYPE of `rename_and_alter_property_columns.sql` never ran (it
+      rewrites the whole table under an exclusive lock and fails on values
+      such as '1.500.000'). For every such column this migration adds a
+      typed `<column>_tipado` companion, kept in sync on INSERT/UPDATE by
+      the `properties_tipar_colunas` trigger.
+    - `backfill_typed_columns(p_depois uuid, p_lote integer)` fills one
+      keyset batch of companions (ids after `p_depois`) and returns
+      {"ultimo": <last id>, "linhas": <rows read>}. Each call is its own
+      short transaction; scripts/backfill_typed_columns.py loops over it.
+    - `finalize_typed_columns()` checks that every row is filled, then
+      swaps the companions in (drop + rename, catalog-only, the only moment
+      the table is locked) and drops the sync trigger. Returns the columns
+      it swapped.
+    - `criar_indices_faixas()` builds the indexes below afterwards, in its
+      own transaction (writes wait for the build, reads do not).
+    - On databases that are already typed all of this is a no-op.
+
+  2. Conversion Function
+    - Every conversion below uses `numero_br(texto text)`, created in
+      20251014100000 because the price history trigger needs it first.
+
+  3. Modified Function
+    - `market_aplicar_delta` reads the row values as text and converts
+      them with `numero_br`, so the market aggregates keep working while
+      the columns are still text
+
+  4. Indexes (active listings, matching the dashboard list)
+    - (cidade, valor), (cidade, area_privativa), (bairro, valor),
+      (bairro, area_privativa), (uf, valor), (cidade, dormitorio)
+    - Same pairs on `properties_old`, which is already typed
+
+  5. Security
+    - `backfill_typed_columns`, `finalize_typed_columns` and
+      `criar_indices_faixas` are SECURITY DEFINER and rewrite, lock or
+      index the table, so they are granted only to `service_role`;
+      scripts/backfill_typed_columns.py uses the service key.
+
+  6. Deploy Order
+    - Apply this migration, run scripts/backfill_typed_columns.py to the
+      end (it calls `finalize_typed_columns()`), and only then are the
+      `properties` columns numeric.
+    - Until then the dashboard (src/lib/api.ts) applies the numeric range
+      filters on `properties` in the browser. It checks whether `valor`
+      comes back as a JSON number and moves them into the query once it does.
+*/
+
+-- Columns still stored as text: target type and the expression converting the value (%1$s)
+CREATE OR REPLACE FUNCTION public.properties_colunas_tipadas()
+RETURNS TABLE (coluna text, tipo text, conversao text)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT c.coluna, c.tipo, c.conversao
+  FROM (VALUES
+    ('valor', 'numeric(12,2)', 'round(numero_br(%1$s), 2)'),
+    ('area_privativa', 'numeric(10,2)', 'round(numero_br(%1$s), 2)'),
+    ('area_terreno', 'numeric(10,2)', 'round(numero_br(%1$s), 2)'),
+    ('valor_unitario', 'numeric(10,2)', 'round(numero_br(%1$s), 2)'),
+    ('dormitorio', 'integer', 'round(numero_br(%1$s))::integer'),
+    ('banheiro', 'integer', 'round(numero_br(%1$s))::integer'),
+    ('vaga', 'integer', 'round(numero_br(%1$s))::integer'),
+    ('suite', 'integer', 'round(numero_br(%1$s))::integer'),
+    ('piscina', 'boolean', 'lower(btrim(%1$s)) IN (''1'', ''true'', ''t'', ''sim'')'),
+    ('varanda', 'boolean', 'lower(btrim(%1$s)) IN (''1'', ''true'', ''t'', ''sim'')'),
+    ('elevador', 'boolean', 'lower(btrim(%1$s)) IN (''1'', ''true'', ''t'', ''sim'')')
+  ) AS c(coluna, tipo, conversao)
+  JOIN information_schema.columns i
+    ON i.table_schema = 'public' AND i.table_name = 'properties' AND i.column_name = c.coluna
+  WHERE i.data_type IN ('text', 'character varying')
+$$;
+
+DO $$
+DECLARE
+  c record;
+  atribuicoes text := '';
+BEGIN
+  FOR c IN SELECT * FROM public.properties_colunas_tipadas() LOOP
+    EXECUTE format('ALTER TABLE public.properties ADD COLUMN IF NOT EXISTS %I %s', c.coluna || '_tipado', c.tipo);
+    atribuicoes := atribuicoes || format('  NEW.%I := %s;', c.coluna || '_tipado',
+                                         format(c.conversao, 'NEW.' || quote_ident(c.coluna))) || E'\n';
+  END LOOP;
+
+  IF atribuicoes = '' THEN
+    RETURN;
+  END IF;
+
+  -- Writers keep sending the text columns; the companions follow them until the swap
+  EXECUTE format($f$
+    CREATE OR REPLACE FUNCTION public.properties_tipar_colunas()
+    RETURNS trigger
+    LANGUAGE plpgsql
+    SET search_path = public
+    AS $t$
+    BEGIN
+    %s  RETURN NEW;
+    END;
+    $t$;
+  $f$, atribuicoes);
+
+  DROP TRIGGER IF EXISTS properties_tipar_colunas ON public.properties;
+  CREATE TRIGGER properties_tipar_colunas
+    BEFORE INSERT OR UPDATE ON public.properties
+    FOR EACH ROW EXECUTE FUNCTION public.properties_tipar_colunas();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.backfill_typed_columns(p_depois uuid DEFAULT NULL, p_lote integer DEFAULT 5000)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  atribuicoes text;
+  ultimo uuid;
+  linhas integer;
+BEGIN
+  SELECT string_agg(format('%I = %s', coluna || '_tipado', format(conversao, 'p.' || quote_ident(coluna))), ', ')
+  INTO atribuicoes
+  FROM properties_colunas_tipadas();
+
+  IF atribuicoes IS NULL THEN
+    RETURN jsonb_build_object('ultimo', NULL, 'linhas', 0);
+  END IF;
+
+  -- The UPDATE fires the sync trigger too, which recomputes the same values
+  EXECUTE format($q$
+    WITH lote AS (
+      SELECT id FROM properties
+      WHERE $1 IS NULL OR id > $1
+      ORDER BY id
+      LIMIT $2
+    ), atualizados AS (
+      UPDATE properties p SET %s
+      FROM lote WHERE p.id = lote.id
+      RETURNING p.id
+    )
+    SELECT (array_agg(id ORDER BY id DESC))[1], count(*)::integer FROM atualizados
+  $q$, atribuicoes)
+  INTO ultimo, linhas
+  USING p_depois, p_lote;
+
+  RETURN jsonb_build_object('ultimo', ultimo, 'linhas', linhas);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.criar_indices_faixas()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  CREATE INDEX IF NOT EXISTS idx_properties_cidade_valor ON properties (cidade, valor) WHERE ativo;
+  CREATE INDEX IF NOT EXISTS idx_properties_cidade_area ON properties (cidade, area_privativa) WHERE ativo;
+  CREATE INDEX IF NOT EXISTS idx_properties_bairro_valor ON properties (bairro, valor) WHERE ativo;
+  CREATE INDEX IF NOT EXISTS idx_properties_bairro_area ON properties (bairro, area_privativa) WHERE ativo;
+  CREATE INDEX IF NOT EXISTS idx_properties_uf_valor ON properties (uf, valor) WHERE ativo;
+  CREATE INDEX IF NOT EXISTS idx_properties_cidade_dormitorio ON properties (cidade, dormitorio) WHERE ativo;
+  -- Dropped with the text column on the swap
+  CREATE INDEX IF NOT EXISTS idx_properties_quartos ON properties (dormitorio);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.finalize_typed_columns()
+RETURNS text[]
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  c record;
+  trocadas text[] := '{}';
+  pendentes bigint;
+BEGIN
+  -- Rows written from now on are converted by the sync trigger, so the check needs no lock
+  FOR c IN SELECT * FROM properties_colunas_tipadas() LOOP
+    EXECUTE format('SELECT count(*) FROM properties WHERE %I IS NOT NULL AND %I IS NULL AND %s IS NOT NULL',
+                   c.coluna, c.coluna || '_tipado', format(c.conversao, quote_ident(c.coluna)))
+    INTO pendentes;
+    IF pendentes > 0 THEN
+      RAISE EXCEPTION 'Coluna % ainda tem % linhas sem conversão; rode o backfill antes', c.coluna, pendentes;
+    END IF;
+  END LOOP;
+
+  LOCK TABLE properties IN ACCESS EXCLUSIVE MODE;
+  -- The price history trigger depends on `valor`; it is recreated on the typed column
+  DROP TRIGGER IF EXISTS trg_properties_price_history ON properties;
+  FOR c IN SELECT * FROM properties_colunas_tipadas() LOOP
+    EXECUTE format('ALTER TABLE properties DROP COLUMN %I', c.coluna);
+    EXECUTE format('ALTER TABLE properties RENAME COLUMN %I TO %I', c.coluna || '_tipado', c.coluna);
+    trocadas := trocadas || c.coluna;
+  END LOOP;
+  CREATE TRIGGER trg_properties_price_history
+    AFTER UPDATE OF valor ON properties
+    FOR EACH ROW
+    WHEN (OLD.valor IS DISTINCT FROM NEW.valor)
+    EXECUTE FUNCTION registrar_alteracao_preco();
+
+  DROP TRIGGER IF EXISTS properties_tipar_colunas ON properties;
+  DROP FUNCTION IF EXISTS properties_tipar_colunas();
+  RETURN trocadas;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.backfill_typed_columns(uuid, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.finalize_typed_columns() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.criar_indices_faixas() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.backfill_typed_columns(uuid, integer) TO service_role;
+GRANT EXECUTE ON FUNCTION public.finalize_typed_columns() TO service_role;
+GRANT EXECUTE ON FUNCTION public.criar_indices_faixas() TO service_role;
+
+-- The market aggregates (20251017100000) parse the row values, so they keep working on text columns
+CREATE OR REPLACE FUNCTION public.market_aplicar_delta(linhas jsonb, sinal integer)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF linhas IS NULL OR jsonb_array_length(linhas) = 0 THEN
+    RETURN;
+  END IF;
+
+  CREATE TEMP TABLE IF NOT EXISTS market_delta (
+    uf text, cidade text, bairro text, tipo text, valor numeric, valor_m2 numeric,
+    dormitorio integer, piscina boolean, elevador boolean
+  ) ON COMMIT DROP;
+  TRUNCATE market_delta;
+
+  -- Read as text: the columns may still be text until finalize_typed_columns() runs
+  INSERT INTO market_delta
+  SELECT r.uf, r.cidade, r.bairro, r.tipo,
+         CASE WHEN r.valor > 0 THEN r.valor END,
+         CASE WHEN r.valor > 0 AND r.area_privativa > 0 THEN r.valor / r.area_privativa END,
+         CASE WHEN r.dormitorio > 0 THEN r.dormitorio END,
+         r.piscina, r.elevador
+  FROM (
+    SELECT coalesce(t.uf, '') AS uf, coalesce(t.cidade, '') AS cidade, coalesce(t.bairro, '') AS bairro,
+           coalesce(t.tipo, '') AS tipo, numero_br(t.valor) AS valor, numero_br(t.area_privativa) AS area_privativa,
+           round(numero_br(t.dormitorio))::integer AS dormitorio,
+           coalesce(lower(btrim(t.piscina)) IN ('1', 'true', 't', 'sim'), false) AS piscina,
+           coalesce(lower(btrim(t.elevador)) IN ('1', 'true', 't', 'sim'), false) AS elevador
+    FROM jsonb_to_recordset(linhas) AS t(uf text, cidade text, bairro text, tipo text, valor text,
+                                         area_privativa text, dormitorio text, piscina text, elevador text)
+  ) r;
+
+  -- Sorted so concurrent writers lock the group rows in the same order
+  INSERT INTO market_aggregates AS m (uf, cidade, bairro, tipo, total, com_valor, soma_valor, com_valor_m2,
+                                      soma_valor_m2, com_dormitorio, soma_dormitorio, com_piscina, com_elevador)
+  SELECT d.uf, d.cidade, d.bairro, d.tipo,
+         sinal * count(*), sinal * count(d.valor), sinal * coalesce(sum(d.valor), 0),
+         sinal * count(d.valor_m2), sinal * coalesce(sum(d.valor_m2), 0),
+         sinal * count(d.dormitorio), sinal * coalesce(sum(d.dormitorio), 0),
+         sinal * count(*) FILTER (WHERE d.piscina), sinal * count(*) FILTER (WHERE d.elevador)
+  FROM market_delta d
+  GROUP BY d.uf, d.cidade, d.bairro, d.tipo
+  ORDER BY d.uf, d.cidade, d.bairro, d.tipo
+  ON CONFLICT (uf, cidade, bairro, tipo) DO UPDATE SET
+    total = m.total + EXCLUDED.total,
+    com_valor = m.com_valor + EXCLUDED.com_valor,
+    soma_valor = m.soma_valor + EXCLUDED.soma_valor,
+    com_valor_m2 = m.com_valor_m2 + EXCLUDED.com_valor_m2,
+    soma_valor_m2 = m.soma_valor_m2 + EXCLUDED.soma_valor_m2,
+    com_dormitorio = m.com_dormitorio + EXCLUDED.com_dormitorio,
+    soma_dormitorio = m.soma_dormitorio + EXCLUDED.soma_dormitorio,
+    com_piscina = m.com_piscina + EXCLUDED.com_piscina,
+    com_elevador = m.com_elevador + EXCLUDED.com_elevador,
+    atualizado_em = now();
+
+  INSERT INTO market_price_buckets AS b (uf, cidade, bairro, tipo, medida, faixa, n)
+  SELECT uf, cidade, bairro, tipo, medida, faixa, sinal * count(*)
+  FROM (
+    SELECT uf, cidade, bairro, tipo, 'valor' AS medida, floor(ln(valor) / ln(1.02))::integer AS faixa
+    FROM market_delta WHERE valor IS NOT NULL
+    UNION ALL
+    SELECT uf, cidade, bairro, tipo, 'valor_m2', floor(ln(valor_m2) / ln(1.02))::integer
+    FROM market_delta WHERE valor_m2 IS NOT NULL
+  ) f
+  GROUP BY uf, cidade, bairro, tipo, medida, faixa
+  ORDER BY uf, cidade, bairro, tipo, medida, faixa
+  ON CONFLICT (uf, cidade, bairro, tipo, medida, faixa) DO UPDATE SET n = b.n + EXCLUDED.n;
+
+  IF sinal < 0 THEN
+    DELETE FROM market_price_buckets b
+    USING (SELECT DISTINCT uf, cidade, bairro, tipo FROM market_delta) d
+    WHERE (b.uf, b.cidade, b.bairro, b.tipo) = (d.uf, d.cidade, d.bairro, d.tipo) AND b.n <= 0;
+    DELETE FROM market_aggregates m
+    USING (SELECT DISTINCT uf, cidade, bairro, tipo FROM market_delta) d
+    WHERE (m.uf, m.cidade, m.bairro, m.tipo) = (d.uf, d.cidade, d.bairro, d.tipo) AND m.total <= 0;
+  END IF;
+END;
+$$;
+
+-- Already typed: build the indexes now
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM public.properties_colunas_tipadas()) THEN
+    PERFORM public.criar_indices_faixas();
+  END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_properties_old_cidade_valor ON public.properties_old (cidade, valor);
+CREATE INDEX IF NOT EXISTS idx_properties_old_cidade_area ON public.properties_old (cidade, area_privativa);
+CREATE INDEX IF NOT EXISTS idx_properties_old_bairro_valor ON public.properties_old (bairro, valor);
+CREATE INDEX IF NOT EXISTS idx_properties_old_bairro_area ON public.properties_old (bairro, area_privativa);
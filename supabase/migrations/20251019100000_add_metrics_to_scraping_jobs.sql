@@ -0,0 +1,16 @@
+/*
+  # Add per-stage timing metrics to 'scraping_jobs'
+
+  1. Table Modified: `scraping_jobs`
+    - `metrics` (jsonb) - Written once at job end: for each stage (Chrome
+      startup, page loads, fixed waits, parsing, Supabase round trips, ...)
+      {"n", "total_s", "p50_ms", "p95_ms", "p99_ms", "max_ms"}
+
+  2. Notes
+    - The same numbers are written by the scraper as a Prometheus textfile
+      (scripts/stage_metrics.py).
+    - No changes to RLS policies are needed as this is a data column.
+*/
+
+ALTER TABLE public.scraping_jobs
+ADD COLUMN IF NOT EXISTS metrics jsonb;